@@ -0,0 +1,65 @@
+"""
+Report on saved quiz results, for teachers reviewing a question bank.
+
+    python analytics.py
+    python analytics.py --topic Cricket --days 30 --min-attempts 10
+    python analytics.py --rescore --csv questions.csv
+
+Prints accuracy per topic and difficulty, then the hardest questions with
+their difficulty estimate and discrimination (how well a question
+separates stronger from weaker students). `--rescore` re-scores the saved
+answers with the current answer matching first and reports how many
+verdicts changed.
+"""
+import argparse
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="Only this student's quizzes")
+    parser.add_argument("--topic", help="Only this topic")
+    parser.add_argument("--difficulty", help="Only quizzes at this difficulty (Easy, Medium, Hard or Adaptive)")
+    parser.add_argument("--days", type=float, help="Only quizzes saved in the last N days")
+    parser.add_argument("--min-attempts", type=int, default=5, help="Skip questions answered fewer times than this")
+    parser.add_argument("--top", type=int, default=20, help="How many of the hardest questions to print")
+    parser.add_argument("--rescore", action="store_true", help="Re-score saved answers with the current answer matching")
+    parser.add_argument("--csv", help="Also write the per-question statistics to this CSV file")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+    from src.results.engine import accuracy_by, load_saved_results, question_difficulty, score_frame
+
+    since = time.time() - args.days * 86400 if args.days else None
+    df = load_saved_results(user_id=args.user, topic=args.topic, difficulty=args.difficulty, since=since)
+    if df.empty:
+        print("No saved results match")
+        return
+
+    print(f"{df['quiz_id'].nunique()} quizzes, {len(df)} answers")
+    if args.rescore:
+        rescored = score_frame(df)
+        print(f"Re-scoring changed {int((rescored != df['is_correct']).sum())} verdicts")
+        df = df.assign(is_correct=rescored)
+
+    with pd.option_context("display.width", 160, "display.max_colwidth", 60):
+        print()
+        print(accuracy_by(df, by=("topic", "question_difficulty")).to_string(index=False))
+
+        stats = question_difficulty(df, min_attempts=args.min_attempts)
+        print()
+        if stats.empty:
+            print(f"No question has {args.min_attempts} or more attempts yet")
+        else:
+            print(stats.head(args.top).to_string(index=False, float_format="{:.2f}".format))
+
+    if args.csv:
+        stats.to_csv(args.csv, index=False)
+        print(f"\nWrote {len(stats)} questions to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
+import hmac
 import os
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
-from src.utils.helpers import *
-from src.generator.question_generator import QuestionGenerator
+from src.utils.helpers import QuizManager, rerun, show_queue_position
 from src.config.settings import settings
+from src.common.logger import get_logger
 load_dotenv()
 
 
 def main():
     st.set_page_config(page_title="AI Quiz" , page_icon="🎧🎧")
 
+    # With the job queue, generation (and the pool it draws from) lives in the worker processes
+    if settings.POOL_ENABLED and not settings.JOB_QUEUE_ENABLED:
+        from src.pool.question_pool import start_pool_worker
+        start_pool_worker()
+
+    if settings.METRICS_PORT:
+        from src.common.metrics import start_metrics_server
+        start_metrics_server(settings.METRICS_PORT)
+
     if 'quiz_manager'not in st.session_state:
         st.session_state.quiz_manager = QuizManager()
 
@@ -39,6 +50,13 @@ def main():
     
     if 'custom_persona' not in st.session_state:
         st.session_state.custom_persona = ""
+
+    if 'student_id' not in st.session_state:
+        st.session_state.student_id = ""
+
+    if 'rate_limit_client_id' not in st.session_state:
+        # All of this session's quizzes queue as one client for shared API key rate limits
+        st.session_state.rate_limit_client_id = uuid.uuid4().hex
         
 
     st.title("AI Quiz Generator")
@@ -98,6 +116,13 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.header("Quiz Settings")
 
+    # Saved results are grouped by this id so a student's history can be queried
+    st.session_state.student_id = st.sidebar.text_input(
+        "Student ID (optional)",
+        value=st.session_state.student_id,
+        help="Used to group your saved results"
+    ).strip()
+
     # Persona Selection
     persona_options_display = [f"{settings.PERSONAS[p]['icon']} {p}" for p in settings.PERSONA_OPTIONS]
     selected_persona_display = st.sidebar.selectbox(
@@ -134,8 +159,13 @@ def main():
 
     topic = st.sidebar.text_input("Ennter Topic" , placeholder="Indian History, geography", value="Cricket")
 
+    adaptive = st.sidebar.checkbox(
+        "Adaptive Difficulty",
+        help="Ask one question at a time and adjust the difficulty to how well you are doing"
+    )
+
     difficulty = st.sidebar.selectbox(
-        "Dificulty Level",
+        "Starting Difficulty" if adaptive else "Dificulty Level",
         ["Easy" , "Medium" , "Hard"],
         index=1
     )
@@ -145,6 +175,43 @@ def main():
         min_value=1, max_value=10, value=3
     )
 
+    st.sidebar.markdown("---")
+    st.sidebar.header("Course Material")
+
+    # The material and its index are shared by every session, so only admins may change them
+    uploads = None
+    if settings.DOCUMENT_ADMIN_TOKEN:
+        admin_token = st.sidebar.text_input("Admin Token", type="password", help="Required to upload course material")
+        if admin_token and hmac.compare_digest(admin_token.encode("utf-8"), settings.DOCUMENT_ADMIN_TOKEN.encode("utf-8")):
+            uploads = st.sidebar.file_uploader(
+                "Upload PDF, Markdown or text files",
+                type=["pdf", "md", "markdown", "txt"],
+                accept_multiple_files=True
+            )
+    if uploads and st.sidebar.button("Index Course Material"):
+        from src.retrieval.document_index import build_index
+
+        os.makedirs(settings.DOCUMENTS_DIR, exist_ok=True)
+        for upload in uploads:
+            with open(os.path.join(settings.DOCUMENTS_DIR, os.path.basename(upload.name)), "wb") as f:
+                f.write(upload.getbuffer())
+        try:
+            with st.sidebar:
+                with st.spinner("Indexing course material..."):
+                    # Incremental: only new or changed files are parsed again
+                    manifest = build_index()
+            st.sidebar.success(f"Indexed {manifest['chunks']} passages from {manifest['documents']} documents")
+        except Exception as e:
+            st.sidebar.error(f"Failed to index course material {e}")
+
+    from src.retrieval.document_index import get_document_index
+    document_index = get_document_index()
+    grounded = st.sidebar.checkbox(
+        "Generate from course material",
+        disabled=document_index is None,
+        help="Base each question on the most relevant passages of the indexed material for the topic"
+    )
+
     
     if st.sidebar.button("Generate Quiz"):
         # Get the appropriate API key based on provider
@@ -176,49 +243,111 @@ def main():
         else:
             persona_style = settings.PERSONAS[selected_persona]['style']
 
-        # Debug info (will appear in terminal/logs, not in UI)
-        import logging
-        logging.info(f"Provider: {st.session_state.selected_provider}, Model: {st.session_state.selected_model}")
-        logging.info(f"API Key length: {len(active_api_key)}, First 10 chars: {active_api_key[:10] if len(active_api_key) > 10 else 'TOO_SHORT'}")
+        # Debug info (will appear in logs, not in UI); never log any part of the key
+        logger = get_logger("application")
+        logger.info(f"Provider: {st.session_state.selected_provider}, Model: {st.session_state.selected_model}")
+        logger.info(f"API Key length: {len(active_api_key)}")
 
         st.session_state.quiz_submitted = False
 
+        # Imported on first use so the LLM stack doesn't slow down the first render
+        from src.generator.question_generator import QuestionGenerator
+
         # Create generator with selected provider, API key, model, and persona
+        # Fail over to the other provider when the user has entered a key for it too
+        fallbacks = []
+        if model_provider == "Groq" and st.session_state.openai_api_key:
+            fallbacks.append(("OpenAI", st.session_state.openai_api_key, settings.OPENAI_MODELS[0]))
+        elif model_provider == "OpenAI" and st.session_state.groq_api_key:
+            fallbacks.append(("Groq", st.session_state.groq_api_key, settings.GROQ_MODELS[0]))
+
         generator = QuestionGenerator(
             provider=st.session_state.selected_provider,
             api_key=active_api_key,
             model=st.session_state.selected_model,
-            persona_style=persona_style
+            persona_style=persona_style,
+            fallbacks=fallbacks,
+            document_index=document_index if grounded else None,
+            client_id=st.session_state.rate_limit_client_id
         )
         
-        succces = st.session_state.quiz_manager.generate_questions(
-            generator,
-            topic,question_type,difficulty,num_questions
-        )
+        if adaptive:
+            # Only the first question is generated now; later ones are prefetched while answering
+            try:
+                with st.spinner("Generating first question..."), show_queue_position(generator):
+                    st.session_state.quiz_manager.start_adaptive(generator, topic, question_type, difficulty, num_questions)
+                st.session_state.quiz_generated = True
+            except Exception as e:
+                st.session_state.quiz_manager.reset()
+                st.error(f"Error generating question {e}")
+                st.session_state.quiz_generated = False
+            rerun()
+            return
+
+        # Render questions as they arrive so the first one shows up after a single LLM call
+        progress = st.progress(0.0, text="Generating quiz...")
+        live_preview = st.empty()
+        succces = True
+
+        try:
+            # Other sessions may be using the same API key; show our place in its queue meanwhile
+            with live_preview.container(), show_queue_position(generator):
+                completed = 0
+                for index, question in st.session_state.quiz_manager.iter_questions(
+                    generator,
+                    topic,question_type,difficulty,num_questions
+                ):
+                    completed += 1
+                    progress.progress(completed/num_questions, text=f"Generated {completed} of {num_questions} questions")
+                    st.markdown(f"**Question {index+1} : {question.text}**")
+        except Exception as e:
+            st.session_state.quiz_manager.reset()
+            st.error(f"Error generating question {e}")
+            succces = False
+
+        progress.empty()
+        live_preview.empty()
 
         st.session_state.quiz_generated= succces
         rerun()
 
     if st.session_state.quiz_generated and st.session_state.quiz_manager.questions:
         st.header("Quiz")
-        st.session_state.quiz_manager.attempt_quiz()
 
-        if st.button("Submit Quiz"):
+        if st.session_state.quiz_manager.adaptive is not None:
+            if not st.session_state.quiz_submitted:
+                try:
+                    with st.spinner("Loading next question..."), show_queue_position(st.session_state.quiz_manager.adaptive.generator):
+                        answered = st.session_state.quiz_manager.attempt_adaptive()
+                except Exception as e:
+                    st.error(f"Error generating question {e}")
+                    answered = False
+
+                if answered:
+                    if st.session_state.quiz_manager.adaptive_finished:
+                        st.session_state.quiz_manager.evaluate_quiz()
+                        st.session_state.quiz_submitted = True
+                    # Show the next question (or the results) right away
+                    st.rerun()
+
+        else:
+            st.session_state.quiz_manager.attempt_quiz()
+
+        if st.session_state.quiz_manager.adaptive is None and st.button("Submit Quiz"):
             st.session_state.quiz_manager.evaluate_quiz()
             st.session_state.quiz_submitted = True
             rerun()
 
     if st.session_state.quiz_submitted:
         st.header("Quiz Results")
-        results_df = st.session_state.quiz_manager.generate_result_dataframe()
+        results = st.session_state.quiz_manager.results
 
-        if not results_df.empty:
-            correct_count = results_df["is_correct"].sum()
-            total_questions = len(results_df)
-            score_percentage = (correct_count/total_questions)*100
+        if results:
+            # Summary is computed once at submission, so reruns don't rebuild anything
+            score_percentage = st.session_state.quiz_manager.summary['score_percentage']
             st.write(f"Score : {score_percentage}")
 
-            for _, result in results_df.iterrows():
+            for result in results:
                 question_num = result['question_number']
                 if result['is_correct']:
                     st.success(f"✅ Question {question_num} : {result['question']}")
@@ -231,17 +360,14 @@ def main():
 
             
             if st.button("Save Results"):
-                saved_file = st.session_state.quiz_manager.save_to_csv()
-                if saved_file:
-                    with open(saved_file,'rb') as f:
-                        st.download_button(
-                            label="Downlaod Results",
-                            data=f.read(),
-                            file_name=os.path.basename(saved_file),
-                            mime='text/csv'
-                        )
-                else:
-                    st.warning("No results avialble")
+                st.session_state.quiz_manager.save_results(st.session_state.student_id or None)
+
+            st.download_button(
+                label="Downlaod Results",
+                data=st.session_state.quiz_manager.export_csv(),
+                file_name=f"quiz_results_{st.session_state.quiz_manager.quiz.quiz_id}.csv",
+                mime='text/csv'
+            )
 
 if __name__=="__main__":
     main()
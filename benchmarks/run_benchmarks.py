@@ -0,0 +1,211 @@
+"""
+Offline generation benchmarks against the deterministic fake LLM.
+
+No API credits are spent: every scenario runs through get_llm("Fake", ...),
+which returns src.llm.fake_llm.FakeChatModel with the latency, failure
+rate and malformed-output rate given on the command line.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --latency 0.2 --failure-rate 0.05 --malformed-rate 0.1 --output bench.json
+
+Reports p50/p95 latency, questions per second and peak traced memory per
+scenario, and optionally writes them as JSON for comparing runs.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config.settings import settings  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def prompt_token_totals() -> dict:
+    """Prompt tokens summed over all LLM calls so far, and how many of them hit the prefix cache."""
+    from src.common.metrics import metrics
+
+    totals = {"prompt": 0.0, "cached": 0.0}
+    for counter in metrics.snapshot()["counters"]:
+        if counter["name"] == "llm_prompt_tokens_total":
+            totals["prompt"] += counter["value"]
+        elif counter["name"] == "llm_prompt_cached_tokens_total":
+            totals["cached"] += counter["value"]
+    return totals
+
+
+def configure(args):
+    settings.FAKE_LLM_LATENCY_SECONDS = args.latency
+    settings.FAKE_LLM_LATENCY_JITTER_SECONDS = args.jitter
+    settings.FAKE_LLM_FAILURE_RATE = args.failure_rate
+    settings.FAKE_LLM_MALFORMED_RATE = args.malformed_rate
+    settings.FAKE_LLM_SEED = args.seed
+
+    # Measure generation itself, not the shared stores in front of it
+    settings.CACHE_ENABLED = False
+    settings.POOL_ENABLED = False
+    settings.SHARED_GENERATION_ENABLED = False
+    settings.DEDUP_ACROSS_QUIZZES = False
+    settings.LLM_BACKOFF_BASE_SECONDS = args.backoff
+
+    from src.llm.llm_factory import clear_llm_pool
+    clear_llm_pool()
+
+
+def make_generator():
+    from src.generator.question_generator import QuestionGenerator
+    return QuestionGenerator(provider="Fake", api_key="offline", model="fake-model", persona_style="neutral and educational")
+
+
+def run_scenario(name, func, iterations, questions_per_iteration, warmup=1):
+    """Run func `iterations` times and summarise latency, throughput and peak memory."""
+    # Warm-up runs pay one-off costs such as lazy imports
+    for _ in range(warmup):
+        try:
+            func()
+        except Exception:
+            pass
+
+    latencies = []
+    failures = 0
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            ok = func()
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - t0)
+        if ok is False:
+            failures += 1
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "failures": failures,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "questions_per_second": (iterations * questions_per_iteration) / total if total else 0.0,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def build_scenarios(args):
+    from src.utils.helpers import QuizManager
+
+    generator = make_generator()
+    scenarios = [
+        ("generate_mcq", lambda: generator.generate_mcq("Benchmarks", "medium"), args.iterations, 1),
+        ("generate_fill_blank", lambda: generator.generate_fill_blank("Benchmarks", "medium"), args.iterations, 1),
+    ]
+
+    for count in (1, 10, 100):
+        def generate(count=count):
+            return QuizManager().generate_questions(generator, "Benchmarks", "Multiple Choice", "Medium", count)
+        iterations = max(3, args.iterations // count) if count > 1 else args.iterations
+        scenarios.append((f"quiz_manager_generate_{count}", generate, iterations, count))
+
+    # A scored 100-question quiz for the evaluation and persistence scenarios
+    settings.FAKE_LLM_FAILURE_RATE = settings.FAKE_LLM_MALFORMED_RATE = 0.0
+    settings.FAKE_LLM_LATENCY_SECONDS = settings.FAKE_LLM_LATENCY_JITTER_SECONDS = 0.0
+    from src.llm.llm_factory import clear_llm_pool
+    clear_llm_pool()
+
+    scored = QuizManager()
+    scored.generate_questions(make_generator(), "Benchmarks", "Multiple Choice", "Medium", 100)
+    for i, q in enumerate(scored.questions):
+        scored.set_answer(i, q.options[i % 4])
+
+    def evaluate():
+        scored.evaluate_quiz()
+        return bool(scored.results)
+
+    def save():
+        from src.results.store import get_results_store
+        saved = scored.save_results() is not None
+        get_results_store().flush()
+        return saved
+
+    def export():
+        return bool(scored.export_csv())
+
+    scenarios.append(("evaluate_quiz_100", evaluate, args.iterations, 100))
+    scenarios.append(("save_results_100", save, args.iterations, 100))
+    scenarios.append(("export_csv_100", export, args.iterations, 100))
+    scored.evaluate_quiz()
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake LLM base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra uniform random latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls that raise a transient error")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of calls that return no JSON")
+    parser.add_argument("--backoff", type=float, default=0.01, help="Retry backoff base in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per scenario")
+    parser.add_argument("--only", help="Comma-separated scenario names to run")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    configure(args)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    # save_results writes into ./results, so keep it out of the repo
+    workdir = tempfile.mkdtemp(prefix="quiz-bench-")
+    os.chdir(workdir)
+
+    # Building the scored quiz resets the fake LLM to a clean config, so configure again afterwards
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+    scenarios = build_scenarios(args)
+    configure(args)
+
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'q/s':>10}{'peak KB':>10}{'fail':>6}")
+    for name, func, iterations, per_iteration in scenarios:
+        if only and name not in only:
+            continue
+        result = run_scenario(name, func, iterations, per_iteration, args.warmup)
+        results.append(result)
+        print(f"{name:<28}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['questions_per_second']:>10.1f}{result['peak_memory_kb']:>10.0f}{result['failures']:>6}")
+
+    tokens = prompt_token_totals()
+    if tokens["prompt"]:
+        print(f"prompt tokens: {tokens['prompt']:.0f}, served from prefix cache: {tokens['cached'] / tokens['prompt']:.1%}")
+
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump({
+                "config": vars(args),
+                "python": platform.python_version(),
+                "timestamp": time.time(),
+                "results": results,
+                "prompt_tokens": tokens,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Measures, each in a fresh interpreter so nothing is already imported:
+  * cumulative import time of the app's modules (python -X importtime)
+  * time to the first complete render of application.py (streamlit AppTest)
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --json startup.json --max-render-ms 3000
+
+Exits with status 1 when a budget is exceeded, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "application",
+    "src.utils.helpers",
+    "src.generator.question_generator",
+    "src.llm.llm_factory",
+    "src.models.question_schemas",
+    "src.prompts.templates",
+    "src.config.settings",
+]
+
+# Heavy dependencies that should only load when actually needed
+LAZY_MODULES = ["pandas", "langchain_groq", "langchain_openai", "langchain_core.output_parsers"]
+
+RENDER_SNIPPET = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("application.py", default_timeout=60)
+app.run()
+elapsed = time.perf_counter() - start
+if app.exception:
+    raise SystemExit(f"application.py raised: {app.exception}")
+print(elapsed)
+"""
+
+LAZY_SNIPPET = """
+import json, sys
+import application
+print(json.dumps(sorted(m for m in {modules!r} if m in sys.modules)))
+"""
+
+
+def _run(code, *extra_args):
+    return subprocess.run(
+        [sys.executable, *extra_args, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+    )
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter."""
+    proc = _run(f"import {module}", "-X", "importtime")
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    for line in reversed(proc.stderr.splitlines()):
+        # Format: "import time:  self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def first_render_ms() -> float:
+    proc = _run(RENDER_SNIPPET)
+    if proc.returncode != 0:
+        raise RuntimeError(f"First render failed:\n{proc.stderr}")
+    return float(proc.stdout.strip().splitlines()[-1]) * 1000
+
+
+def eagerly_loaded() -> list:
+    proc = _run(LAZY_SNIPPET.format(modules=LAZY_MODULES))
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing application failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (median is reported)")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this path")
+    parser.add_argument("--max-import-ms", type=float, help="Budget for importing application.py")
+    parser.add_argument("--max-render-ms", type=float, help="Budget for the first render")
+    args = parser.parse_args()
+
+    results = {"imports_ms": {}, "first_render_ms": None, "eagerly_loaded": []}
+
+    for module in MODULES:
+        results["imports_ms"][module] = statistics.median(import_time_ms(module) for _ in range(args.repeat))
+        print(f"import {module:<40} {results['imports_ms'][module]:9.1f} ms")
+
+    results["first_render_ms"] = statistics.median(first_render_ms() for _ in range(args.repeat))
+    print(f"{'first render of application.py':<47} {results['first_render_ms']:9.1f} ms")
+
+    results["eagerly_loaded"] = eagerly_loaded()
+    if results["eagerly_loaded"]:
+        print(f"Loaded at startup but should be lazy: {', '.join(results['eagerly_loaded'])}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    if results["eagerly_loaded"]:
+        failures.append("heavy modules imported at startup")
+    if args.max_import_ms is not None and results["imports_ms"]["application"] > args.max_import_ms:
+        failures.append(f"application import {results['imports_ms']['application']:.1f} ms > {args.max_import_ms} ms")
+    if args.max_render_ms is not None and results["first_render_ms"] > args.max_render_ms:
+        failures.append(f"first render {results['first_render_ms']:.1f} ms > {args.max_render_ms} ms")
+
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Build or update the course material index used for document-grounded quizzes.
+
+    python ingest.py                      # index ./documents into ./index/documents
+    python ingest.py --source course/ --force
+
+Only files added, changed or removed since the last run are re-parsed.
+The index is a directory of memory-mapped arrays that the app and the
+workers open read-only, so it can be built once and shared.
+"""
+import argparse
+from dotenv import load_dotenv
+from src.config.settings import settings
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index course material for grounded quiz generation")
+    parser.add_argument("--source", default=settings.DOCUMENTS_DIR, help="Directory of PDF, Markdown and text files")
+    parser.add_argument("--index", default=settings.INDEX_DIR, help="Index directory")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if no document changed")
+    args = parser.parse_args()
+
+    from src.retrieval.document_index import build_index
+
+    manifest = build_index(args.source, args.index, force=args.force)
+    print(f"Index {manifest['version']}: {manifest['documents']} documents, {manifest['chunks']} chunks, {manifest['terms']} terms")
+
+
+if __name__ == "__main__":
+    main()
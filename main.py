@@ -1,6 +1,249 @@
+"""
+Bulk quiz generation from a syllabus file, for pre-building content offline.
+
+    python main.py syllabus.csv --output quizzes.jsonl
+    python main.py syllabus.jsonl --output quizzes.jsonl --rpm 30 --workers 8
+
+Each row of the syllabus (CSV with a header, or JSON lines) has the fields
+topic, difficulty, type ('mcq' or 'fill_blank'), persona (a built-in
+persona name or a free-text style) and count. Missing fields fall back
+to Medium, mcq, Friendly Tutor and 5.
+
+Every question is appended to the output as one JSON line as soon as it
+is generated. The output doubles as the checkpoint: running the same
+command again skips the questions already written and only generates
+the rest, avoiding repeats of them. All LLM calls, retries included,
+share one requests-per-minute budget.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from src.config.settings import settings
+from src.common.logger import get_logger
+
+load_dotenv()
+
+QUESTION_TYPES = {
+    "mcq": "Multiple Choice",
+    "multiple choice": "Multiple Choice",
+    "fill_blank": "Fill in the Blank",
+    "fill in the blank": "Fill in the Blank",
+}
+
+logger = get_logger("bulk")
+
+
+def load_syllabus(path: str) -> list:
+    """
+    Read syllabus rows into normalized items with a stable id each.
+
+    Raises:
+        ValueError: If a row has no topic or an unknown type
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    items = []
+    for number, row in enumerate(rows, 1):
+        row = {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        topic = row.get("topic")
+        if not topic:
+            raise ValueError(f"Row {number}: topic is required")
+
+        kind = str(row.get("type") or "mcq").lower()
+        if kind not in QUESTION_TYPES:
+            raise ValueError(f"Row {number}: unknown type '{row.get('type')}'")
+
+        count = row.get("count")
+        if count is None or count == "":
+            count = 5
+        else:
+            try:
+                if isinstance(count, bool) or (isinstance(count, float) and not count.is_integer()):
+                    raise ValueError(count)
+                count = int(count)
+            except (TypeError, ValueError):
+                raise ValueError(f"Row {number}: count must be a whole number, got '{row.get('count')}'") from None
+            if count < 0:
+                raise ValueError(f"Row {number}: count can't be negative")
+
+        persona = row.get("persona") or "Friendly Tutor"
+        item = {
+            "topic": topic,
+            "difficulty": str(row.get("difficulty") or "Medium").capitalize(),
+            "question_type": QUESTION_TYPES[kind],
+            "persona": persona,
+            "count": min(count, settings.MAX_QUESTIONS_PER_QUIZ),
+        }
+        # Content-derived id, so reordering the file doesn't redo finished rows
+        digest = hashlib.sha256(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        item["id"] = f"{digest}-{sum(1 for i in items if i['id'].startswith(digest))}"
+        items.append(item)
+    return items
+
+
+def persona_style(persona: str) -> str:
+    known = settings.PERSONAS.get(persona)
+    if known and known["style"]:
+        return known["style"]
+    return persona
+
+
+def load_checkpoint(path: str) -> dict:
+    """Questions already written per item id, from a previous (possibly interrupted) run."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A crash can leave a partial last line
+                break
+            done.setdefault(record["item_id"], {})[record["index"]] = record["question"]["question"]
+            valid_bytes += len(line)
+
+    if valid_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+class JsonlWriter:
+    """Appends records from many threads, each line flushed and synced before it counts as done."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def build_generator(args, style: str, limiter):
+    from src.generator.question_generator import QuestionGenerator
+    from src.llm.rate_limiter import RateLimitedLLM
+
+    api_key = {"Groq": settings.GROQ_API_KEY, "OpenAI": os.getenv("OPENAI_API_KEY")}.get(args.provider, "offline")
+    if not api_key:
+        raise ValueError(f"No API key for {args.provider} in the environment")
+
+    models = {"Groq": settings.GROQ_MODELS, "OpenAI": settings.OPENAI_MODELS}.get(args.provider, ["fake-model"])
+    generator = QuestionGenerator(args.provider, api_key, args.model or models[0], style)
+    # Every model call, including retries and failover, takes a slot from the shared budget
+    generator.llm.candidates = [(label, RateLimitedLLM(llm, limiter)) for label, llm in generator.llm.candidates]
+    return generator
+
+
+def run_item(item: dict, generator, writer: JsonlWriter, done: dict) -> int:
+    """Generate the questions of one row that aren't in the output yet. Returns how many were written."""
+    from src.utils.helpers import QuizManager
+
+    missing = [i for i in range(item["count"]) if i not in done]
+    if not missing:
+        return 0
+
+    manager = QuizManager()
+    # Questions from an earlier run count as recent, so the rest of the row doesn't repeat them
+    for text in done.values():
+        manager.recent_questions.add(text)
+
+    kind = 'mcq' if item["question_type"] == "Multiple Choice" else 'fill_blank'
+    written = 0
+    for offset, question in manager.iter_generated(generator, item["topic"], item["question_type"], item["difficulty"], len(missing)):
+        writer.write({
+            "item_id": item["id"],
+            "index": missing[offset],
+            "topic": item["topic"],
+            "difficulty": item["difficulty"],
+            "type": kind,
+            "persona": item["persona"],
+            "question": question.model_dump(),
+            "generated_at": time.time(),
+        })
+        written += 1
+    return written
+
+
 def main():
-    print("Hello from study-buddy-ai!")
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("syllabus", help="CSV or JSONL file of topic, difficulty, type, persona, count rows")
+    parser.add_argument("--output", default="quizzes.jsonl", help="JSONL output, also used to resume")
+    parser.add_argument("--provider", default="Groq", choices=[*settings.MODEL_PROVIDERS, "Fake"])
+    parser.add_argument("--model", help="Model name (default: the provider's first model)")
+    parser.add_argument("--rpm", type=float, default=settings.BULK_REQUESTS_PER_MINUTE, help="Global LLM requests per minute")
+    parser.add_argument("--workers", type=int, default=settings.BULK_WORKERS, help="Syllabus rows generated concurrently")
+    parser.add_argument("--fresh", action="store_true", help="Always call the LLM instead of reusing cached or pooled questions")
+    args = parser.parse_args()
+
+    from src.llm.rate_limiter import RateLimiter
+
+    if args.fresh:
+        settings.CACHE_ENABLED = False
+    # The interactive warm pool is not meant to be drained by bulk runs
+    settings.POOL_ENABLED = False
+
+    items = load_syllabus(args.syllabus)
+    done = load_checkpoint(args.output)
+    total = sum(item["count"] for item in items)
+    already = sum(min(len(done.get(item["id"], {})), item["count"]) for item in items)
+    print(f"{len(items)} rows, {total} questions, {already} already in {args.output}")
+
+    limiter = RateLimiter(args.rpm, burst=max(1, args.workers))
+    generators = {}
+    writer = JsonlWriter(args.output)
+    failed = 0
+    started = time.monotonic()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = {}
+            for item in items:
+                style = persona_style(item["persona"])
+                if style not in generators:
+                    generators[style] = build_generator(args, style, limiter)
+                futures[executor.submit(run_item, item, generators[style], writer, done.get(item["id"], {}))] = item
+
+            for future in as_completed(futures):
+                item = futures[future]
+                label = f"{item['topic']} ({item['difficulty']}, {item['question_type']}, {item['persona']})"
+                try:
+                    written = future.result()
+                    print(f"done    {label}: {written} new")
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Bulk item {item['id']} failed: {str(e)}")
+                    print(f"FAILED  {label}: {e}")
+    finally:
+        writer.close()
+
+    print(f"Finished in {time.monotonic() - started:.1f}s with {failed} failed rows"
+          + ("; run the same command again to retry them" if failed else ""))
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
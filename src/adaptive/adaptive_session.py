@@ -0,0 +1,173 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from src.config.settings import settings
+from src.generator.dedup import DedupIndex
+from src.common.logger import get_logger
+from src.common.metrics import metrics
+
+if TYPE_CHECKING:
+    from src.generator.question_generator import QuestionGenerator
+
+# Shared by all sessions in the process so prefetching can't fan out without bound
+_prefetch_executor = ThreadPoolExecutor(max_workers=settings.ADAPTIVE_PREFETCH_WORKERS, thread_name_prefix="adaptive-prefetch")
+
+metrics.describe("adaptive_prefetch_total", "Prefetched adaptive questions by outcome (used, discarded, miss)")
+
+
+class AdaptiveSession:
+    """
+    Serves a quiz one question at a time, choosing each difficulty from running accuracy.
+
+    While the student answers the current question, candidates at the
+    current difficulty and its neighbours are generated in the background,
+    since the next level is always one of those. When the next level is
+    decided, its candidate is used and the rest are cancelled, or handed to
+    the question cache if they already finished.
+
+    With the job queue enabled, questions (prefetches included) are
+    generated by the worker processes, and prefetch threads only wait on
+    the queue.
+
+    Must not call Streamlit APIs; prefetches run on worker threads.
+    """
+
+    def __init__(self, generator: 'QuestionGenerator', topic: str, question_type: str, difficulty: str, num_questions: int):
+        self.generator = generator
+        self.topic = topic
+        self.question_type = question_type
+        self.num_questions = num_questions
+        self.levels = settings.ADAPTIVE_DIFFICULTIES
+        self.level = self.levels.index(difficulty) if difficulty in self.levels else len(self.levels) // 2
+        self.history = []
+        # Only answers given at the current level count towards the next change
+        self._level_start = 0
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._asked = DedupIndex(settings.DEDUP_SIMILARITY_THRESHOLD)
+        self._prefetched = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def difficulty(self) -> str:
+        return self.levels[self.level]
+
+    @property
+    def accuracy(self) -> float:
+        recent = self._recent()
+        return sum(recent) / len(recent) if recent else 0.0
+
+    def _recent(self) -> list:
+        start = max(self._level_start, len(self.history) - settings.ADAPTIVE_WINDOW)
+        return self.history[start:]
+
+    def next_level(self) -> int:
+        """Step up after a strong run at this level, down after a weak one, otherwise stay."""
+        recent = self._recent()
+        if len(recent) < settings.ADAPTIVE_MIN_ANSWERS:
+            return self.level
+        if self.accuracy >= settings.ADAPTIVE_PROMOTE_ACCURACY:
+            return min(self.level + 1, len(self.levels) - 1)
+        if self.accuracy <= settings.ADAPTIVE_DEMOTE_ACCURACY:
+            return max(self.level - 1, 0)
+        return self.level
+
+    def record(self, correct: bool):
+        """Record the current answer and move to the difficulty for the next question."""
+        self.history.append(bool(correct))
+        previous, self.level = self.level, self.next_level()
+        if self.level != previous:
+            self._level_start = len(self.history)
+            self.logger.info(f"Adaptive difficulty {self.levels[previous]} -> {self.difficulty} at accuracy {self.accuracy:.2f}")
+
+    def next_question(self):
+        """
+        Return the question model for the current difficulty.
+
+        Uses the prefetched candidate when there is one, generating on the
+        spot only on a miss or a duplicate, then starts prefetching for the
+        question after it.
+        """
+        with self._lock:
+            future = self._prefetched.pop(self.level, None)
+            unused, self._prefetched = self._prefetched, {}
+        self._discard(unused)
+
+        question = None
+        if future is not None:
+            try:
+                question = future.result()
+            except Exception as e:
+                self.logger.warning(f"Prefetch failed, generating on demand: {str(e)}")
+
+        if question is not None and self._asked.is_duplicate(question.question):
+            question = None
+        metrics.inc("adaptive_prefetch_total", result="used" if question is not None else "miss")
+
+        if question is None:
+            question = self._generate(self.level, self._avoid())
+
+        self._asked.add(question.question)
+        if len(self._asked) < self.num_questions:
+            self.prefetch()
+        return question
+
+    def prefetch(self):
+        """Start generating candidates at the current difficulty and its neighbours."""
+        candidates = {max(self.level - 1, 0), self.level, min(self.level + 1, len(self.levels) - 1)}
+        # Snapshot on the caller's thread; _asked is only ever touched by the session's own thread
+        avoid = self._avoid()
+        with self._lock:
+            if self._closed:
+                return
+            for level in candidates - self._prefetched.keys():
+                self._prefetched[level] = _prefetch_executor.submit(self._generate, level, avoid)
+
+    def _avoid(self):
+        return self._asked.recent_texts(settings.DEDUP_AVOID_PROMPT_LIMIT) or None
+
+    def _generate(self, level: int, avoid: list = None):
+        if settings.JOB_QUEUE_ENABLED:
+            # Web replicas never call the LLM themselves; each question is a one-item job for the workers
+            from src.common.custom_exception import CustomException
+            from src.utils.helpers import QuizManager
+
+            questions = [question for _, question in QuizManager()._iter_job(
+                self.generator, self.topic, self.question_type, self.levels[level], 1, avoid
+            )]
+            if not questions:
+                raise CustomException("Generation job returned no question", self.levels[level])
+            return questions[0]
+
+        difficulty = self.levels[level].lower()
+        if self.question_type == "Multiple Choice":
+            return self.generator.generate_mcq(self.topic, difficulty, avoid)
+        return self.generator.generate_fill_blank(self.topic, difficulty, avoid)
+
+    def _discard(self, futures: dict):
+        for level, future in futures.items():
+            metrics.inc("adaptive_prefetch_total", result="discarded")
+            if not future.cancel():
+                # Already running or done; keep the result for later quizzes rather than waste the call
+                future.add_done_callback(lambda f, level=level: self._donate(f, level))
+
+    def _donate(self, future, level: int):
+        if not settings.CACHE_ENABLED or future.cancelled() or future.exception() is not None:
+            return
+        try:
+            from src.cache.question_cache import get_question_cache, make_cache_key
+
+            kind = 'mcq' if self.question_type == "Multiple Choice" else 'fill_blank'
+            key = make_cache_key(self.generator.provider, self.generator.model, self.generator.persona_style,
+                                 self.topic, self.levels[level], kind, self.generator.cache_scope)
+            get_question_cache().put(key, kind, [future.result()])
+        except Exception as e:
+            self.logger.warning(f"Could not cache discarded prefetch: {str(e)}")
+
+    def close(self):
+        """Stop prefetching; called when the quiz ends or is replaced."""
+        with self._lock:
+            self._closed = True
+            unused, self._prefetched = self._prefetched, {}
+        self._discard(unused)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from src.models.question_schemas import MCQQuestion,FillBlankQuestion
+from src.config.settings import settings
+from src.common.logger import get_logger
+from src.common.metrics import metrics
+
+
+QUESTION_KINDS = {
+    "mcq": MCQQuestion,
+    "fill_blank": FillBlankQuestion,
+}
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def make_cache_key(provider: str, model: str, persona_style: str, topic: str, difficulty: str, kind: str, scope: str = "") -> str:
+    """
+    Build the cache key for a bucket of interchangeable questions.
+
+    Args:
+        provider: Model provider ('Groq' or 'OpenAI')
+        model: Model name
+        persona_style: Persona style description used in the prompt
+        topic: Quiz topic (normalized before hashing)
+        difficulty: Difficulty level
+        kind: 'mcq' or 'fill_blank'
+        scope: Source material the questions were grounded in, if any
+
+    Returns:
+        Hex digest identifying the bucket
+    """
+    parts = [provider, model, persona_style, normalize_topic(topic), difficulty.lower(), kind]
+    if scope:
+        parts.append(scope)
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class QuestionCache:
+    """
+    SQLite-backed store of validated questions with TTL and LRU eviction.
+
+    Questions are grouped in buckets by cache key, and `sample` returns
+    distinct random questions from a bucket so repeated quizzes still vary.
+    """
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        self.path = path or settings.CACHE_DB_PATH
+        self.ttl_seconds = settings.CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " cache_key TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " UNIQUE (cache_key, fingerprint))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_key ON questions (cache_key, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_questions_access ON questions (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, key: str, kind: str, questions: list) -> int:
+        """Store validated questions in a bucket, skipping exact duplicates. Returns rows added."""
+        if not questions:
+            return 0
+
+        now = time.time()
+        rows = []
+        for question in questions:
+            payload = question.model_dump_json()
+            fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            rows.append((key, kind, fingerprint, payload, now, now))
+
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (cache_key, kind, fingerprint, payload, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            added = conn.total_changes - before
+            self._evict(conn)
+        return added
+
+    def sample(self, key: str, n: int) -> list:
+        """Return up to n distinct random, unexpired questions from a bucket."""
+        if n <= 0:
+            return []
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, payload FROM questions"
+                " WHERE cache_key = ? AND created_at >= ?"
+                " ORDER BY RANDOM() LIMIT ?",
+                (key, now - self.ttl_seconds, n)
+            ).fetchall()
+
+            if rows:
+                conn.executemany(
+                    "UPDATE questions SET last_access = ? WHERE id = ?",
+                    [(now, row[0]) for row in rows]
+                )
+
+            self.hits += len(rows)
+            self.misses += n - len(rows)
+
+        metrics.inc("question_cache_lookups_total", len(rows), result="hit")
+        metrics.inc("question_cache_lookups_total", n - len(rows), result="miss")
+
+        return [QUESTION_KINDS[kind].model_validate_json(payload) for _, kind, payload in rows]
+
+    def count(self, key: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE cache_key = ? AND created_at >= ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()[0]
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM questions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+        total = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        overflow = total - self.max_entries
+        if overflow > 0:
+            # Least recently used entries go first
+            conn.execute(
+                "DELETE FROM questions WHERE id IN"
+                " (SELECT id FROM questions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.logger.info(f"Evicted {overflow} cached questions")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+_question_cache = None
+_question_cache_lock = threading.Lock()
+
+
+def get_question_cache() -> QuestionCache:
+    """Return the process-wide question cache, creating it on first use."""
+    global _question_cache
+    with _question_cache_lock:
+        if _question_cache is None:
+            _question_cache = QuestionCache()
+        return _question_cache
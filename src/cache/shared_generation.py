@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from src.config.settings import settings
+from src.common.logger import get_logger
+from src.common.metrics import metrics
+
+
+class _Flight:
+    """One shared generation: items are appended as they arrive and any number of sessions can read them."""
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.finished_at = None
+        self.cond = threading.Condition()
+
+    def push(self, item):
+        with self.cond:
+            self.items.append(item)
+            self.cond.notify_all()
+
+    def finish(self, error: Exception = None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.finished_at = time.monotonic()
+            self.cond.notify_all()
+
+    def iterate(self, timeout: float):
+        position = 0
+        while True:
+            with self.cond:
+                while position >= len(self.items) and not self.done:
+                    if not self.cond.wait(timeout):
+                        raise TimeoutError(f"No shared generation progress for {timeout}s")
+                if position < len(self.items):
+                    item = self.items[position]
+                    position += 1
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            yield item
+
+
+class SharedGenerationStore:
+    """
+    Process-wide single-flight layer for quiz generation.
+
+    The first session to ask for a key starts the generation on a
+    background thread. Sessions asking for the same key while it runs,
+    or within `ttl_seconds` after it finishes, stream the same results
+    instead of triggering their own LLM calls. Failed generations are
+    not shared, so the next request starts a new one.
+    """
+
+    def __init__(self, ttl_seconds: int = None, max_entries: int = None, workers: int = None):
+        self.ttl_seconds = settings.SHARED_RESULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = settings.SHARED_RESULT_MAX_ENTRIES if max_entries is None else max_entries
+        self.wait_timeout = settings.SHARED_WAIT_TIMEOUT_SECONDS
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.SHARED_GENERATION_WORKERS,
+            thread_name_prefix="shared-generation"
+        )
+        self._flights = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = get_logger(self.__class__.__name__)
+
+    def subscribe(self, key, produce):
+        """
+        Iterate the results for key, starting `produce()` if nobody else is.
+
+        Args:
+            key: Hashable description of the request
+            produce: Callable returning an iterator of results
+
+        Returns:
+            Iterator over the shared results, in production order
+        """
+        with self._lock:
+            self._evict()
+            flight = self._flights.get(key)
+
+            if flight is None or flight.error is not None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._executor.submit(self._run, flight, produce)
+                outcome = "leader"
+            elif flight.done:
+                outcome = "completed"
+            else:
+                outcome = "follower"
+            self._flights.move_to_end(key)
+
+        metrics.inc("shared_generation_requests_total", outcome=outcome)
+        return flight.iterate(self.wait_timeout)
+
+    def _run(self, flight: _Flight, produce):
+        try:
+            for item in produce():
+                flight.push(item)
+        except Exception as e:
+            self.logger.error(f"Shared generation failed: {str(e)}")
+            flight.finish(e)
+        else:
+            flight.finish()
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.done and (flight.error is not None or flight.finished_at < cutoff)
+        ]
+        for key in expired:
+            del self._flights[key]
+
+        # Drop the least recently used finished results beyond the cap
+        for key in [key for key, flight in self._flights.items() if flight.done]:
+            if len(self._flights) <= self.max_entries:
+                break
+            del self._flights[key]
@@ -1,19 +1,131 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from src.config.settings import settings
 
-LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR,exist_ok=True)
+LOGS_DIR = settings.LOGS_DIR
+LOG_FILE = os.path.join(LOGS_DIR, "app.log")
 
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
+# Attributes every LogRecord has; anything else came in through `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+_queue_handler = None
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """Like QueueHandler, but keeps the traceback out of the message text."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps only a sample of DEBUG records; INFO and above always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+def setup_logging(to_stdout: bool = False):
+    """
+    Route all logging through a queue so callers never block on file I/O.
+
+    A background QueueListener writes JSON lines to a size-rotated file.
+    Rotation is only safe with a single writer, so processes that run
+    side by side (the generation workers) pass `to_stdout=True` and leave
+    collection to the container runtime. Pending records are flushed when
+    the process exits. Safe to call more than once; a forked child gets
+    its own listener, as the parent's thread doesn't survive the fork.
+    """
+    global _listener, _queue_handler, _listener_pid
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            return
+
+        root = logging.getLogger()
+        if _queue_handler is not None:
+            # Inherited from the parent process; nothing drains its queue here
+            root.removeHandler(_queue_handler)
+
+        if to_stdout:
+            handler = logging.StreamHandler(sys.stdout)
+        else:
+            os.makedirs(LOGS_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                LOG_FILE,
+                maxBytes=settings.LOG_MAX_BYTES,
+                backupCount=settings.LOG_BACKUP_COUNT,
+                encoding="utf-8",
+                delay=True
+            )
+        handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = _StructuredQueueHandler(log_queue)
+        _queue_handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+        root.addHandler(_queue_handler)
+        root.setLevel(settings.LOG_LEVEL)
+
+        _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush queued records to disk and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 
 def get_logger(name):
+    setup_logging()
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    logger.setLevel(settings.LOG_LEVEL)
+    return logger
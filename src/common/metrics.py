@@ -0,0 +1,345 @@
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80)
+
+# (labels, per-generation stats) for the _retry_and_parse call in progress
+_current_generation = ContextVar("current_generation", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    escaped = (
+        f'{k}="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms with Prometheus-style labels.
+
+    Read them with `snapshot()` in-process, or `to_prometheus()` for the
+    text exposition format.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist["counts"][i] += 1
+                    break
+            else:
+                hist["counts"][-1] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    def quantile(self, name: str, q: float, **labels):
+        """Approximate quantile from histogram buckets (linear interpolation), or None without data."""
+        with self._lock:
+            hist = self._histograms.get((name, _label_key(labels)))
+            if not hist or not hist["count"]:
+                return None
+            counts = list(hist["counts"])
+            total = hist["count"]
+
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": hist["count"],
+                    "sum": hist["sum"],
+                    "buckets": dict(zip([*map(str, self.buckets), "+Inf"], hist["counts"])),
+                }
+                for (name, labels), hist in self._histograms.items()
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, dict(v, counts=list(v["counts"]))) for k, v in self._histograms.items())
+
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), hist in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip([*map(str, self.buckets), "+Inf"], hist["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+metrics.describe("llm_requests_total", "LLM calls by provider, model, persona and status")
+metrics.describe("llm_request_duration_seconds", "Latency of a single LLM call")
+metrics.describe("llm_prompt_tokens_total", "Prompt tokens reported by the provider")
+metrics.describe("llm_prompt_cached_tokens_total", "Prompt tokens served from the provider's prefix cache")
+metrics.describe("llm_prompt_uncached_tokens_total", "Prompt tokens processed without a prefix cache hit")
+metrics.describe("llm_completion_tokens_total", "Completion tokens reported by the provider")
+metrics.describe("llm_time_to_first_chunk_seconds", "Time from sending a streamed request to its first chunk")
+metrics.describe("question_stream_aborts_total", "Streamed generations cancelled early because the output could not become a valid question")
+metrics.describe("question_stream_chars_total", "Characters read from streamed responses, by outcome")
+metrics.describe("llm_rate_limit_wait_seconds", "Time a call waited in the shared per-key rate-limit queue")
+metrics.describe("llm_rate_limit_pauses_total", "Shared rate-limit pauses after the provider reported a rate limit")
+metrics.describe("llm_client_acquire_seconds", "Time spent in get_llm")
+metrics.describe("question_generations_total", "Parsed-question generations by status")
+metrics.describe("question_generation_duration_seconds", "End-to-end time of one generation including retries")
+metrics.describe("question_generation_retries_total", "LLM calls beyond the first within one generation")
+metrics.describe("question_parse_failures_total", "Response parse failures by reason")
+metrics.describe("question_cache_lookups_total", "Question cache lookups by result")
+metrics.describe("question_pool_lookups_total", "Question pool lookups by result")
+metrics.describe("shared_generation_requests_total", "Quiz requests by single-flight outcome (leader, follower, completed)")
+
+
+def persona_label(persona_style: str) -> str:
+    """Bounded-cardinality label for a persona: the built-in persona name, or 'custom'."""
+    from src.config.settings import settings
+
+    for name, persona in settings.PERSONAS.items():
+        if persona["style"] and persona["style"] == persona_style:
+            return name
+    return "custom"
+
+
+class _GenerationStats:
+    __slots__ = ("llm_calls",)
+
+    def __init__(self):
+        self.llm_calls = 0
+
+
+class InstrumentedLLM:
+    """Proxy around a chat model that records latency, tokens and status per call."""
+
+    def __init__(self, llm, provider: str, model: str):
+        self._llm = llm
+        self._provider = provider
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def _labels(self) -> dict:
+        current = _current_generation.get()
+        persona = current[0]["persona"] if current else "none"
+        return {"provider": self._provider, "model": self._model, "persona": persona}
+
+    def invoke(self, *args, **kwargs):
+        labels = self._labels()
+        current = _current_generation.get()
+        if current:
+            current[1].llm_calls += 1
+
+        start = time.perf_counter()
+        try:
+            response = self._llm.invoke(*args, **kwargs)
+        except Exception as e:
+            metrics.inc("llm_requests_total", status="error", error=type(e).__name__, **labels)
+            raise
+        finally:
+            metrics.observe("llm_request_duration_seconds", time.perf_counter() - start, **labels)
+
+        metrics.inc("llm_requests_total", status="ok", error="", **labels)
+        record_token_usage(response, labels)
+        return response
+
+    def stream(self, *args, **kwargs):
+        """Like invoke, but per chunk; a stream closed early by the caller is counted as 'cancelled'."""
+        labels = self._labels()
+        current = _current_generation.get()
+        if current:
+            current[1].llm_calls += 1
+
+        start = time.perf_counter()
+        status, error = "cancelled", ""
+        first = True
+        try:
+            for chunk in self._llm.stream(*args, **kwargs):
+                if first:
+                    metrics.observe("llm_time_to_first_chunk_seconds", time.perf_counter() - start, **labels)
+                    first = False
+                # Providers that report usage on a stream do it on the last chunk
+                record_token_usage(chunk, labels)
+                yield chunk
+            status = "ok"
+        except Exception as e:
+            status, error = "error", type(e).__name__
+            raise
+        finally:
+            metrics.observe("llm_request_duration_seconds", time.perf_counter() - start, **labels)
+            metrics.inc("llm_requests_total", status=status, error=error, **labels)
+
+
+def _cached_prompt_tokens(response, usage: dict) -> int:
+    # LangChain's standard field, then the raw OpenAI-style usage block as reported by e.g. Groq
+    details = usage.get("input_token_details") or {}
+    if details.get("cache_read") is not None:
+        return details["cache_read"]
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+
+
+def record_token_usage(response, labels: dict):
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        cached = min(_cached_prompt_tokens(response, usage), usage["input_tokens"])
+        metrics.inc("llm_prompt_tokens_total", usage["input_tokens"], **labels)
+        metrics.inc("llm_prompt_cached_tokens_total", cached, **labels)
+        metrics.inc("llm_prompt_uncached_tokens_total", usage["input_tokens"] - cached, **labels)
+    if usage.get("output_tokens"):
+        metrics.inc("llm_completion_tokens_total", usage["output_tokens"], **labels)
+
+
+class _InstrumentedParser:
+    """Counts parse failures by reason without changing the parser's behaviour."""
+
+    def __init__(self, parser, labels: dict):
+        self._parser = parser
+        self._labels = labels
+
+    def __getattr__(self, name):
+        return getattr(self._parser, name)
+
+    def parse(self, content):
+        try:
+            return self._parser.parse(content)
+        except Exception as e:
+            reason = getattr(e, "reason", type(e).__name__)
+            metrics.inc("question_parse_failures_total", reason=reason, **self._labels)
+            raise
+
+
+def instrument_get_llm(func):
+    """Decorator for llm_factory.get_llm: times it and returns an InstrumentedLLM."""
+
+    @functools.wraps(func)
+    def wrapper(provider, api_key, model, *args, **kwargs):
+        start = time.perf_counter()
+        llm = func(provider, api_key, model, *args, **kwargs)
+        metrics.observe("llm_client_acquire_seconds", time.perf_counter() - start, provider=provider, model=model)
+        return InstrumentedLLM(llm, provider, model)
+
+    return wrapper
+
+
+def instrument_generation(func):
+    """Decorator for QuestionGenerator._retry_and_parse: records duration, retries, status and parse failures."""
+
+    @functools.wraps(func)
+    def wrapper(self, prompt, parser, *args, **kwargs):
+        labels = {"provider": self.provider, "model": self.model, "persona": persona_label(self.persona_style)}
+        stats = _GenerationStats()
+        token = _current_generation.set((labels, stats))
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = func(self, prompt, _InstrumentedParser(parser, labels), *args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _current_generation.reset(token)
+            metrics.observe("question_generation_duration_seconds", time.perf_counter() - start, **labels)
+            metrics.inc("question_generations_total", status=status, **labels)
+            if stats.llm_calls > 1:
+                metrics.inc("question_generation_retries_total", stats.llm_calls - 1, **labels)
+
+    return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int):
+    """Serve /metrics on the given port from a daemon thread, once per process."""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _metrics_server
@@ -14,6 +14,162 @@ class Settings():
 
     MAX_RETRIES = 3
 
+    # Transport-level retries per model (rate limits, timeouts, 5xx) with exponential backoff
+    LLM_MAX_ATTEMPTS = 3
+    LLM_BACKOFF_BASE_SECONDS = 0.5
+    LLM_BACKOFF_MAX_SECONDS = 20
+
+    # Send a duplicate request when the first is slower than this (seconds, e.g. the observed p95); None disables hedging
+    HEDGE_AFTER_SECONDS = None
+
+    # Fail over to the other models of the same provider before giving up
+    FAILOVER_TO_OTHER_MODELS = True
+
+    # Per-session memory bounds
+    MAX_QUESTIONS_PER_QUIZ = 100
+    MAX_ANSWER_CHARS = 500
+
+    # Fill-in-the-blank scoring tolerates typos up to this many edits on longer answers
+    ANSWER_FUZZY_MATCHING = True
+    ANSWER_MAX_EDIT_DISTANCE = 2
+
+    # Concurrent question generation
+    MAX_CONCURRENT_REQUESTS = 4
+
+    # Extra attempts for a single failed question slot (the rest of the quiz is kept)
+    QUESTION_RETRIES = 2
+
+    # Adaptive mode: one question at a time, each difficulty chosen from running accuracy
+    ADAPTIVE_DIFFICULTIES = ["Easy", "Medium", "Hard"]
+    ADAPTIVE_WINDOW = 3
+    ADAPTIVE_MIN_ANSWERS = 2
+    ADAPTIVE_PROMOTE_ACCURACY = 0.75
+    ADAPTIVE_DEMOTE_ACCURACY = 0.34
+    # Background generations shared by all adaptive sessions in the process
+    ADAPTIVE_PREFETCH_WORKERS = 16
+
+    # Stream single-question responses and cancel them as soon as they can't be valid
+    STREAMING_GENERATION = True
+    # Prose allowed before the JSON starts
+    STREAM_MAX_PREAMBLE_CHARS = 300
+
+    # Generate the whole quiz from a single LLM call instead of one call per question
+    BATCH_GENERATION = False
+
+    # Logging: JSON lines written off the request path, rotated by size
+    LOGS_DIR = "logs"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
+    # Share of DEBUG records that are kept
+    LOG_DEBUG_SAMPLE_RATE = 0.1
+    # Longest model output copied into a log record
+    LOG_MAX_RESPONSE_CHARS = 500
+
+    # Serve Prometheus metrics on this port at /metrics (None disables the endpoint)
+    METRICS_PORT = int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None
+
+    # Duplicate / near-duplicate question suppression
+    DEDUP_SIMILARITY_THRESHOLD = 0.75
+    DEDUP_ACROSS_QUIZZES = True
+    DEDUP_RECENT_LIMIT = 200
+    DEDUP_MAX_REGENERATIONS = 2
+    # How many used question stems are fed back into the prompt
+    DEDUP_AVOID_PROMPT_LIMIT = 10
+
+    # Cross-session single-flight generation; identical requests share one set of LLM calls
+    SHARED_GENERATION_ENABLED = True
+    SHARED_GENERATION_WORKERS = 8
+    SHARED_RESULT_TTL_SECONDS = 10 * 60
+    SHARED_RESULT_MAX_ENTRIES = 256
+    SHARED_WAIT_TIMEOUT_SECONDS = 300
+
+    # External generation job queue; web replicas submit jobs, `python worker.py` processes run them
+    JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "false").lower() == "true"
+    JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")  # 'sqlite' or 'redis'
+    JOB_QUEUE_SQLITE_PATH = os.path.join("jobs", "queue.db")
+    JOB_QUEUE_REDIS_URL = os.getenv("JOB_QUEUE_REDIS_URL", "redis://localhost:6379/0")
+    JOB_POLL_INTERVAL_SECONDS = 0.25
+    JOB_TIMEOUT_SECONDS = 300
+    # A running job that publishes nothing for this long is assumed to have lost its worker and is
+    # handed out again; well under JOB_TIMEOUT_SECONDS so the retry can still finish in time
+    JOB_VISIBILITY_TIMEOUT_SECONDS = 90
+    JOB_RESULT_TTL_SECONDS = 60 * 60
+    # Queued or running jobs (their payload holds the user's API key) expire after this
+    JOB_TTL_SECONDS = 15 * 60
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "2"))
+
+    # Saved quiz results: SQLite files partitioned by month, written in batches
+    RESULTS_DIR = "results"
+    RESULTS_FLUSH_BATCH_SIZE = 20
+    RESULTS_FLUSH_INTERVAL_SECONDS = 2
+
+    # Document-grounded generation: course material is chunked into a local BM25 index
+    DOCUMENTS_DIR = "documents"
+    INDEX_DIR = os.path.join("index", "documents")
+    INDEX_KEEP_VERSIONS = 2
+    # Replaced versions stay on disk this long, so queued jobs and open sessions that pinned them still work
+    INDEX_RETAIN_SUPERSEDED_SECONDS = JOB_TTL_SECONDS
+    INDEX_BUILD_LOCK_TIMEOUT_SECONDS = 10 * 60
+    # Uploading course material from the UI (which rebuilds the shared index) needs this token; unset disables it
+    DOCUMENT_ADMIN_TOKEN = os.getenv("DOCUMENT_ADMIN_TOKEN")
+    RETRIEVAL_CHUNK_WORDS = 200
+    RETRIEVAL_CHUNK_OVERLAP_WORDS = 40
+    # Chunks in each question's prompt, and ranked chunks per topic to spread across questions
+    RETRIEVAL_TOP_K = 3
+    RETRIEVAL_CANDIDATES = 60
+    RETRIEVAL_MAX_CONTEXT_CHARS = 4000
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+
+    # Provider budgets shared by every session using the same API key and model; calls queue fairly for them
+    SHARED_RATE_LIMIT_ENABLED = True
+    RATE_LIMITS = {
+        "Groq": {"requests_per_minute": 30, "tokens_per_minute": 6000},
+        "OpenAI": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    }
+    # 'memory' (this process) or 'sqlite' (every process on the host)
+    SHARED_RATE_LIMIT_BACKEND = os.getenv("SHARED_RATE_LIMIT_BACKEND", "memory")
+    SHARED_RATE_LIMIT_SQLITE_PATH = os.path.join("ratelimit", "budgets.db")
+    # Completion tokens reserved per call until the provider reports actual usage
+    RATE_LIMIT_COMPLETION_TOKENS = 300
+    # Back-off for everyone on the key after a 429 without Retry-After
+    RATE_LIMIT_PAUSE_SECONDS = 5
+    # How often the UI refreshes the session's place in the queue
+    RATE_LIMIT_STATUS_INTERVAL_SECONDS = 0.5
+    # Limiters of API keys unused for this long are dropped
+    RATE_LIMITER_IDLE_SECONDS = 15 * 60
+
+    # Bulk syllabus generation (main.py)
+    BULK_WORKERS = 4
+    BULK_REQUESTS_PER_MINUTE = 60
+
+    # Persistent question cache
+    CACHE_ENABLED = True
+    CACHE_DB_PATH = os.path.join("cache", "questions.db")
+    CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+    CACHE_MAX_ENTRIES = 5000
+    # Share of every quiz generated fresh even when the cache could serve it all
+    CACHE_MIN_FRESH_SHARE = 0.4
+    # A bucket must hold this many times the questions it hands out to one quiz
+    CACHE_BUCKET_FACTOR = 3
+
+    # Pre-generated question pool, refilled in the background with the server GROQ_API_KEY
+    POOL_ENABLED = True
+    POOL_TARGET_SIZE = 20
+    POOL_LOW_WATER_MARK = 5
+    POOL_REFILL_CONCURRENCY = 2
+    POOL_REFILL_RATE_PER_MINUTE = 30
+    POOL_REFILL_INTERVAL_SECONDS = 30
+    # Built-in persona keys requested at least this many times within the window get warmed as well
+    POOL_DEMAND_THRESHOLD = 3
+    POOL_DEMAND_WINDOW_SECONDS = 60 * 60
+    POOL_DEMAND_MAX_KEYS = 50
+    POOL_WARM_TARGETS = [
+        {"topic": "Cricket", "difficulty": "Medium", "question_type": "Multiple Choice", "persona": "Friendly Tutor"},
+        {"topic": "Indian History", "difficulty": "Medium", "question_type": "Multiple Choice", "persona": "Friendly Tutor"},
+    ]
+
     # Available models for each provider
     GROQ_MODELS = [
         "llama-3.1-8b-instant",
@@ -29,6 +185,17 @@ class Settings():
 
     MODEL_PROVIDERS = ["Groq", "OpenAI"]
 
+    # Offline fake provider (get_llm("Fake", ...)) used by the benchmarks
+    FAKE_LLM_LATENCY_SECONDS = 0.0
+    FAKE_LLM_LATENCY_JITTER_SECONDS = 0.0
+    FAKE_LLM_FAILURE_RATE = 0.0
+    FAKE_LLM_MALFORMED_RATE = 0.0
+    FAKE_LLM_SEED = 0
+
+    # Shared LLM client pool (one client per provider/model/temperature/API key)
+    LLM_POOL_MAX_SIZE = 64
+    LLM_POOL_IDLE_SECONDS = 15 * 60
+
     # Persona configurations
     PERSONAS = {
         "Friendly Tutor": {
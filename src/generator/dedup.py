@@ -0,0 +1,121 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+SHINGLE_SIZE = 4
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Fixed permutation coefficients so signatures are comparable across processes
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], "big") % _MERSENNE_PRIME | 1,
+        int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], "big") % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_PERMUTATIONS)
+]
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _NON_WORD.sub(" ", text.casefold())
+    return " ".join(text.split())
+
+
+def shingles(normalized: str) -> set:
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(normalized: str) -> tuple:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(normalized)]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def estimate_similarity(sig_a: tuple, sig_b: tuple) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERMUTATIONS
+
+
+class DedupIndex:
+    """
+    Index of seen question texts for exact and near-duplicate detection.
+
+    Exact repeats are caught by hashing the normalized text. Near
+    duplicates are caught by MinHash signatures over character
+    shingles, with LSH banding so each lookup only compares against a
+    few candidates. When `max_items` is set the oldest entries are
+    forgotten first.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_items: int = None):
+        self.threshold = threshold
+        self.max_items = max_items
+        self._items = OrderedDict()  # exact hash -> (text, signature)
+        self._bands = defaultdict(set)  # (band, band hash) -> exact hashes
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _band_keys(signature: tuple):
+        for band in range(LSH_BANDS):
+            yield band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def is_duplicate(self, text: str) -> bool:
+        normalized = normalize_text(text)
+        exact = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if exact in self._items:
+            return True
+
+        signature = minhash(normalized)
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates |= self._bands.get(band_key, set())
+
+        return any(
+            estimate_similarity(signature, self._items[candidate][1]) >= self.threshold
+            for candidate in candidates
+        )
+
+    def add(self, text: str):
+        normalized = normalize_text(text)
+        exact = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        if exact in self._items:
+            self._items.move_to_end(exact)
+            return
+
+        signature = minhash(normalized)
+        self._items[exact] = (text, signature)
+        for band_key in self._band_keys(signature):
+            self._bands[band_key].add(exact)
+
+        if self.max_items is not None:
+            while len(self._items) > self.max_items:
+                self._forget(next(iter(self._items)))
+
+    def _forget(self, exact: str):
+        _, signature = self._items.pop(exact)
+        for band_key in self._band_keys(signature):
+            members = self._bands[band_key]
+            members.discard(exact)
+            if not members:
+                del self._bands[band_key]
+
+    def recent_texts(self, limit: int) -> list:
+        """Most recently added question texts, newest first."""
+        texts = [text for text, _ in reversed(self._items.values())]
+        return texts[:limit]
@@ -1,14 +1,37 @@
-from langchain_core.output_parsers import PydanticOutputParser
-from src.models.question_schemas import MCQQuestion,FillBlankQuestion
-from src.prompts.templates import mcq_prompt_template,fill_blank_prompt_template
+import threading
+import uuid
+from src.models.question_schemas import MCQQuestion,FillBlankQuestion,MCQQuestionSet,FillBlankQuestionSet
+from src.generator.response_parser import get_response_parser,load_json
 from src.llm.llm_factory import get_llm
+from src.llm.rate_limiter import with_shared_rate_limit
+from src.llm.resilience import ResilientLLM
 from src.config.settings import settings
 from src.common.logger import get_logger
 from src.common.custom_exception import CustomException
+from src.common.metrics import instrument_generation, persona_label
+
+
+class _JsonArrayParser:
+    """Parses a batch response into a list of raw question dicts."""
+
+    def parse(self, text: str) -> list:
+        data = load_json(text)
+        if isinstance(data, dict) and isinstance(data.get("questions"), list):
+            data = data["questions"]
+        if not isinstance(data, list):
+            raise ValueError(f"Expected a JSON array of questions, got {type(data).__name__}")
+        return data
+
+
+class _StreamedResponse:
+    __slots__ = ("content",)
+
+    def __init__(self, content: str):
+        self.content = content
 
 
 class QuestionGenerator:
-    def __init__(self, provider: str = None, api_key: str = None, model: str = None, persona_style: str = None):
+    def __init__(self, provider: str = None, api_key: str = None, model: str = None, persona_style: str = None, fallbacks: list = None, document_index=None, client_id: str = None):
         """
         Initialize QuestionGenerator with dynamic LLM provider and persona.
         
@@ -17,72 +40,159 @@ class QuestionGenerator:
             api_key: API key for the selected provider
             model: Model name
             persona_style: Persona style description for question generation
+            fallbacks: Optional (provider, api_key, model) tuples to fail over to, in order
+            document_index: Optional src.retrieval DocumentIndex to ground questions in course material
+            client_id: Who this generator queues as for shared API key rate limits (default: a new id)
         """
+        # Sessions on the same API key and model take turns for its request and token budget
+        self.client_id = client_id or uuid.uuid4().hex
+
+        def connect(candidate_provider, candidate_key, candidate_model):
+            llm = get_llm(candidate_provider, candidate_key, candidate_model)
+            return (f"{candidate_provider}/{candidate_model}",
+                    with_shared_rate_limit(llm, candidate_provider, candidate_key, candidate_model, self.client_id))
+
         if provider and api_key and model:
-            self.llm = get_llm(provider, api_key, model)
+            candidates = [connect(provider, api_key, model)]
+
+            if settings.FAILOVER_TO_OTHER_MODELS:
+                models = {"Groq": settings.GROQ_MODELS, "OpenAI": settings.OPENAI_MODELS}.get(provider, [])
+                candidates += [connect(provider, api_key, m) for m in models if m != model]
+
+            for fallback_provider, fallback_key, fallback_model in fallbacks or []:
+                candidates.append(connect(fallback_provider, fallback_key, fallback_model))
         else:
             # Fallback to default Groq for backward compatibility
             from src.llm.groq_client import get_groq_llm
-            self.llm = get_groq_llm()
+            llm = with_shared_rate_limit(get_groq_llm(), "Groq", settings.GROQ_API_KEY, settings.MODEL_NAME, self.client_id)
+            candidates = [(f"Groq/{settings.MODEL_NAME}", llm)]
+
+        self.llm = ResilientLLM(candidates)
         
+        self.provider = provider or "Groq"
+        # Kept so generation can be handed off to a worker process (see src/jobs)
+        self.api_key = api_key
+        self.fallbacks = fallbacks or []
+        self.model = model or settings.MODEL_NAME
         self.persona_style = persona_style or "neutral and educational"
+        self.document_index = document_index
+        # One retriever per topic, so each question of a quiz gets different chunks
+        self._retrievers = {}
+        self._retrievers_lock = threading.Lock()
         self.logger = get_logger(self.__class__.__name__)
 
-    def _retry_and_parse(self, prompt, parser, topic, difficulty):
+    @property
+    def queue_position(self):
+        """Other sessions served before this one in the shared rate-limit queue, or None when not waiting."""
+        from src.llm.rate_limiter import queue_position
+        return queue_position(self.client_id)
+
+    @property
+    def cache_scope(self) -> str:
+        """Identifies the material questions are grounded in, so they are cached apart from ungrounded ones."""
+        if self.document_index is None:
+            return ""
+        return f"docs:{self.document_index.version}"
+
+    def _context_block(self, topic: str, k: int) -> str:
+        """Prompt section with the next top-ranked course material chunks for the topic, or "" when ungrounded."""
+        if self.document_index is None:
+            return ""
+        from src.prompts.templates import build_context_block
+        from src.retrieval.document_index import Retriever
+
+        with self._retrievers_lock:
+            retriever = self._retrievers.get(topic)
+            if retriever is None:
+                retriever = self._retrievers[topic] = Retriever(self.document_index, topic)
+        return build_context_block(retriever.next_chunks(k), settings.RETRIEVAL_MAX_CONTEXT_CHARS)
+
+    @instrument_generation
+    def _retry_and_parse(self, prompt, parser, topic, difficulty, **prompt_vars):
 
         for attempt in range(settings.MAX_RETRIES):
             try:
-                self.logger.info(f"Generating question for topic {topic} with difficulty {difficulty} and persona {self.persona_style}")
+                response = None
+                self.logger.info(f"Generating question for topic {topic} with difficulty {difficulty} and persona {persona_label(self.persona_style)}")
 
-                response = self.llm.invoke(prompt.format(
+                # Static instructions as a system message first, so providers can reuse the cached prefix
+                messages = prompt.format_messages(
+                    persona_style=self.persona_style,
                     topic=topic,
                     difficulty=difficulty,
-                    persona_style=self.persona_style
-                ))
+                    **prompt_vars
+                )
+
+                schema = getattr(parser, "schema", None)
+                if settings.STREAMING_GENERATION and schema in (MCQQuestion, FillBlankQuestion):
+                    response = self._stream_response(messages, schema)
+                else:
+                    response = self.llm.invoke(messages)
 
-                # Clean the response content - remove markdown code blocks if present
+                # Extraction skips prose and markdown fences around the JSON
                 content = response.content.strip()
                 
-                # Remove markdown code block markers if they exist
-                if content.startswith("```json"):
-                    content = content[7:]  # Remove ```json
-                elif content.startswith("```"):
-                    content = content[3:]  # Remove ```
-                
-                if content.endswith("```"):
-                    content = content[:-3]  # Remove closing ```
-                
-                content = content.strip()
-                
-                self.logger.info(f"Cleaned response content: {content[:100]}...")
+                self.logger.debug(f"Response content: {content[:100]}...")
 
                 parsed = parser.parse(content)
 
-                self.logger.info("Sucesfully parsed the question")
+                self.logger.debug("Sucesfully parsed the question")
 
                 return parsed
             
             except Exception as e:
                 self.logger.error(f"Error coming (attempt {attempt + 1}/{settings.MAX_RETRIES}): {str(e)}")
-                self.logger.error(f"Response content was: {response.content if 'response' in locals() else 'No response'}")
+                self.logger.error(f"Response content was: {response.content[:settings.LOG_MAX_RESPONSE_CHARS] if response is not None else 'No response'}")
                 if attempt==settings.MAX_RETRIES-1:
                     raise CustomException(f"Generation failed after {settings.MAX_RETRIES} attempts", e)
                 
     
-    def generate_mcq(self,topic:str,difficulty:str='medium') -> MCQQuestion:
+    def _stream_response(self, messages, schema):
+        """
+        Read a streamed response only as far as needed.
+
+        The incremental validator cancels the request as soon as the output
+        can't become a valid question, and reading stops at the end of the
+        JSON, so trailing text is never paid for.
+
+        Returns:
+            An object with the JSON text as .content, like an invoke response
+        """
+        from src.common.metrics import metrics
+        from src.generator.response_parser import ResponseParseError
+        from src.generator.stream_parser import IncrementalJsonValidator
+
+        labels = {"provider": self.provider, "model": self.model, "persona": persona_label(self.persona_style)}
+        validator = IncrementalJsonValidator(schema)
+        stream = self.llm.stream(messages)
         try:
-            parser = PydanticOutputParser(pydantic_object=MCQQuestion)
+            for chunk in stream:
+                if validator.feed(chunk.content or ""):
+                    break
+            else:
+                validator.finish()
+        except ResponseParseError as e:
+            metrics.inc("question_stream_aborts_total", reason=e.reason, **labels)
+            metrics.inc("question_stream_chars_total", validator.received, outcome="aborted", **labels)
+            self.logger.warning(f"Cancelled streamed response after {validator.received} characters: {str(e)}")
+            raise
+        finally:
+            # Closing the generator cancels the underlying HTTP request
+            stream.close()
 
-            question = self._retry_and_parse(mcq_prompt_template,parser,topic,difficulty)
+        metrics.inc("question_stream_chars_total", validator.received, outcome="complete", **labels)
+        return _StreamedResponse(validator.text or "")
 
-            # Detailed validation logging
-            self.logger.info(f"MCQ validation - Options count: {len(question.options)}, Options: {question.options}, Correct answer: {question.correct_answer}")
-            
-            if len(question.options) != 4:
-                raise ValueError(f"Invalid MCQ Structure: Expected 4 options, got {len(question.options)}")
-            
-            if question.correct_answer not in question.options:
-                raise ValueError(f"Invalid MCQ Structure: Correct answer '{question.correct_answer}' not found in options {question.options}")
+    def generate_mcq(self,topic:str,difficulty:str='medium',avoid:list=None) -> MCQQuestion:
+        try:
+            from src.prompts.templates import mcq_prompt_template,build_avoid_block
+
+            parser = get_response_parser(MCQQuestion)
+
+            question = self._retry_and_parse(mcq_prompt_template,parser,topic,difficulty,avoid_block=build_avoid_block(avoid),
+                                             context_block=self._context_block(topic, settings.RETRIEVAL_TOP_K))
+
+            self._validate_mcq(question)
             
             self.logger.info("Generated a valid MCQ Question")
             return question
@@ -92,14 +202,16 @@ class QuestionGenerator:
             raise CustomException("MCQ generation failed" , e)
         
     
-    def generate_fill_blank(self,topic:str,difficulty:str='medium') -> FillBlankQuestion:
+    def generate_fill_blank(self,topic:str,difficulty:str='medium',avoid:list=None) -> FillBlankQuestion:
         try:
-            parser = PydanticOutputParser(pydantic_object=FillBlankQuestion)
+            from src.prompts.templates import fill_blank_prompt_template,build_avoid_block
+
+            parser = get_response_parser(FillBlankQuestion)
 
-            question = self._retry_and_parse(fill_blank_prompt_template,parser,topic,difficulty)
+            question = self._retry_and_parse(fill_blank_prompt_template,parser,topic,difficulty,avoid_block=build_avoid_block(avoid),
+                                             context_block=self._context_block(topic, settings.RETRIEVAL_TOP_K))
 
-            if "___" not in question.question:
-                raise ValueError("Fill in blanks should contain '___'")
+            self._validate_fill_blank(question)
             
             self.logger.info("Generated a valid Fill in Blanks Question")
             return question
@@ -108,3 +220,71 @@ class QuestionGenerator:
             self.logger.error(f"Failed to generate fillups : {str(e)}")
             raise CustomException("Fill in blanks generation failed" , e)
 
+    def _validate_mcq(self, question: MCQQuestion):
+        # Detailed validation logging
+        self.logger.debug(f"MCQ validation - Options count: {len(question.options)}, Options: {question.options}, Correct answer: {question.correct_answer}")
+        
+        if len(question.options) != 4:
+            raise ValueError(f"Invalid MCQ Structure: Expected 4 options, got {len(question.options)}")
+        
+        if question.correct_answer not in question.options:
+            raise ValueError(f"Invalid MCQ Structure: Correct answer '{question.correct_answer}' not found in options {question.options}")
+
+    def _validate_fill_blank(self, question: FillBlankQuestion):
+        if "___" not in question.question:
+            raise ValueError("Fill in blanks should contain '___'")
+
+    def generate_batch(self, topic: str, difficulty: str = 'medium', n: int = 5, kind: str = 'mcq', avoid: list = None):
+        """
+        Generate n questions of one kind from a single LLM call.
+
+        Items that fail validation are regenerated one by one, so a single
+        bad item does not force the whole batch to be redone.
+
+        Args:
+            topic: Quiz topic
+            difficulty: Difficulty level
+            n: Number of questions to generate
+            kind: 'mcq' or 'fill_blank'
+            avoid: Optional question texts the model should not repeat
+
+        Returns:
+            MCQQuestionSet or FillBlankQuestionSet with exactly n questions
+        """
+        from src.prompts.templates import mcq_batch_prompt_template,fill_blank_batch_prompt_template,build_avoid_block
+
+        if kind == 'mcq':
+            prompt, schema, validate, generate_one, question_set = (
+                mcq_batch_prompt_template, MCQQuestion, self._validate_mcq, self.generate_mcq, MCQQuestionSet
+            )
+        elif kind == 'fill_blank':
+            prompt, schema, validate, generate_one, question_set = (
+                fill_blank_batch_prompt_template, FillBlankQuestion, self._validate_fill_blank, self.generate_fill_blank, FillBlankQuestionSet
+            )
+        else:
+            raise ValueError(f"Unsupported question kind: {kind}")
+
+        try:
+            items = self._retry_and_parse(prompt, _JsonArrayParser(), topic, difficulty, count=n, avoid_block=build_avoid_block(avoid),
+                                          context_block=self._context_block(topic, settings.RETRIEVAL_TOP_K * n))
+
+            questions = []
+            for index, item in enumerate(items[:n]):
+                try:
+                    question = get_response_parser(schema).validate(item)
+                    validate(question)
+                except Exception as e:
+                    self.logger.warning(f"Batch item {index + 1} invalid, regenerating it: {str(e)}")
+                    question = generate_one(topic, difficulty, avoid)
+                questions.append(question)
+
+            # The model may return fewer items than asked for
+            while len(questions) < n:
+                questions.append(generate_one(topic, difficulty, avoid))
+
+            self.logger.info(f"Generated a batch of {n} {kind} questions")
+            return question_set(questions=questions)
+
+        except Exception as e:
+            self.logger.error(f"Failed to generate batch : {str(e)}")
+            raise CustomException("Batch generation failed" , e)
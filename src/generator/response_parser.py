@@ -0,0 +1,179 @@
+import json
+import re
+from functools import lru_cache
+from pydantic import TypeAdapter, ValidationError
+from src.models.question_schemas import MCQQuestion
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class ResponseParseError(ValueError):
+    """
+    Raised when an LLM response cannot be turned into a valid question.
+
+    `reason` is one of 'no_json', 'invalid_json' or 'validation'.
+    """
+
+    def __init__(self, reason: str, message: str):
+        self.reason = reason
+        super().__init__(message)
+
+
+def extract_json(text: str) -> str:
+    """
+    Return the first balanced JSON object or array in the text.
+
+    Leading prose and markdown fences anywhere in the string are skipped.
+    Quoted strings (single or double) are respected, so braces inside
+    values don't end the match. If the JSON is cut off, everything from
+    its opening bracket onward is returned so the caller can still try
+    to repair it.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ResponseParseError("no_json", "No JSON object or array found in response")
+
+    start = min(starts)
+    depth = 0
+    quote = None
+    escaped = False
+
+    for i in range(start, len(text)):
+        char = text[i]
+
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+
+        if char in "\"'":
+            quote = char
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return text[start:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Apply cheap local fixes for common LLM JSON mistakes:
+    single-quoted strings and trailing commas.
+    """
+    out = []
+    quote = None
+    escaped = False
+
+    for char in text:
+        if quote == "'":
+            if escaped:
+                escaped = False
+                # \' is not a valid JSON escape, keep just the quote
+                out[-1] = "'" if char == "'" else "\\" + char
+                continue
+            if char == "\\":
+                escaped = True
+                out.append("\\")
+            elif char == "'":
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            else:
+                out.append(char)
+            continue
+
+        if quote == '"':
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                quote = None
+            out.append(char)
+            continue
+
+        if char == "'":
+            quote = "'"
+            out.append('"')
+        else:
+            if char == '"':
+                quote = '"'
+            out.append(char)
+
+    return _TRAILING_COMMA.sub(r"\1", "".join(out))
+
+
+def load_json(content: str):
+    """Extract the JSON payload from a response and decode it, repairing it if needed."""
+    candidate = extract_json(content)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        return json.loads(repair_json(candidate))
+    except json.JSONDecodeError as e:
+        raise ResponseParseError("invalid_json", f"Response is not valid JSON: {e}")
+
+
+def repair_mcq(data):
+    """Snap a correct_answer that differs from an option only in case or whitespace onto that option."""
+    if not isinstance(data, dict):
+        return data
+
+    options = data.get("options")
+    answer = data.get("correct_answer")
+    if not isinstance(options, list) or not isinstance(answer, str) or answer in options:
+        return data
+
+    wanted = " ".join(answer.split()).casefold()
+    for option in options:
+        if isinstance(option, str) and " ".join(option.split()).casefold() == wanted:
+            return {**data, "correct_answer": option}
+    return data
+
+
+_FIELD_REPAIRS = {
+    MCQQuestion: repair_mcq,
+}
+
+
+@lru_cache(maxsize=None)
+def get_validator(schema) -> TypeAdapter:
+    """Return a compiled pydantic validator for the schema, built once per schema."""
+    return TypeAdapter(schema)
+
+
+class ResponseParser:
+    """Drop-in replacement for PydanticOutputParser on the generation hot path."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.validator = get_validator(schema)
+        self.repair = _FIELD_REPAIRS.get(schema)
+
+    def parse(self, content: str):
+        return self.validate(load_json(content))
+
+    def validate(self, data):
+        if self.repair:
+            data = self.repair(data)
+
+        try:
+            return self.validator.validate_python(data)
+        except ValidationError as e:
+            raise ResponseParseError("validation", f"Response failed {self.schema.__name__} validation: {e}")
+
+
+@lru_cache(maxsize=None)
+def get_response_parser(schema) -> ResponseParser:
+    return ResponseParser(schema)
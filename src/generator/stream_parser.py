@@ -0,0 +1,163 @@
+from src.config.settings import settings
+from src.generator.response_parser import ResponseParseError
+from src.models.question_schemas import MCQQuestion, FillBlankQuestion
+
+REQUIRED_FIELDS = {
+    MCQQuestion: ("question", "options", "correct_answer"),
+    FillBlankQuestion: ("question", "answer"),
+}
+
+
+def _same_text(a: str, b: str) -> bool:
+    # Same tolerance as repair_mcq, which snaps such answers onto the option
+    return " ".join(a.split()).casefold() == " ".join(b.split()).casefold()
+
+
+class IncrementalJsonValidator:
+    """
+    Follows a streamed single-question response character by character.
+
+    `feed` raises ResponseParseError as soon as the output can no longer
+    become a valid question: too much prose before the JSON, a fifth
+    option, a correct_answer that is not one of the options, a
+    fill-in-the-blank question without a blank, or a required field
+    missing when the object closes. It returns True once the top-level
+    JSON value is complete, so the caller can stop reading.
+
+    Only the structure needed for these checks is tracked; the complete
+    text still goes through ResponseParser for the authoritative parse.
+    """
+
+    def __init__(self, schema, max_preamble: int = None):
+        self.schema = schema
+        self.max_preamble = settings.STREAM_MAX_PREAMBLE_CHARS if max_preamble is None else max_preamble
+        self.received = 0
+
+        self._parts = []
+        self._started = False
+        self._preamble = 0
+        self._stack = []
+        self._quote = None
+        self._escaped = False
+        self._string = []
+        self._expect_key = False
+        self._key = None
+        self._keys = set()
+        self._fields = {}
+        self._options = None
+        self._options_done = False
+        self._complete = False
+
+    @property
+    def text(self) -> str:
+        """Everything received up to the end of the JSON value."""
+        return "".join(self._parts)
+
+    @property
+    def complete(self) -> bool:
+        return self._complete
+
+    def feed(self, chunk: str) -> bool:
+        self.received += len(chunk)
+        begin = 0 if self._started else None
+        for i, char in enumerate(chunk):
+            if not self._started:
+                if char not in "{[":
+                    self._preamble += 1
+                    if self._preamble > self.max_preamble:
+                        raise ResponseParseError("no_json", f"No JSON after {self.max_preamble} characters of output")
+                    continue
+                self._started = True
+                begin = i
+
+            self._step(char)
+            if self._complete:
+                self._parts.append(chunk[begin:i + 1])
+                self._check_required()
+                return True
+
+        if begin is not None:
+            self._parts.append(chunk[begin:])
+        return False
+
+    def finish(self):
+        """Call when the stream ends; raises if the JSON never completed."""
+        if not self._started:
+            raise ResponseParseError("no_json", "No JSON object or array found in response")
+        # Cut-off JSON is left to ResponseParser, which may still repair it
+
+    def _step(self, char: str):
+        if self._quote:
+            if self._escaped:
+                self._escaped = False
+                self._string.append(char)
+            elif char == "\\":
+                self._escaped = True
+                self._string.append(char)
+            elif char == self._quote:
+                self._quote = None
+                self._on_string("".join(self._string))
+            else:
+                self._string.append(char)
+            return
+
+        if char in "\"'":
+            self._quote = char
+            self._string = []
+        elif char in "{[":
+            self._stack.append(char)
+            if len(self._stack) == 1 and char == "{":
+                self._expect_key = True
+            elif len(self._stack) == 2 and char == "[" and self._key == "options":
+                self._options = []
+        elif char in "}]":
+            if len(self._stack) == 2 and self._key == "options" and self._options is not None:
+                self._options_done = True
+                self._check_options()
+            self._stack.pop()
+            if not self._stack:
+                self._complete = True
+        elif len(self._stack) == 1 and self._stack[0] == "{":
+            if char == ":":
+                self._expect_key = False
+            elif char == ",":
+                self._expect_key = True
+
+    def _on_string(self, value: str):
+        depth = len(self._stack)
+        if depth == 1 and self._stack[0] == "{":
+            if self._expect_key:
+                self._key = value
+                self._keys.add(value)
+            else:
+                self._fields[self._key] = value
+                self._check_field(self._key)
+        elif depth == 2 and self._key == "options" and self._options is not None:
+            self._options.append(value)
+            if len(self._options) > 4:
+                raise ResponseParseError("validation", "Invalid MCQ Structure: more than 4 options")
+
+    def _check_field(self, key: str):
+        if self.schema is FillBlankQuestion and key == "question" and "___" not in self._fields[key]:
+            raise ResponseParseError("validation", "Fill in blanks should contain '___'")
+        if self.schema is MCQQuestion and key == "correct_answer":
+            self._check_answer()
+
+    def _check_options(self):
+        if self.schema is MCQQuestion and len(self._options) != 4:
+            raise ResponseParseError("validation", f"Invalid MCQ Structure: Expected 4 options, got {len(self._options)}")
+        self._check_answer()
+
+    def _check_answer(self):
+        answer = self._fields.get("correct_answer")
+        if answer is None or not self._options_done:
+            return
+        if not any(_same_text(answer, option) for option in self._options):
+            raise ResponseParseError("validation", f"Invalid MCQ Structure: Correct answer '{answer}' not found in options")
+
+    def _check_required(self):
+        if not self.text.startswith("{"):
+            return
+        missing = [f for f in REQUIRED_FIELDS.get(self.schema, ()) if f not in self._keys]
+        if missing:
+            raise ResponseParseError("validation", f"Response is missing {', '.join(missing)}")
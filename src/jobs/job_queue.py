@@ -0,0 +1,314 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from src.config.settings import settings
+from src.common.custom_exception import CustomException
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Queue of quiz generation jobs shared by web replicas and workers.
+
+    Web replicas `submit` jobs and poll `results`; workers `claim` jobs,
+    `publish` each question as it's ready and `complete` the job, checking
+    with `owns` between questions that it hasn't been cancelled or handed
+    to another worker. A finished job never changes status again. Payloads
+    hold the user's API key, so backends drop them once a job finishes.
+    """
+
+    def submit(self, payload: dict) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, timeout: float = 1.0):
+        """Return (job_id, payload) for the oldest queued job, or None if nothing arrives within timeout."""
+        raise NotImplementedError
+
+    def publish(self, job_id: str, item: dict):
+        """
+        Append an item to the job's results and mark the job as making progress.
+
+        Items carrying an "index" are published once per index, so a job
+        rerun after a requeue doesn't repeat the questions already sent.
+        """
+        raise NotImplementedError
+
+    def owns(self, job_id: str, worker_id: str) -> bool:
+        """Whether the job is still running on this worker, i.e. not finished, cancelled or requeued."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, error: str = None):
+        """Mark the job done, or failed with `error`; a no-op once the job has finished."""
+        raise NotImplementedError
+
+    def results(self, job_id: str, start: int = 0):
+        """Return (items published since `start`, status, error)."""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """Local single-host backend; every process opens the same database file."""
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.JOB_QUEUE_SQLITE_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " payload TEXT,"
+                " status TEXT NOT NULL,"
+                " error TEXT,"
+                " worker TEXT,"
+                " created_at REAL NOT NULL,"
+                " claimed_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_results ("
+                " job_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " item TEXT NOT NULL,"
+                " PRIMARY KEY (job_id, seq))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def submit(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, json.dumps(payload), QUEUED, time.time())
+            )
+        return job_id
+
+    def claim(self, worker_id: str, timeout: float = 1.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Unfinished jobs past their TTL fail, and their payload (with the API key) is dropped
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, payload = NULL WHERE status IN (?, ?) AND created_at < ?",
+                        (FAILED, "expired", QUEUED, RUNNING, time.time() - settings.JOB_TTL_SECONDS)
+                    )
+                    # Jobs whose worker died are handed out again after the visibility timeout
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND claimed_at < ?",
+                        (QUEUED, RUNNING, time.time() - settings.JOB_VISIBILITY_TIMEOUT_SECONDS)
+                    )
+                    row = conn.execute(
+                        "SELECT id, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                        (QUEUED,)
+                    ).fetchone()
+                    if row:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, worker = ?, claimed_at = ? WHERE id = ?",
+                            (RUNNING, worker_id, time.time(), row[0])
+                        )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            if row:
+                return row[0], json.loads(row[1])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+    def publish(self, job_id: str, item: dict):
+        sql = ("INSERT INTO job_results (job_id, seq, item)"
+               " SELECT ?, (SELECT COUNT(*) FROM job_results WHERE job_id = ?), ?")
+        params = [job_id, job_id, json.dumps(item)]
+        if "index" in item:
+            sql += " WHERE NOT EXISTS (SELECT 1 FROM job_results WHERE job_id = ? AND json_extract(item, '$.index') = ?)"
+            params += [job_id, item["index"]]
+        with self._connect() as conn:
+            conn.execute(sql, params)
+            # Progress keeps a slow but live worker's job from being handed out again
+            conn.execute("UPDATE jobs SET claimed_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+    def owns(self, job_id: str, worker_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, worker FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and row[0] == RUNNING and row[1] == worker_id
+
+    def complete(self, job_id: str, error: str = None):
+        with self._connect() as conn:
+            # A job the web side already cancelled or timed out stays failed
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, payload = NULL WHERE id = ? AND status IN (?, ?)",
+                (FAILED if error else DONE, error, job_id, QUEUED, RUNNING)
+            )
+
+    def results(self, job_id: str, start: int = 0):
+        with self._connect() as conn:
+            row = conn.execute("SELECT status, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            items = conn.execute(
+                "SELECT item FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                (job_id, start)
+            ).fetchall()
+        if row is None:
+            raise KeyError(f"Unknown job {job_id}")
+        return [json.loads(item) for (item,) in items], row[0], row[1]
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Backend for multi-host deployments.
+
+    Claimed job ids move atomically into a processing list; a job whose
+    worker died is pushed back onto the queue once it has been claimed
+    for longer than the visibility timeout, like the SQLite backend.
+
+    Only needs a small Redis-compatible command set (LPUSH, RPUSH, BLMOVE,
+    LRANGE, LREM, HSET, HSETNX, HGET, HDEL, EXPIRE), so any client that
+    implements those, such as src.jobs.local_redis.LocalRedis, can be
+    passed in.
+    """
+
+    def __init__(self, client=None, prefix: str = "quiz"):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise CustomException("JOB_QUEUE_BACKEND=redis needs the 'redis' package: pip install 'ai-quiz[redis]'", e)
+            client = redis.Redis.from_url(settings.JOB_QUEUE_REDIS_URL, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def _results_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}:results"
+
+    def _published_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}:published"
+
+    @property
+    def _queue_key(self) -> str:
+        return f"{self.prefix}:jobs"
+
+    @property
+    def _processing_key(self) -> str:
+        return f"{self.prefix}:jobs:processing"
+
+    def _requeue_stale(self):
+        cutoff = time.time() - settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+        for job_id in self.client.lrange(self._processing_key, 0, -1):
+            key = self._job_key(job_id)
+            if self.client.hget(key, "payload") is None:
+                # Finished or expired; nothing left to run
+                self.client.lrem(self._processing_key, 1, job_id)
+                continue
+            # A worker that died between BLMOVE and recording its claim still gets timed out
+            self.client.hsetnx(key, "claimed_at", time.time())
+            if float(self.client.hget(key, "claimed_at")) < cutoff and self.client.lrem(self._processing_key, 1, job_id):
+                # Only the worker whose LREM removed the entry requeues it, at the head of the queue
+                self.client.hset(key, mapping={"status": QUEUED, "worker": ""})
+                self.client.hdel(key, "claimed_at")
+                self.client.rpush(self._queue_key, job_id)
+
+    def submit(self, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        self.client.hset(self._job_key(job_id), mapping={
+            "payload": json.dumps(payload),
+            "status": QUEUED,
+            "created_at": time.time(),
+        })
+        # An unclaimed or abandoned job, API key included, doesn't outlive its TTL
+        self.client.expire(self._job_key(job_id), settings.JOB_TTL_SECONDS)
+        self.client.lpush(self._queue_key, job_id)
+        return job_id
+
+    def claim(self, worker_id: str, timeout: float = 1.0):
+        self._requeue_stale()
+        # The id stays in the processing list until complete, so a crash can't lose the job
+        job_id = self.client.blmove(self._queue_key, self._processing_key, max(1, int(timeout)), "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+
+        payload = self.client.hget(self._job_key(job_id), "payload")
+        if payload is None:
+            # Expired or cancelled while queued
+            self.client.lrem(self._processing_key, 1, job_id)
+            return None
+        self.client.hset(self._job_key(job_id), mapping={"status": RUNNING, "worker": worker_id, "claimed_at": time.time()})
+        return job_id, json.loads(payload)
+
+    def publish(self, job_id: str, item: dict):
+        key = self._results_key(job_id)
+        if "index" in item:
+            published = self._published_key(job_id)
+            added = self.client.hsetnx(published, item["index"], 1)
+            self.client.expire(published, settings.JOB_TTL_SECONDS)
+            if not added:
+                return
+        self.client.rpush(key, json.dumps(item))
+        self.client.expire(key, settings.JOB_TTL_SECONDS)
+        # Progress keeps a slow but live worker's job from being handed out again
+        if self.client.hget(self._job_key(job_id), "payload") is not None:
+            self.client.hset(self._job_key(job_id), "claimed_at", time.time())
+
+    def owns(self, job_id: str, worker_id: str) -> bool:
+        key = self._job_key(job_id)
+        return self.client.hget(key, "status") == RUNNING and self.client.hget(key, "worker") == worker_id
+
+    def complete(self, job_id: str, error: str = None):
+        key = self._job_key(job_id)
+        # Whoever sets the flag first finishes the job, so a worker can't overwrite a cancellation
+        if not self.client.hsetnx(key, "finished", 1):
+            return
+        self.client.hset(key, mapping={"status": FAILED if error else DONE, "error": error or ""})
+        self.client.hdel(key, "payload")
+        self.client.lrem(self._processing_key, 1, job_id)
+        for k in (key, self._results_key(job_id), self._published_key(job_id)):
+            self.client.expire(k, settings.JOB_RESULT_TTL_SECONDS)
+
+    def results(self, job_id: str, start: int = 0):
+        status = self.client.hget(self._job_key(job_id), "status")
+        if status is None:
+            raise KeyError(f"Unknown job {job_id}")
+        items = self.client.lrange(self._results_key(job_id), start, -1)
+        error = self.client.hget(self._job_key(job_id), "error") or None
+        return [json.loads(item) for item in items], status, error
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, creating it on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            if settings.JOB_QUEUE_BACKEND == "redis":
+                _job_queue = RedisJobQueue()
+            elif settings.JOB_QUEUE_BACKEND == "sqlite":
+                _job_queue = SQLiteJobQueue()
+            else:
+                raise ValueError(f"Unsupported job queue backend: {settings.JOB_QUEUE_BACKEND}")
+        return _job_queue
@@ -0,0 +1,130 @@
+import threading
+import time
+
+
+class LocalRedis:
+    """
+    In-memory stand-in for the Redis commands RedisJobQueue uses.
+
+    Lets the Redis backend run without a server, in tests and single-process
+    setups. Values are stored as strings, as with decode_responses=True.
+    Blocking commands wait on a condition rather than polling.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._cond = threading.Condition()
+
+    def _get(self, key, kind):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        value = self._data.get(key)
+        if value is None:
+            return None
+        if not isinstance(value, kind):
+            raise TypeError(f"WRONGTYPE Operation against a key holding the wrong kind of value: {key}")
+        return value
+
+    def _create(self, key, kind):
+        value = self._get(key, kind)
+        if value is None:
+            value = self._data[key] = kind()
+        return value
+
+    def _drop_if_empty(self, key):
+        if not self._data.get(key):
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        with self._cond:
+            fields = dict(mapping or {})
+            if key is not None:
+                fields[key] = value
+            current = self._create(name, dict)
+            added = sum(1 for k in fields if k not in current)
+            current.update({k: str(v) for k, v in fields.items()})
+            return added
+
+    def hsetnx(self, name, key, value):
+        with self._cond:
+            current = self._create(name, dict)
+            if key in current:
+                return 0
+            current[key] = str(value)
+            return 1
+
+    def hget(self, name, key):
+        with self._cond:
+            return (self._get(name, dict) or {}).get(key)
+
+    def hdel(self, name, *keys):
+        with self._cond:
+            current = self._get(name, dict) or {}
+            removed = sum(1 for key in keys if current.pop(key, None) is not None)
+            self._drop_if_empty(name)
+            return removed
+
+    def expire(self, name, seconds):
+        with self._cond:
+            if self._get(name, object) is None:
+                return False
+            self._expires[name] = time.monotonic() + seconds
+            return True
+
+    def lpush(self, name, *values):
+        with self._cond:
+            current = self._create(name, list)
+            for value in values:
+                current.insert(0, str(value))
+            self._cond.notify_all()
+            return len(current)
+
+    def rpush(self, name, *values):
+        with self._cond:
+            current = self._create(name, list)
+            current.extend(str(value) for value in values)
+            self._cond.notify_all()
+            return len(current)
+
+    def lrange(self, name, start, end):
+        with self._cond:
+            current = self._get(name, list) or []
+            end = len(current) if end == -1 else end + 1
+            return list(current[start:end])
+
+    def lrem(self, name, count, value):
+        with self._cond:
+            current = self._get(name, list) or []
+            removed = 0
+            # count > 0 removes from the head, count < 0 from the tail, 0 removes all
+            indexes = range(len(current)) if count >= 0 else range(len(current) - 1, -1, -1)
+            for i in [i for i in indexes if current[i] == value][:abs(count) or None]:
+                current[i] = None
+                removed += 1
+            current[:] = [item for item in current if item is not None]
+            self._drop_if_empty(name)
+            return removed
+
+    def blmove(self, first_list, second_list, timeout, src="LEFT", dest="RIGHT"):
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while True:
+                source = self._get(first_list, list)
+                if source:
+                    value = source.pop(0 if src == "LEFT" else -1)
+                    self._drop_if_empty(first_list)
+                    target = self._create(second_list, list)
+                    if dest == "LEFT":
+                        target.insert(0, value)
+                    else:
+                        target.append(value)
+                    return value
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
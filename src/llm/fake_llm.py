@@ -0,0 +1,131 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+_COUNT_PATTERN = re.compile(r"Generate (\d+) different")
+
+
+class FakeLLMError(Exception):
+    """Transient provider error raised by FakeChatModel (looks like a 503)."""
+
+    status_code = 503
+
+
+class FakeResponse:
+    def __init__(self, content: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "input_token_details": {"cache_read": cached_tokens},
+        }
+
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for ChatGroq/ChatOpenAI for offline runs.
+
+    It answers the repo's own prompts with well-formed questions. A seeded
+    RNG adds latency, transient failures and malformed output, so runs with
+    the same settings are reproducible.
+    """
+
+    def __init__(self, model: str = "fake", latency: float = 0.0, latency_jitter: float = 0.0,
+                 failure_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.model = model
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._counter = 0
+        self._lock = threading.Lock()
+        # System prompts seen so far, to report prefix cache hits like a provider would
+        self._cached_prefixes = set()
+
+    def _draw(self):
+        with self._lock:
+            self._counter += 1
+            return (
+                self._counter,
+                self.latency + self._rng.uniform(0, self.latency_jitter),
+                self._rng.random() < self.failure_rate,
+                self._rng.random() < self.malformed_rate,
+            )
+
+    @staticmethod
+    def _question(kind: str, n: int) -> dict:
+        # Hash-derived words keep fake questions distinct enough to pass dedup
+        digest = hashlib.sha256(str(n).encode()).hexdigest()
+        words = [digest[i:i + 8] for i in range(0, 40, 8)]
+        if kind == "fill_blank":
+            return {"question": f"{words[0]} {words[1]} {words[2]} is _____.", "answer": words[3]}
+        options = words[1:5]
+        return {"question": f"Which {words[0]} {words[1]}?", "options": options, "correct_answer": options[n % 4]}
+
+    def _render(self, prompt: str, n: int, malformed: bool) -> str:
+        kind = "fill_blank" if "fill-in-the-blank" in prompt else "mcq"
+
+        if malformed:
+            # Rambling prose, as models do when they ignore the format instructions
+            return "Sure! Here is a great question for you, but I forgot the JSON. " * 8
+
+        match = _COUNT_PATTERN.search(prompt)
+        if match:
+            count = int(match.group(1))
+            return json.dumps([self._question(kind, n * 1000 + i) for i in range(count)])
+        return json.dumps(self._question(kind, n))
+
+    def _prepare(self, prompt):
+        cached_tokens = 0
+        if isinstance(prompt, list):
+            prefix = prompt[0].content if prompt and prompt[0].type == "system" else ""
+            with self._lock:
+                if prefix in self._cached_prefixes:
+                    cached_tokens = len(prefix) // 4
+                self._cached_prefixes.add(prefix)
+            prompt = "\n".join(message.content for message in prompt)
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        return (prompt, cached_tokens, *self._draw())
+
+    def invoke(self, prompt, **kwargs):
+        prompt, cached_tokens, n, delay, fail, malformed = self._prepare(prompt)
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeLLMError("Fake transient failure")
+
+        content = self._render(prompt, n, malformed)
+        return FakeResponse(content, prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4, cached_tokens=cached_tokens)
+
+    def stream(self, prompt, **kwargs):
+        """
+        Yield the same output as invoke in small chunks, spreading the latency across them.
+
+        Closing the generator early skips the remaining latency, like
+        cancelling a real streamed request. Usage is reported on the last chunk.
+        """
+        prompt, cached_tokens, n, delay, fail, malformed = self._prepare(prompt)
+        content = self._render(prompt, n, malformed)
+        chunks = [content[i:i + 8] for i in range(0, len(content), 8)] or [""]
+        chunk_delay = delay / len(chunks)
+
+        if fail:
+            time.sleep(chunk_delay)
+            raise FakeLLMError("Fake transient failure")
+
+        for i, text in enumerate(chunks):
+            if chunk_delay:
+                time.sleep(chunk_delay)
+            last = i == len(chunks) - 1
+            yield FakeResponse(
+                text,
+                prompt_tokens=len(prompt) // 4 if last else 0,
+                completion_tokens=len(content) // 4 if last else 0,
+                cached_tokens=cached_tokens if last else 0,
+            )
@@ -1,10 +1,24 @@
-from src.llm.groq_client import get_groq_llm
-from src.llm.openai_client import get_openai_llm
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from src.config.settings import settings
+from src.common.metrics import instrument_get_llm
 
+# Pooled clients keyed by (provider, model, temperature, api key hash).
+# Values are [llm, last_used]; ordered from least to most recently used.
+_client_pool = OrderedDict()
+_client_pool_lock = threading.Lock()
+
+
+@instrument_get_llm
 def get_llm(provider: str, api_key: str, model: str, temperature: float = None):
     """
     Factory function to get the appropriate LLM based on provider.
+
+    Clients are pooled and shared across reruns and sessions, so repeated
+    calls with the same configuration reuse one client and its HTTP
+    connection pool instead of paying construction and TLS setup again.
     
     Args:
         provider: Model provider ('Groq' or 'OpenAI')
@@ -20,15 +34,73 @@ def get_llm(provider: str, api_key: str, model: str, temperature: float = None):
     """
     if temperature is None:
         temperature = settings.TEMPERATURE
-    
+
+    key = _pool_key(provider, api_key, model, temperature)
+
+    with _client_pool_lock:
+        _evict_idle(time.monotonic())
+        entry = _client_pool.get(key)
+        if entry is not None:
+            entry[1] = time.monotonic()
+            _client_pool.move_to_end(key)
+            return entry[0]
+
+    # Build outside the lock; if another session raced us, keep the first client
+    llm = _build_llm(provider, api_key, model, temperature)
+
+    with _client_pool_lock:
+        entry = _client_pool.setdefault(key, [llm, time.monotonic()])
+        _client_pool.move_to_end(key)
+        while len(_client_pool) > settings.LLM_POOL_MAX_SIZE:
+            _client_pool.popitem(last=False)
+        return entry[0]
+
+
+def clear_llm_pool():
+    """Drop every pooled client."""
+    with _client_pool_lock:
+        _client_pool.clear()
+
+
+def _pool_key(provider: str, api_key: str, model: str, temperature: float):
+    # Never keep raw API keys in the pool key
+    key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    return (provider, model, float(temperature), key_hash)
+
+
+def _evict_idle(now: float):
+    cutoff = now - settings.LLM_POOL_IDLE_SECONDS
+    while _client_pool:
+        key, (_, last_used) = next(iter(_client_pool.items()))
+        if last_used >= cutoff:
+            break
+        del _client_pool[key]
+
+
+def _build_llm(provider: str, api_key: str, model: str, temperature: float):
+    # Provider SDKs are imported here so only the one actually used gets loaded
     if provider == "Groq":
         from langchain_groq import ChatGroq
         return ChatGroq(
             api_key=api_key,
             model=model,
-            temperature=temperature
+            temperature=temperature,
+            # Retries are handled by src.llm.resilience so they don't multiply
+            max_retries=0
         )
     elif provider == "OpenAI":
-        return get_openai_llm(api_key, model, temperature)
+        from src.llm.openai_client import get_openai_llm
+        return get_openai_llm(api_key, model, temperature, max_retries=0)
+    elif provider == "Fake":
+        # Offline stand-in for benchmarks; not offered in the UI
+        from src.llm.fake_llm import FakeChatModel
+        return FakeChatModel(
+            model=model,
+            latency=settings.FAKE_LLM_LATENCY_SECONDS,
+            latency_jitter=settings.FAKE_LLM_LATENCY_JITTER_SECONDS,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE,
+            malformed_rate=settings.FAKE_LLM_MALFORMED_RATE,
+            seed=settings.FAKE_LLM_SEED
+        )
     else:
         raise ValueError(f"Unsupported provider: {provider}")
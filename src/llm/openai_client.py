@@ -1,6 +1,6 @@
 from langchain_openai import ChatOpenAI
 
-def get_openai_llm(api_key: str, model: str, temperature: float = 0.9):
+def get_openai_llm(api_key: str, model: str, temperature: float = 0.9, max_retries: int = 2):
     """
     Create and return an OpenAI LLM instance.
     
@@ -8,6 +8,7 @@ def get_openai_llm(api_key: str, model: str, temperature: float = 0.9):
         api_key: OpenAI API key
         model: Model name (e.g., 'gpt-3.5-turbo', 'gpt-4', 'gpt-4-turbo')
         temperature: Sampling temperature (default: 0.9)
+        max_retries: SDK-level retries (default: 2)
     
     Returns:
         ChatOpenAI instance
@@ -15,5 +16,6 @@ def get_openai_llm(api_key: str, model: str, temperature: float = 0.9):
     return ChatOpenAI(
         api_key=api_key,
         model=model,
-        temperature=temperature
+        temperature=temperature,
+        max_retries=max_retries
     )
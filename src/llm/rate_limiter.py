@@ -0,0 +1,382 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+
+class RateLimiter:
+    """
+    Token bucket limiting calls to `rate_per_minute`.
+
+    `acquire` blocks until a slot is free, so callers wait instead of
+    failing when they exceed the budget.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate_per_second = rate_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate_per_second
+
+            time.sleep(wait)
+
+
+class RateLimitedLLM:
+    """Chat model proxy that takes a slot from `limiter` before every call, retries included."""
+
+    def __init__(self, llm, limiter: RateLimiter):
+        self._llm = llm
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def invoke(self, *args, **kwargs):
+        self._limiter.acquire()
+        return self._llm.invoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        self._limiter.acquire()
+        yield from self._llm.stream(*args, **kwargs)
+
+
+def estimate_tokens(prompt) -> int:
+    """Rough token cost of a call before it is made: about four characters per token plus the expected completion."""
+    from src.config.settings import settings
+
+    messages = prompt if isinstance(prompt, list) else [prompt]
+    chars = sum(len(getattr(message, "content", message) or "") for message in messages)
+    return chars // 4 + settings.RATE_LIMIT_COMPLETION_TOKENS
+
+
+def _used_tokens(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+
+def _refill(state: tuple, limits: tuple, now: float) -> list:
+    requests, tokens, updated, paused_until = state
+    requests_per_minute, tokens_per_minute = limits
+    elapsed = max(0.0, now - updated)
+    if requests_per_minute:
+        requests = min(requests_per_minute, requests + elapsed * requests_per_minute / 60)
+    if tokens_per_minute:
+        tokens = min(tokens_per_minute, tokens + elapsed * tokens_per_minute / 60)
+    return [requests, tokens, now, paused_until]
+
+
+class _MemoryBuckets:
+    """Budget state held in this process; the limiter's lock serialises access."""
+
+    def __init__(self):
+        self._state = None
+
+    def update(self, limits: tuple, func):
+        now = time.time()
+        state = self._state or (limits[0] or 0.0, limits[1] or 0.0, now, 0.0)
+        self._state, result = func(_refill(state, limits, now), now)
+        return result
+
+
+class _SqliteBuckets:
+    """
+    Budget state in a SQLite file, so every process on the host draws from
+    the same buckets. Each update runs in its own IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS budgets ("
+                " key TEXT PRIMARY KEY,"
+                " requests REAL NOT NULL,"
+                " tokens REAL NOT NULL,"
+                " updated REAL NOT NULL,"
+                " paused_until REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def update(self, limits: tuple, func):
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT requests, tokens, updated, paused_until FROM budgets WHERE key = ?", (self.key,)
+                ).fetchone()
+                state = row or (limits[0] or 0.0, limits[1] or 0.0, now, 0.0)
+                state, result = func(_refill(state, limits, now), now)
+                conn.execute("INSERT OR REPLACE INTO budgets VALUES (?, ?, ?, ?, ?)", (self.key, *state))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return result
+
+
+class SharedRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget for one API key and
+    model, shared by every session that uses them.
+
+    Callers queue per client: each client waits in FIFO order behind its
+    own earlier calls, and clients take turns, so one large quiz can't
+    starve the others. The head of the queue blocks until both buckets can
+    pay for its call. Token costs are estimated up front and settled
+    against the provider's reported usage afterwards.
+
+    With SQLite buckets the budget is shared across processes too; the
+    fair queue is still per process.
+    """
+
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, buckets=None, provider: str = "", model: str = ""):
+        """
+        Args:
+            requests_per_minute: Request budget (None: unlimited)
+            tokens_per_minute: Prompt plus completion token budget (None: unlimited)
+            buckets: Where the budget state lives (default: in this process)
+            provider: Provider name for metric labels
+            model: Model name for metric labels
+        """
+        self.limits = (requests_per_minute, tokens_per_minute)
+        self.buckets = buckets or _MemoryBuckets()
+        self.provider = provider
+        self.model = model
+        self._cond = threading.Condition()
+        # client_id -> its waiting calls, oldest first; clients are served in this order
+        self._queues = OrderedDict()
+        # Maintained by the registry, for idle eviction
+        self.key = None
+        self.last_used = time.monotonic()
+
+    def acquire(self, client_id: str, tokens: int) -> int:
+        """Block until `client_id` may make a call costing `tokens`. Returns the tokens reserved."""
+        from src.common.metrics import metrics
+
+        ticket = object()
+        start = time.perf_counter()
+        with self._cond:
+            queue = self._queues.setdefault(client_id, deque())
+            queue.append(ticket)
+            try:
+                while True:
+                    if self._head() is ticket:
+                        wait = self.buckets.update(self.limits, lambda state, now: self._take(state, now, tokens))
+                        if wait <= 0:
+                            break
+                        # Settled refunds and other processes can shorten the wait, so check again regularly
+                        self._cond.wait(min(wait, 1.0))
+                    else:
+                        self._cond.wait()
+            finally:
+                queue.remove(ticket)
+                # Served clients go to the back, so everyone waiting gets a turn first
+                self._queues.pop(client_id)
+                if queue:
+                    self._queues[client_id] = queue
+                self._cond.notify_all()
+
+        metrics.observe("llm_rate_limit_wait_seconds", time.perf_counter() - start, provider=self.provider, model=self.model)
+        return tokens
+
+    def settle(self, reserved: int, used: int = None):
+        """Correct the token bucket once the provider has reported what a call actually used."""
+        if used is None or used == reserved:
+            return
+
+        def adjust(state, now):
+            if self.limits[1]:
+                state[1] = min(self.limits[1], state[1] + reserved - used)
+            return state, None
+
+        with self._cond:
+            self.buckets.update(self.limits, adjust)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Stop handing out calls for `seconds`, e.g. after the provider answered 429."""
+        from src.common.metrics import metrics
+
+        def extend(state, now):
+            state[3] = max(state[3], now + seconds)
+            return state, None
+
+        with self._cond:
+            self.buckets.update(self.limits, extend)
+        metrics.inc("llm_rate_limit_pauses_total", provider=self.provider, model=self.model)
+
+    def queue_position(self, client_id: str):
+        """How many other clients will be served before `client_id`, or None when it isn't waiting."""
+        with self._cond:
+            for position, waiting in enumerate(self._queues):
+                if waiting == client_id:
+                    return position
+        return None
+
+    @property
+    def waiting(self) -> bool:
+        with self._cond:
+            return bool(self._queues)
+
+    def _head(self):
+        if not self._queues:
+            return None
+        return next(iter(self._queues.values()))[0]
+
+    def _take(self, state: list, now: float, tokens: int):
+        requests_per_minute, tokens_per_minute = self.limits
+        waits = [state[3] - now]
+        if requests_per_minute:
+            waits.append((1 - state[0]) * 60 / requests_per_minute)
+        if tokens_per_minute:
+            # A call larger than the whole budget only waits for a full bucket
+            waits.append((min(tokens, tokens_per_minute) - state[1]) * 60 / tokens_per_minute)
+
+        wait = max(waits)
+        if wait <= 0:
+            state[0] -= 1 if requests_per_minute else 0
+            state[1] -= tokens if tokens_per_minute else 0
+        return state, wait
+
+
+class SharedRateLimitedLLM:
+    """Chat model proxy that waits in `limiter`'s fair queue before every call, retries included."""
+
+    def __init__(self, llm, limiter: SharedRateLimiter, client_id: str):
+        self._llm = llm
+        self._limiter = limiter
+        self._client_id = client_id
+
+    def __getattr__(self, name):
+        return getattr(self._llm, name)
+
+    def invoke(self, prompt, **kwargs):
+        self._limiter = _touch(self._limiter)
+        reserved = self._limiter.acquire(self._client_id, estimate_tokens(prompt))
+        try:
+            response = self._llm.invoke(prompt, **kwargs)
+        except Exception as e:
+            self._on_error(e)
+            raise
+        self._limiter.settle(reserved, _used_tokens(response))
+        return response
+
+    def stream(self, prompt, **kwargs):
+        self._limiter = _touch(self._limiter)
+        reserved = self._limiter.acquire(self._client_id, estimate_tokens(prompt))
+        used = None
+        try:
+            for chunk in self._llm.stream(prompt, **kwargs):
+                # Providers that report usage on a stream do it on the last chunk
+                used = _used_tokens(chunk) or used
+                yield chunk
+        except Exception as e:
+            self._on_error(e)
+            raise
+        # A stream closed early keeps its estimate; the provider's count is unknown
+        self._limiter.settle(reserved, used)
+
+    def _on_error(self, error: Exception):
+        from src.config.settings import settings
+        from src.llm.resilience import get_retry_after, get_status_code
+
+        if get_status_code(error) == 429 or "RateLimit" in type(error).__name__:
+            # Every session using this key backs off together instead of retrying into the limit
+            self._limiter.pause(get_retry_after(error) or settings.RATE_LIMIT_PAUSE_SECONDS)
+
+
+# Limiters keyed by provider, model and API key hash, ordered from least to most recently used
+_shared_limiters = OrderedDict()
+_shared_limiters_lock = threading.Lock()
+
+
+def _evict_idle(now: float):
+    from src.config.settings import settings
+
+    cutoff = now - settings.RATE_LIMITER_IDLE_SECONDS
+    for key, limiter in list(_shared_limiters.items()):
+        if limiter.last_used >= cutoff:
+            break
+        if not limiter.waiting:
+            del _shared_limiters[key]
+
+
+def _touch(limiter: SharedRateLimiter) -> SharedRateLimiter:
+    """Mark a limiter used; one evicted while idle is registered again, keeping its bucket state."""
+    now = time.monotonic()
+    with _shared_limiters_lock:
+        _evict_idle(now)
+        current = _shared_limiters.setdefault(limiter.key, limiter)
+        current.last_used = now
+        _shared_limiters.move_to_end(limiter.key)
+        return current
+
+
+def get_shared_rate_limiter(provider: str, api_key: str, model: str):
+    """The process-wide limiter for this API key and model, or None when the provider has no configured budget."""
+    from src.config.settings import settings
+
+    limits = settings.RATE_LIMITS.get(provider)
+    if not settings.SHARED_RATE_LIMIT_ENABLED or not limits:
+        return None
+
+    # Never keep raw API keys in the registry or the SQLite file
+    key = f"{provider}:{model}:{hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()}"
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(key)
+    if limiter is None:
+        buckets = None
+        if settings.SHARED_RATE_LIMIT_BACKEND == "sqlite":
+            buckets = _SqliteBuckets(settings.SHARED_RATE_LIMIT_SQLITE_PATH, key)
+        limiter = SharedRateLimiter(
+            limits.get("requests_per_minute"),
+            limits.get("tokens_per_minute"),
+            buckets,
+            provider,
+            model
+        )
+        limiter.key = key
+    # If another session raced us, everyone ends up on the first limiter registered
+    return _touch(limiter)
+
+
+def with_shared_rate_limit(llm, provider: str, api_key: str, model: str, client_id: str):
+    """Wrap `llm` in its API key's shared limiter, if the provider has a budget."""
+    limiter = get_shared_rate_limiter(provider, api_key, model)
+    if limiter is None:
+        return llm
+    return SharedRateLimitedLLM(llm, limiter, client_id)
+
+
+def queue_position(client_id: str):
+    """Smallest queue position of `client_id` over all shared limiters, or None when it isn't waiting."""
+    with _shared_limiters_lock:
+        limiters = list(_shared_limiters.values())
+    positions = [p for p in (limiter.queue_position(client_id) for limiter in limiters) if p is not None]
+    return min(positions) if positions else None
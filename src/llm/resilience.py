@@ -0,0 +1,230 @@
+import contextvars
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from src.config.settings import settings
+from src.common.logger import get_logger
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# SDK exception class names that signal a transient transport problem
+RETRYABLE_ERROR_NAMES = ("Timeout", "Connection", "RateLimit", "InternalServer", "ServiceUnavailable")
+
+# Hedged duplicates run here so they never block the caller's thread pool
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+def get_status_code(error: Exception):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def get_retry_after(error: Exception):
+    """Seconds the provider asked us to wait, from Retry-After / retry-after-ms headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter that honours Retry-After.
+
+    `sleep` and `rng` can be swapped out so tests run without waiting.
+    """
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None, sleep=time.sleep, rng=random.random):
+        self.max_attempts = settings.LLM_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_delay = settings.LLM_BACKOFF_BASE_SECONDS if base_delay is None else base_delay
+        self.max_delay = settings.LLM_BACKOFF_MAX_SECONDS if max_delay is None else max_delay
+        self.sleep = sleep
+        self.rng = rng
+
+    def is_retryable(self, error: Exception) -> bool:
+        status = get_status_code(error)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES
+        name = type(error).__name__
+        return isinstance(error, (TimeoutError, ConnectionError)) or any(part in name for part in RETRYABLE_ERROR_NAMES)
+
+    def delay(self, attempt: int, error: Exception = None) -> float:
+        retry_after = get_retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return self.rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+
+class ResilientLLM:
+    """
+    Wraps one or more chat models behind a single `invoke` and `stream`.
+
+    Transient errors are retried on the same model with backoff; once a
+    model is exhausted (or fails with a non-retryable error) the next
+    candidate is tried. With `hedge_after` set, a duplicate request is
+    sent when the first one is slower than that many seconds (for streams,
+    to their first chunk) and the first response to arrive wins.
+    """
+
+    def __init__(self, candidates: list, policy: RetryPolicy = None, hedge_after: float = None):
+        """
+        Args:
+            candidates: List of (label, llm) pairs, in failover order
+            policy: Retry policy (default: built from settings)
+            hedge_after: Seconds before sending a hedged duplicate (default: settings.HEDGE_AFTER_SECONDS, None disables)
+        """
+        if not candidates:
+            raise ValueError("ResilientLLM needs at least one candidate model")
+
+        self.candidates = candidates
+        self.policy = policy or RetryPolicy()
+        self.hedge_after = settings.HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+        self.logger = get_logger(self.__class__.__name__)
+
+    def __getattr__(self, name):
+        # Anything other than invoke goes to the primary model
+        return getattr(self.candidates[0][1], name)
+
+    def invoke(self, prompt, **kwargs):
+        last_error = None
+
+        for label, llm in self.candidates:
+            for attempt in range(self.policy.max_attempts):
+                try:
+                    return self._call(llm, prompt, **kwargs)
+                except Exception as e:
+                    last_error = e
+                    if not self.policy.is_retryable(e):
+                        self.logger.warning(f"{label} failed with a non-retryable error: {type(e).__name__}")
+                        break
+                    if attempt == self.policy.max_attempts - 1:
+                        self.logger.warning(f"{label} failed after {self.policy.max_attempts} attempts: {type(e).__name__}")
+                        break
+
+                    delay = self.policy.delay(attempt, e)
+                    self.logger.info(f"{label} call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    self.policy.sleep(delay)
+
+        raise last_error
+
+    def stream(self, prompt, **kwargs):
+        """
+        Stream chunks from the first candidate that starts answering.
+
+        Errors before the first chunk are retried and failed over like
+        invoke; once chunks have been yielded an error is raised to the
+        caller, which can retry the whole request. With `hedge_after` set,
+        a duplicate stream is opened when the first chunk is slower than
+        that, and whichever stream starts first is read; the other is closed.
+        """
+        last_error = None
+
+        for label, llm in self.candidates:
+            for attempt in range(self.policy.max_attempts):
+                try:
+                    first, chunks = self._start_stream(llm, prompt, **kwargs)
+                except Exception as e:
+                    last_error = e
+                    if not self.policy.is_retryable(e):
+                        self.logger.warning(f"{label} failed with a non-retryable error: {type(e).__name__}")
+                        break
+                    if attempt == self.policy.max_attempts - 1:
+                        self.logger.warning(f"{label} failed after {self.policy.max_attempts} attempts: {type(e).__name__}")
+                        break
+
+                    delay = self.policy.delay(attempt, e)
+                    self.logger.info(f"{label} stream failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                    self.policy.sleep(delay)
+                    continue
+
+                try:
+                    if first is not None:
+                        yield first
+                        yield from chunks
+                finally:
+                    _close_stream(chunks)
+                return
+
+        raise last_error
+
+    def _start_stream(self, llm, prompt, **kwargs):
+        """Open a stream, hedged on time to first chunk. Returns (first chunk or None, remaining chunks)."""
+        if not self.hedge_after:
+            return _open_stream(llm, prompt, **kwargs)
+
+        primary = _hedge_executor.submit(contextvars.copy_context().run, _open_stream, llm, prompt, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self.logger.info(f"No first chunk after {self.hedge_after}s, opening a hedged stream")
+        pending = {primary, _hedge_executor.submit(contextvars.copy_context().run, _open_stream, llm, prompt, **kwargs)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None:
+                for loser in (done | pending) - {winner}:
+                    loser.add_done_callback(_close_started_stream)
+                return winner.result()
+            error = next(iter(done)).exception()
+        raise error
+
+    def _call(self, llm, prompt, **kwargs):
+        if not self.hedge_after:
+            return llm.invoke(prompt, **kwargs)
+
+        # Run in copies of the caller's context so metrics labels follow the request
+        primary = _hedge_executor.submit(contextvars.copy_context().run, llm.invoke, prompt, **kwargs)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self.logger.info(f"No response after {self.hedge_after}s, sending a hedged request")
+        pending = {primary, _hedge_executor.submit(contextvars.copy_context().run, llm.invoke, prompt, **kwargs)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+
+def _open_stream(llm, prompt, **kwargs):
+    chunks = iter(llm.stream(prompt, **kwargs))
+    return next(chunks, None), chunks
+
+
+def _close_stream(chunks):
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+
+def _close_started_stream(future):
+    # The losing side of a hedged stream; closing it drops the provider connection
+    if not future.cancelled() and future.exception() is None:
+        _close_stream(future.result()[1])
@@ -1,5 +1,5 @@
 from typing import List
-from pydantic import BaseModel,Field,validator
+from pydantic import BaseModel,Field,field_validator
 
 class MCQQuestion(BaseModel):
 
@@ -9,7 +9,8 @@ class MCQQuestion(BaseModel):
 
     correct_answer: str = Field(description="The correct answer from the options")
 
-    @validator('question' , pre=True)
+    @field_validator('question' , mode='before')
+    @classmethod
     def clean_question(cls,v):
         if isinstance(v,dict):
             return v.get('description' , str(v))
@@ -22,8 +23,30 @@ class FillBlankQuestion(BaseModel):
 
     answer : str = Field(description="The correct word or phrase for the blank")
 
-    @validator('question' , pre=True)
+    accepted_answers: List[str] = Field(default_factory=list, description="Other spellings or forms of the answer that should also be marked correct")
+
+    @field_validator('question' , mode='before')
+    @classmethod
     def clean_question(cls,v):
         if isinstance(v,dict):
             return v.get('description' , str(v))
         return str(v)
+
+    @field_validator('accepted_answers' , mode='before')
+    @classmethod
+    def clean_accepted_answers(cls,v):
+        if v is None:
+            return []
+        if isinstance(v,str):
+            return [v]
+        return [str(item) for item in v]
+
+
+class MCQQuestionSet(BaseModel):
+
+    questions: List[MCQQuestion] = Field(description="List of multiple-choice questions")
+
+
+class FillBlankQuestionSet(BaseModel):
+
+    questions: List[FillBlankQuestion] = Field(description="List of fill-in-the-blank questions")
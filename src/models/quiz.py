@@ -0,0 +1,74 @@
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from src.utils.answer_matching import AnswerKey, build_answer_key
+
+MCQ = "MCQ"
+FILL_BLANK = "Fill in the blank"
+
+
+@dataclass(slots=True, frozen=True)
+class Question:
+    """One quiz question as kept in session state."""
+
+    kind: str
+    text: str
+    correct_answer: str
+    options: Tuple[str, ...] = ()
+    # Normalized fill-in-the-blank answers, computed once so scoring stays cheap
+    answer_key: Optional[AnswerKey] = None
+    # Set per question in adaptive quizzes, where it changes as the quiz goes
+    difficulty: str = ""
+
+    @classmethod
+    def from_schema(cls, question, question_type: str, difficulty: str = "") -> "Question":
+        """Build from a generated MCQQuestion or FillBlankQuestion."""
+        if question_type == "Multiple Choice":
+            return cls(MCQ, question.question, question.correct_answer, tuple(question.options), difficulty=difficulty)
+        return cls(FILL_BLANK, question.question, question.answer,
+                   answer_key=build_answer_key(question.answer, question.accepted_answers), difficulty=difficulty)
+
+    def is_correct(self, user_answer: str) -> bool:
+        if self.kind == MCQ:
+            return user_answer == self.correct_answer
+        key = self.answer_key or build_answer_key(self.correct_answer)
+        return key.matches(user_answer)
+
+
+@dataclass(slots=True)
+class Answer:
+    """The user's answer to the question at the same position."""
+
+    value: Optional[str] = None
+    is_correct: Optional[bool] = None
+
+
+@dataclass(slots=True)
+class Quiz:
+    """
+    Questions plus one answer slot per question.
+
+    Answers are set by position, so Streamlit reruns overwrite them
+    instead of piling up.
+    """
+
+    questions: List[Optional[Question]] = field(default_factory=list)
+    answers: List[Answer] = field(default_factory=list)
+    topic: str = ""
+    difficulty: str = ""
+    quiz_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @classmethod
+    def empty(cls, size: int, topic: str = "", difficulty: str = "") -> "Quiz":
+        return cls([None] * size, [Answer() for _ in range(size)], topic, difficulty)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def set_answer(self, index: int, value: Optional[str], max_chars: int = None):
+        if value is not None and max_chars is not None:
+            value = value[:max_chars]
+        answer = self.answers[index]
+        if answer.value != value:
+            answer.value = value
+            answer.is_correct = None
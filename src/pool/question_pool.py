@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from src.cache.question_cache import normalize_topic
+from src.llm.rate_limiter import RateLimiter
+from src.config.settings import settings
+from src.common.logger import get_logger
+from src.common.metrics import metrics
+
+
+def make_pool_key(topic: str, difficulty: str, kind: str, persona_style: str):
+    return (normalize_topic(topic), difficulty.lower(), kind, persona_style)
+
+
+class QuestionPool:
+    """
+    In-memory pools of ready-to-serve questions, one per
+    (topic, difficulty, type, persona) key.
+
+    Questions are handed out at most once. Keys with a built-in persona
+    that keep getting requested are tracked so the refill worker can warm
+    them too; demand expires after settings.POOL_DEMAND_WINDOW_SECONDS and
+    at most settings.POOL_DEMAND_MAX_KEYS keys are tracked.
+    """
+
+    def __init__(self):
+        self._pools = {}
+        # key -> [request count, last requested], least recently requested first
+        self._demand = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, key, n: int) -> list:
+        """Pop up to n questions for the key."""
+        with self._lock:
+            pool = self._pools.get(key, ())
+            taken = [pool.popleft() for _ in range(min(n, len(pool)))]
+            self._record_demand(key)
+            self.hits += len(taken)
+            self.misses += n - len(taken)
+
+        metrics.inc("question_pool_lookups_total", len(taken), result="hit")
+        metrics.inc("question_pool_lookups_total", n - len(taken), result="miss")
+        return taken
+
+    def _record_demand(self, key):
+        # Only built-in personas can earn warming on the server key; free-text
+        # custom personas would let any user pick what it pre-generates
+        if key[3] not in {p["style"] for p in settings.PERSONAS.values() if p["style"]}:
+            return
+        entry = self._demand.pop(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] = time.monotonic()
+        self._demand[key] = entry
+        while len(self._demand) > settings.POOL_DEMAND_MAX_KEYS:
+            self._demand.popitem(last=False)
+
+    def add(self, key, questions: list):
+        with self._lock:
+            self._pools.setdefault(key, deque()).extend(questions)
+
+    def size(self, key) -> int:
+        with self._lock:
+            return len(self._pools.get(key, ()))
+
+    def demanded_keys(self, threshold: int) -> list:
+        cutoff = time.monotonic() - settings.POOL_DEMAND_WINDOW_SECONDS
+        with self._lock:
+            return [key for key, (count, last) in self._demand.items() if count >= threshold and last >= cutoff]
+
+    def prune(self, keep=()):
+        """Forget demand older than the window, and drop pools of keys that are neither in `keep` nor still demanded."""
+        cutoff = time.monotonic() - settings.POOL_DEMAND_WINDOW_SECONDS
+        keep = set(keep)
+        with self._lock:
+            while self._demand and next(iter(self._demand.values()))[1] < cutoff:
+                self._demand.popitem(last=False)
+            for key in [k for k in self._pools if k not in keep and k not in self._demand]:
+                del self._pools[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "pools": {str(key): len(pool) for key, pool in self._pools.items()},
+            }
+
+
+class PoolRefillWorker(threading.Thread):
+    """
+    Background thread that keeps pools above the low-water mark.
+
+    It warms the targets in settings.POOL_WARM_TARGETS plus any built-in
+    persona key requested at least settings.POOL_DEMAND_THRESHOLD times
+    within settings.POOL_DEMAND_WINDOW_SECONDS. Generation
+    uses the server-side Groq key and default model, and LLM calls are
+    capped by settings.POOL_REFILL_RATE_PER_MINUTE.
+    """
+
+    def __init__(self, pool: QuestionPool, api_key: str, provider: str = "Groq", model: str = None):
+        super().__init__(name="question-pool-refill", daemon=True)
+        self.pool = pool
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model or settings.MODEL_NAME
+        self.limiter = RateLimiter(settings.POOL_REFILL_RATE_PER_MINUTE)
+        self.logger = get_logger(self.__class__.__name__)
+        self._stop_event = threading.Event()
+        self._generators = {}
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        self.logger.info("Question pool refill worker started")
+        while not self._stop_event.is_set():
+            try:
+                self.refill_once()
+            except Exception as e:
+                self.logger.error(f"Pool refill failed: {str(e)}")
+            self._stop_event.wait(settings.POOL_REFILL_INTERVAL_SECONDS)
+
+    def _targets(self) -> list:
+        targets = set()
+        for target in settings.POOL_WARM_TARGETS:
+            kind = 'mcq' if target["question_type"] == "Multiple Choice" else 'fill_blank'
+            persona_style = settings.PERSONAS[target["persona"]]["style"]
+            targets.add(make_pool_key(target["topic"], target["difficulty"], kind, persona_style))
+        # Idle demand-warmed pools are dropped rather than refilled forever
+        self.pool.prune(keep=targets)
+        targets.update(self.pool.demanded_keys(settings.POOL_DEMAND_THRESHOLD))
+        return sorted(targets)
+
+    def refill_once(self):
+        for key in self._targets():
+            if self._stop_event.is_set():
+                return
+
+            missing = settings.POOL_TARGET_SIZE - self.pool.size(key)
+            if self.pool.size(key) >= settings.POOL_LOW_WATER_MARK or missing <= 0:
+                continue
+
+            self.logger.info(f"Refilling pool {key[:3]} with {missing} questions")
+            with ThreadPoolExecutor(max_workers=settings.POOL_REFILL_CONCURRENCY) as executor:
+                for _ in executor.map(lambda _: self._generate_into(key), range(missing)):
+                    pass
+
+    def _generate_into(self, key):
+        topic, difficulty, kind, persona_style = key
+        generator = self._get_generator(persona_style)
+
+        self.limiter.acquire()
+        try:
+            if kind == 'mcq':
+                question = generator.generate_mcq(topic, difficulty)
+            else:
+                question = generator.generate_fill_blank(topic, difficulty)
+        except Exception as e:
+            self.logger.error(f"Pool question generation failed: {str(e)}")
+            return
+        self.pool.add(key, [question])
+
+    def _get_generator(self, persona_style: str):
+        from src.generator.question_generator import QuestionGenerator
+
+        if persona_style not in self._generators:
+            self._generators[persona_style] = QuestionGenerator(
+                provider=self.provider,
+                api_key=self.api_key,
+                model=self.model,
+                persona_style=persona_style
+            )
+        return self._generators[persona_style]
+
+
+_question_pool = QuestionPool()
+_refill_worker = None
+_refill_worker_lock = threading.Lock()
+
+
+def get_question_pool() -> QuestionPool:
+    return _question_pool
+
+
+def start_pool_worker():
+    """Start the refill worker once per process. Returns None when there's no server API key."""
+    global _refill_worker
+    with _refill_worker_lock:
+        if _refill_worker is None and settings.GROQ_API_KEY:
+            _refill_worker = PoolRefillWorker(_question_pool, settings.GROQ_API_KEY)
+            _refill_worker.start()
+        return _refill_worker
@@ -1,49 +1,152 @@
-from langchain_core.prompts import PromptTemplate
+from functools import lru_cache
+from langchain_core.messages import HumanMessage, SystemMessage
 
-mcq_prompt_template = PromptTemplate(
-    template=(
-        "You are a quiz creator with a persona that is {persona_style}.\n\n"
-        "Generate a {difficulty} multiple-choice question about {topic} in your persona's style.\n\n"
+
+def build_avoid_block(questions: list) -> str:
+    """Prompt section listing already-used questions the model should steer away from."""
+    if not questions:
+        return ""
+    listed = "".join(f"- {q}\n" for q in questions)
+    return f"Do NOT repeat or closely paraphrase any of these existing questions:\n{listed}\n"
+
+
+def build_context_block(chunks: list, max_chars: int) -> str:
+    """Prompt section with the course material excerpts a question must be based on."""
+    if not chunks:
+        return ""
+    # Keep the prompt within max_chars: fewer, longer excerpts rather than many fragments
+    chunks = chunks[:max(1, max_chars // 200)]
+    budget = max_chars // len(chunks)
+    excerpts = ""
+    for i, chunk in enumerate(chunks, 1):
+        source = f"{chunk['path']}, page {chunk['page']}" if chunk['page'] else chunk['path']
+        excerpts += f"[{i}] ({source})\n{chunk['text'][:budget]}\n\n"
+    return (
+        "Base the question ONLY on facts stated in these course material excerpts; "
+        "do not use outside knowledge:\n\n"
+        f"{excerpts}"
+    )
+
+
+@lru_cache(maxsize=256)
+def _system_message(instructions: str, persona_style: str) -> SystemMessage:
+    # Rendered once per persona; the instructions come first so every persona shares that prefix
+    return SystemMessage(content=f"{instructions}\nPersona: write every question in the style of {persona_style}.")
+
+
+class QuizPrompt:
+    """
+    Chat prompt split for provider-side prefix caching.
+
+    The long static instructions go first, in the system message, followed
+    by the persona. Everything that changes per request (topic, difficulty,
+    count, course material, questions to avoid) goes in a short user
+    message at the end, so consecutive calls share the longest possible
+    prefix.
+    """
+
+    def __init__(self, instructions: str, request: str):
+        self.instructions = instructions
+        self.request = request
+
+    def format_messages(self, persona_style: str, context_block: str = "", avoid_block: str = "", **variables) -> list:
+        return [
+            _system_message(self.instructions, persona_style),
+            HumanMessage(content=self.request.format(**variables) + context_block + avoid_block + "Return ONLY the JSON, nothing else."),
+        ]
+
+
+_MCQ_RULES = (
+    "1. Return ONLY valid JSON - no title, no introduction, no explanation, no extra text\n"
+    "2. Do not wrap the JSON in markdown code blocks (no ```json or ```)\n"
+    "3. Every question has exactly four options, all strings in the options array\n"
+    "4. The 'correct_answer' field MUST contain the EXACT text of one of that question's four options "
+    "(same capitalization, punctuation, spacing)\n\n"
+)
+
+_FILL_BLANK_RULES = (
+    "1. Return ONLY valid JSON - no title, no introduction, no explanation, no extra text\n"
+    "2. Do not wrap the JSON in markdown code blocks (no ```json or ```)\n"
+    "3. Mark the blank in the question with _____\n"
+    "4. List other correct spellings, abbreviations or forms of the answer in 'accepted_answers', if any\n\n"
+)
+
+mcq_prompt_template = QuizPrompt(
+    instructions=(
+        "You are a quiz creator. You write one multiple-choice question at a time.\n\n"
         "CRITICAL INSTRUCTIONS:\n"
-        "1. Return ONLY a valid JSON object - no title, no introduction, no explanation, no extra text\n"
-        "2. Do not wrap the JSON in markdown code blocks (no ```json or ```)\n"
-        "3. The 'correct_answer' field MUST contain the EXACT text of one of the four options\n"
-        "4. All four options must be strings in the options array\n\n"
+        f"{_MCQ_RULES}"
         "Required JSON structure:\n"
-        '{{\n'
+        '{\n'
         '    "question": "Your engaging question here",\n'
         '    "options": ["First option", "Second option", "Third option", "Fourth option"],\n'
         '    "correct_answer": "Second option"\n'
-        '}}\n\n'
-        "IMPORTANT: The correct_answer value must be EXACTLY the same as one option (same capitalization, punctuation, spacing).\n\n"
+        '}\n\n'
         "Example - Notice how 'Paris' appears EXACTLY the same in both options and correct_answer:\n"
-        '{{\n'
+        '{\n'
         '    "question": "What is the capital of France?",\n'
         '    "options": ["London", "Berlin", "Paris", "Madrid"],\n'
         '    "correct_answer": "Paris"\n'
-        '}}\n\n'
-        "Now generate your JSON (ONLY the JSON, nothing else):"
+        '}\n'
     ),
-    input_variables=["topic", "difficulty", "persona_style"]
+    request="Generate a {difficulty} multiple-choice question about {topic}.\n\n",
 )
 
-fill_blank_prompt_template = PromptTemplate(
-    template=(
-        "You are a quiz creator with a persona that is {persona_style}.\n\n"
-        "Generate a {difficulty} fill-in-the-blank question about {topic} in your persona's style.\n\n"
-        "CRITICAL: You MUST return ONLY a valid JSON object. Do not include any title, introduction, or explanation.\n"
-        "Do not wrap the JSON in markdown code blocks. Return ONLY the raw JSON.\n\n"
-        "Required JSON format:\n"
-        '{{\n'
-        '    "question": "A sentence with _____ marking where the blank should be (reflect your persona in wording)",\n'
-        '    "answer": "The correct word or phrase for the blank"\n'
-        '}}\n\n'
+fill_blank_prompt_template = QuizPrompt(
+    instructions=(
+        "You are a quiz creator. You write one fill-in-the-blank question at a time.\n\n"
+        "CRITICAL INSTRUCTIONS:\n"
+        f"{_FILL_BLANK_RULES}"
+        "Required JSON structure:\n"
+        '{\n'
+        '    "question": "A sentence with _____ marking where the blank should be",\n'
+        '    "answer": "The correct word or phrase for the blank",\n'
+        '    "accepted_answers": ["Other correct forms of the answer, if any"]\n'
+        '}\n\n'
         "Example:\n"
-        '{{\n'
-        '    "question": "The capital of France is _____.",\n'
-        '    "answer": "Paris"\n'
-        '}}\n\n'
-        "Return ONLY the JSON object, nothing else:"
+        '{\n'
+        '    "question": "The Declaration of Independence was adopted in _____.",\n'
+        '    "answer": "1776",\n'
+        '    "accepted_answers": ["July 1776"]\n'
+        '}\n'
+    ),
+    request="Generate a {difficulty} fill-in-the-blank question about {topic}.\n\n",
+)
+
+mcq_batch_prompt_template = QuizPrompt(
+    instructions=(
+        "You are a quiz creator. You write sets of multiple-choice questions as a JSON array, "
+        "each question testing a different fact.\n\n"
+        "CRITICAL INSTRUCTIONS:\n"
+        f"{_MCQ_RULES}"
+        "Required JSON structure:\n"
+        '[\n'
+        '    {\n'
+        '        "question": "Your engaging question here",\n'
+        '        "options": ["First option", "Second option", "Third option", "Fourth option"],\n'
+        '        "correct_answer": "Second option"\n'
+        '    }\n'
+        ']\n'
     ),
-    input_variables=["topic", "difficulty", "persona_style"]
-)
\ No newline at end of file
+    request="Generate {count} different {difficulty} multiple-choice questions about {topic}. "
+            "The array must contain exactly {count} question objects.\n\n",
+)
+
+fill_blank_batch_prompt_template = QuizPrompt(
+    instructions=(
+        "You are a quiz creator. You write sets of fill-in-the-blank questions as a JSON array, "
+        "each question testing a different fact.\n\n"
+        "CRITICAL INSTRUCTIONS:\n"
+        f"{_FILL_BLANK_RULES}"
+        "Required JSON structure:\n"
+        '[\n'
+        '    {\n'
+        '        "question": "A sentence with _____ marking where the blank should be",\n'
+        '        "answer": "The correct word or phrase for the blank",\n'
+        '        "accepted_answers": ["Other correct forms of the answer, if any"]\n'
+        '    }\n'
+        ']\n'
+    ),
+    request="Generate {count} different {difficulty} fill-in-the-blank questions about {topic}. "
+            "The array must contain exactly {count} question objects.\n\n",
+)
@@ -0,0 +1,166 @@
+from src.models.quiz import MCQ, Quiz
+from src.utils.answer_matching import build_answer_key, normalize_answer
+
+
+def score_quiz(quiz: Quiz):
+    """
+    Score a quiz in a single pass over its questions.
+
+    Also fills in each Answer's is_correct.
+
+    Returns:
+        (records, summary): one result dict per question, plus the
+        correct count, total and score percentage
+    """
+    records = []
+    correct = 0
+
+    for i, (question, answer) in enumerate(zip(quiz.questions, quiz.answers)):
+        user_answer = answer.value or ""
+        answer.is_correct = question.is_correct(user_answer)
+        correct += answer.is_correct
+
+        records.append({
+            "quiz_id": quiz.quiz_id,
+            "topic": quiz.topic,
+            "difficulty": quiz.difficulty,
+            "question_difficulty": question.difficulty or quiz.difficulty,
+            "question_number": i + 1,
+            "question": question.text,
+            "question_type": question.kind,
+            "user_answer": user_answer,
+            "correct_answer": question.correct_answer,
+            "options": list(question.options),
+            "is_correct": answer.is_correct,
+        })
+
+    total = len(records)
+    summary = {
+        "correct_count": correct,
+        "total_questions": total,
+        "score_percentage": (correct / total) * 100 if total else 0.0,
+    }
+    return records, summary
+
+
+def score_frame(df):
+    """
+    Re-score a frame of attempts.
+
+    Answers are normalized once per distinct value and compared in bulk;
+    only fill-in answers that still differ go through the numeric and
+    typo-tolerant matching, once per distinct (answer, correct answer) pair.
+    Saved frames carry no accepted alternatives, so only the main answer counts.
+
+    Returns:
+        Boolean Series aligned with df
+    """
+    user = df["user_answer"].fillna("").astype(str)
+    correct = df["correct_answer"].fillna("").astype(str)
+    is_mcq = (df["question_type"] == MCQ).to_numpy()
+
+    normalized = user.map(_cached(normalize_answer)) == correct.map(_cached(normalize_answer))
+    result = (user == correct).where(is_mcq, normalized & (user.str.strip() != ""))
+
+    pending = ~is_mcq & ~result.to_numpy()
+    if pending.any():
+        pairs = list(zip(user[pending], correct[pending]))
+        keys = {}
+        verdicts = {}
+        for pair in dict.fromkeys(pairs):
+            answer, expected = pair
+            if expected not in keys:
+                keys[expected] = build_answer_key(expected)
+            verdicts[pair] = keys[expected].matches(answer)
+        result.loc[pending] = [verdicts[pair] for pair in pairs]
+    return result.astype(bool)
+
+
+def _cached(func):
+    cache = {}
+
+    def wrapper(value):
+        if value not in cache:
+            cache[value] = func(value)
+        return cache[value]
+    return wrapper
+
+
+def accuracy_by(df, by=("topic", "difficulty")):
+    """
+    Accuracy per group across many quiz attempts.
+
+    Returns:
+        DataFrame with attempts, correct, accuracy and quizzes per group
+    """
+    grouped = df.groupby(list(by), observed=True)
+    stats = grouped.agg(
+        attempts=("is_correct", "size"),
+        correct=("is_correct", "sum"),
+        quizzes=("quiz_id", "nunique"),
+    )
+    stats["accuracy"] = stats["correct"] / stats["attempts"]
+    return stats.reset_index().sort_values("accuracy")
+
+
+def question_difficulty(df, min_attempts: int = 5):
+    """
+    Per-question difficulty estimates from many attempts.
+
+    - p_value: smoothed share of correct answers, (correct + 1) / (attempts + 2)
+    - difficulty: 1 - p_value
+    - discrimination: correlation between getting this question right and
+      the score on the rest of that quiz (point-biserial). Positive means
+      stronger students tend to get it right.
+
+    Questions are grouped by the level they were generated at, so an
+    adaptive quiz's questions are compared with others of the same level.
+    Everything is computed with grouped sums, with no per-row Python.
+    """
+    import numpy as np
+
+    level = "question_difficulty" if "question_difficulty" in df else "difficulty"
+    frame = df[["quiz_id", "topic", level, "question", "is_correct"]].rename(columns={level: "difficulty"})
+    frame["is_correct"] = frame["is_correct"].astype(float)
+
+    quiz_totals = frame.groupby("quiz_id")["is_correct"].transform("sum")
+    quiz_sizes = frame.groupby("quiz_id")["is_correct"].transform("size")
+    # Score on the other questions of the same quiz, so an item doesn't correlate with itself
+    frame["rest_score"] = ((quiz_totals - frame["is_correct"]) / (quiz_sizes - 1).where(quiz_sizes > 1)).fillna(0.0)
+    frame["xy"] = frame["is_correct"] * frame["rest_score"]
+    frame["yy"] = frame["rest_score"] ** 2
+
+    keys = ["topic", "difficulty", "question"]
+    sums = frame.groupby(keys, observed=True).agg(
+        attempts=("is_correct", "size"),
+        correct=("is_correct", "sum"),
+        sum_y=("rest_score", "sum"),
+        sum_xy=("xy", "sum"),
+        sum_yy=("yy", "sum"),
+    )
+    sums = sums[sums["attempts"] >= min_attempts]
+
+    n = sums["attempts"]
+    mean_x = sums["correct"] / n
+    mean_y = sums["sum_y"] / n
+    cov = sums["sum_xy"] / n - mean_x * mean_y
+    var_x = mean_x * (1 - mean_x)
+    var_y = sums["sum_yy"] / n - mean_y ** 2
+    denominator = np.sqrt(var_x * var_y)
+
+    result = sums[["attempts", "correct"]].astype(int)
+    result["p_value"] = (sums["correct"] + 1) / (n + 2)
+    result["difficulty_estimate"] = 1 - result["p_value"]
+    result["discrimination"] = (cov / denominator).where(denominator > 0)
+    return result.reset_index().sort_values("difficulty_estimate", ascending=False)
+
+
+def load_saved_results(**filters):
+    """
+    Load saved attempts for analytics from the results store.
+
+    Accepts the filters of ResultsStore.query (user_id, topic, difficulty,
+    since, until).
+    """
+    from src.results.store import get_results_store
+    return get_results_store().query(**filters)
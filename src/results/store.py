@@ -0,0 +1,281 @@
+import atexit
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from src.cache.question_cache import normalize_topic
+from src.config.settings import settings
+from src.common.logger import get_logger
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS quizzes ("
+    " quiz_id TEXT PRIMARY KEY,"
+    " user_id TEXT,"
+    " topic TEXT NOT NULL,"
+    " topic_key TEXT NOT NULL,"
+    " difficulty TEXT NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " correct_count INTEGER NOT NULL,"
+    " total_questions INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS answers ("
+    " quiz_id TEXT NOT NULL,"
+    " question_number INTEGER NOT NULL,"
+    " question TEXT NOT NULL,"
+    " question_type TEXT NOT NULL,"
+    " user_answer TEXT NOT NULL,"
+    " correct_answer TEXT NOT NULL,"
+    # Options are a JSON array of strings, never a Python repr
+    " options TEXT NOT NULL CHECK (json_valid(options) AND json_type(options) = 'array'),"
+    " is_correct INTEGER NOT NULL CHECK (is_correct IN (0, 1)),"
+    # Level the question was generated at; differs from the quiz's for adaptive quizzes
+    " question_difficulty TEXT,"
+    " PRIMARY KEY (quiz_id, question_number)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_quizzes_user ON quizzes (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_quizzes_topic ON quizzes (topic_key, difficulty, created_at)",
+)
+
+# Columns added after a partition may have been created: (table, column, definition)
+MIGRATIONS = (
+    ("answers", "question_difficulty", "TEXT"),
+)
+
+RESULT_COLUMNS = [
+    "quiz_id", "user_id", "topic", "difficulty", "created_at", "question_number", "question",
+    "question_type", "question_difficulty", "user_answer", "correct_answer", "options", "is_correct",
+]
+
+
+def partition_name(timestamp: float) -> str:
+    """Monthly partition file holding quizzes saved at `timestamp`."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("results-%Y-%m.db")
+
+
+class ResultsStore:
+    """
+    Append-only store of scored quizzes in SQLite files partitioned by month.
+
+    Appends are buffered and written in one transaction per partition once
+    `batch_size` quizzes are pending or `flush_interval` seconds have passed;
+    a durable append flushes right away, and a failed flush keeps its
+    quizzes pending for the next one. Saving the same quiz again replaces its rows, so repeated saves never
+    create duplicates. Queries flush pending appends first and only open the
+    partitions that overlap the requested date range.
+    """
+
+    def __init__(self, directory: str = None, batch_size: int = None, flush_interval: float = None):
+        self.directory = directory or settings.RESULTS_DIR
+        self.batch_size = settings.RESULTS_FLUSH_BATCH_SIZE if batch_size is None else batch_size
+        self.flush_interval = settings.RESULTS_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self.logger = get_logger(self.__class__.__name__)
+
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._initialized = set()
+
+        os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.flush)
+
+    @contextmanager
+    def _connect(self, name: str):
+        conn = sqlite3.connect(os.path.join(self.directory, name), timeout=30)
+        try:
+            if name not in self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                for table, column, definition in MIGRATIONS:
+                    if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                self._initialized.add(name)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, records: list, user_id: str = None, created_at: float = None, durable: bool = False) -> str:
+        """
+        Queue one scored quiz for writing.
+
+        Args:
+            records: Result dicts from src.results.engine.score_quiz
+            user_id: Optional student identifier for history queries
+            created_at: Save time as a Unix timestamp, defaults to now
+            durable: Return only once the quiz is on disk, flushing it together with anything else pending
+
+        Returns:
+            The quiz id, or None if there was nothing to save
+        """
+        if not records:
+            return None
+
+        first = records[0]
+        quiz = (
+            first["quiz_id"], user_id or None, first["topic"], normalize_topic(first["topic"]),
+            first["difficulty"].lower(), created_at or time.time(),
+            sum(1 for r in records if r["is_correct"]), len(records),
+        )
+        answers = [
+            (r["quiz_id"], r["question_number"], r["question"], r["question_type"], r["user_answer"],
+             r["correct_answer"], json.dumps(list(r["options"])), int(bool(r["is_correct"])),
+             (r.get("question_difficulty") or first["difficulty"]).lower())
+            for r in records
+        ]
+
+        with self._lock:
+            self._pending.append((quiz, answers))
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full or durable:
+            # A concurrent flush that took this quiz holds the lock until it is written, or requeues it on failure
+            self.flush()
+        return first["quiz_id"]
+
+    def flush(self) -> int:
+        """Write all pending quizzes. Returns how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not pending:
+                return 0
+
+            partitions = {}
+            for quiz, answers in pending:
+                partitions.setdefault(partition_name(quiz[5]), []).append((quiz, answers))
+
+            try:
+                self._write(partitions)
+            except Exception:
+                # Keep them for the next flush; rewriting a quiz replaces its rows, so partial writes are harmless
+                self._pending[:0] = pending
+                raise
+
+        self.logger.info(f"Saved {len(pending)} quiz results to {len(partitions)} partition(s)")
+        return len(pending)
+
+    def _write(self, partitions: dict):
+        for name, batch in partitions.items():
+            with self._connect(name) as conn:
+                conn.executemany("DELETE FROM answers WHERE quiz_id = ?", [(quiz[0],) for quiz, _ in batch])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO quizzes (quiz_id, user_id, topic, topic_key, difficulty, created_at,"
+                    " correct_count, total_questions) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [quiz for quiz, _ in batch]
+                )
+                conn.executemany(
+                    "INSERT INTO answers (quiz_id, question_number, question, question_type, user_answer,"
+                    " correct_answer, options, is_correct, question_difficulty) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row for _, answers in batch for row in answers]
+                )
+
+    def _partitions(self, since: float = None, until: float = None) -> list:
+        names = sorted(os.path.basename(p) for p in glob.glob(os.path.join(self.directory, "results-*.db")))
+        if since is not None:
+            names = [n for n in names if n >= partition_name(since)]
+        if until is not None:
+            names = [n for n in names if n <= partition_name(until)]
+        return names
+
+    def _where(self, user_id, topic, difficulty, since, until):
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("q.user_id = ?")
+            params.append(user_id)
+        if topic is not None:
+            clauses.append("q.topic_key = ?")
+            params.append(normalize_topic(topic))
+        if difficulty is not None:
+            clauses.append("q.difficulty = ?")
+            params.append(difficulty.lower())
+        if since is not None:
+            clauses.append("q.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("q.created_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _read(self, sql: str, params: list, since: float, until: float):
+        import pandas as pd
+
+        self.flush()
+        frames = []
+        for name in self._partitions(since, until):
+            with self._connect(name) as conn:
+                frames.append(pd.read_sql_query(sql, conn, params=params))
+        frames = [f for f in frames if not f.empty]
+        return pd.concat(frames, ignore_index=True) if frames else None
+
+    def query(self, user_id: str = None, topic: str = None, difficulty: str = None, since: float = None, until: float = None):
+        """
+        Load saved answers, one row per question, filtered on indexed columns.
+
+        Args:
+            user_id: Only this student's quizzes
+            topic: Only this topic (matched case- and whitespace-insensitively)
+            difficulty: Only this difficulty
+            since: Unix timestamp, inclusive
+            until: Unix timestamp, exclusive
+
+        Returns:
+            DataFrame with RESULT_COLUMNS; options are lists and is_correct is bool
+        """
+        import pandas as pd
+
+        where, params = self._where(user_id, topic, difficulty, since, until)
+        df = self._read(
+            "SELECT q.quiz_id, q.user_id, q.topic, q.difficulty, q.created_at, a.question_number, a.question,"
+            " a.question_type, COALESCE(a.question_difficulty, q.difficulty) AS question_difficulty,"
+            " a.user_answer, a.correct_answer, a.options, a.is_correct"
+            " FROM quizzes q JOIN answers a ON a.quiz_id = q.quiz_id" + where +
+            " ORDER BY q.created_at, a.question_number",
+            params, since, until
+        )
+        if df is None:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        df["options"] = df["options"].map(json.loads)
+        df["is_correct"] = df["is_correct"].astype(bool)
+        for column in ("topic", "difficulty", "question_type", "question_difficulty"):
+            df[column] = df[column].astype("category")
+        return df
+
+    def history(self, user_id: str = None, topic: str = None, difficulty: str = None, since: float = None, until: float = None):
+        """One row per saved quiz with its score, without reading the answers."""
+        import pandas as pd
+
+        where, params = self._where(user_id, topic, difficulty, since, until)
+        df = self._read(
+            "SELECT q.quiz_id, q.user_id, q.topic, q.difficulty, q.created_at, q.correct_count, q.total_questions"
+            " FROM quizzes q" + where + " ORDER BY q.created_at",
+            params, since, until
+        )
+        if df is None:
+            return pd.DataFrame(columns=["quiz_id", "user_id", "topic", "difficulty", "created_at", "correct_count", "total_questions", "score_percentage"])
+
+        df["score_percentage"] = df["correct_count"] / df["total_questions"] * 100
+        return df
+
+
+_results_store = None
+_results_store_lock = threading.Lock()
+
+
+def get_results_store() -> ResultsStore:
+    """Return the process-wide results store, creating it on first use."""
+    global _results_store
+    with _results_store_lock:
+        if _results_store is None:
+            _results_store = ResultsStore()
+        return _results_store
@@ -0,0 +1,342 @@
+import hashlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from src.config.settings import settings
+from src.common.logger import get_logger
+from src.retrieval.documents import chunk_text, iter_documents, load_document, tokenize
+
+logger = get_logger("DocumentIndex")
+
+CURRENT_FILE = "CURRENT"
+SEGMENTS_DIR = "segments"
+LOCK_FILE = "build.lock"
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _update_segments(source_dir: str, index_dir: str) -> tuple:
+    """
+    Re-chunk only the documents that changed since the last build.
+
+    Each document's chunks and term counts are kept in its own segment
+    file, keyed by path. Unchanged files (same size and mtime, or same
+    content hash) are not parsed again, and segments of deleted files are
+    removed.
+
+    Returns:
+        (segments, changed) with segments sorted by path
+    """
+    segments_dir = os.path.join(index_dir, SEGMENTS_DIR)
+    os.makedirs(segments_dir, exist_ok=True)
+
+    segments, changed, seen = [], 0, set()
+    for relpath in iter_documents(source_dir):
+        path = os.path.join(source_dir, relpath)
+        name = hashlib.sha1(relpath.encode("utf-8")).hexdigest() + ".json"
+        seen.add(name)
+        segment_path = os.path.join(segments_dir, name)
+        stat = os.stat(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+
+        segment = None
+        if os.path.exists(segment_path):
+            with open(segment_path, encoding="utf-8") as f:
+                segment = json.load(f)
+            if segment["stamp"] != stamp:
+                digest = _file_digest(path)
+                if segment["sha256"] == digest:
+                    # Touched but not modified
+                    segment["stamp"] = stamp
+                    _write_json(segment_path, segment)
+                else:
+                    segment = None
+
+        if segment is None:
+            try:
+                pages = load_document(path)
+            except Exception as e:
+                logger.error(f"Skipping {relpath}: {str(e)}")
+                continue
+            chunks = [
+                {"page": page, "text": text, "terms": Counter(tokenize(text))}
+                for page, page_text in pages
+                for text in chunk_text(page_text)
+            ]
+            segment = {"path": relpath, "stamp": stamp, "sha256": _file_digest(path), "chunks": chunks}
+            _write_json(segment_path, segment)
+            changed += 1
+
+        segments.append(segment)
+
+    for name in os.listdir(segments_dir):
+        if name.endswith(".json") and name not in seen:
+            os.remove(os.path.join(segments_dir, name))
+            changed += 1
+
+    return segments, changed
+
+
+@contextmanager
+def _build_lock(index_dir: str):
+    # An exclusive SQLite transaction serialises builds across threads and processes
+    os.makedirs(index_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(index_dir, LOCK_FILE), timeout=settings.INDEX_BUILD_LOCK_TIMEOUT_SECONDS, isolation_level=None)
+    try:
+        conn.execute("BEGIN EXCLUSIVE")
+        yield
+    finally:
+        conn.close()
+
+
+def build_index(source_dir: str = None, index_dir: str = None, force: bool = False) -> dict:
+    """
+    Build or incrementally update the on-disk BM25 index for a directory of documents.
+
+    The postings are written as flat numpy arrays (CSR layout) into a new
+    version directory, which becomes live with an atomic rename of the
+    CURRENT pointer. Readers that already mapped the previous version keep
+    working, so several pods can serve one index read-only while it is
+    rebuilt elsewhere. Concurrent builds of one index directory wait for
+    each other.
+
+    Args:
+        source_dir: Directory of PDF/Markdown/text files
+        index_dir: Where the index is stored
+        force: Rebuild the postings even if no document changed
+
+    Returns:
+        The manifest of the live version
+    """
+    source_dir = source_dir or settings.DOCUMENTS_DIR
+    index_dir = index_dir or settings.INDEX_DIR
+    with _build_lock(index_dir):
+        return _build(source_dir, index_dir, force)
+
+
+def _build(source_dir: str, index_dir: str, force: bool) -> dict:
+    import numpy as np
+
+    started = time.perf_counter()
+    segments, changed = _update_segments(source_dir, index_dir)
+    current = _read_current(index_dir)
+    if current and not changed and not force:
+        with open(os.path.join(index_dir, current, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    vocab = {}
+    term_ids, doc_ids, tfs, doc_len, sources, texts = [], [], [], [], [], []
+    for segment in segments:
+        for chunk in segment["chunks"]:
+            doc = len(texts)
+            for term, count in chunk["terms"].items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc)
+                tfs.append(count)
+            doc_len.append(sum(chunk["terms"].values()))
+            sources.append([segment["path"], chunk["page"]])
+            texts.append(chunk["text"].encode("utf-8"))
+
+    term_ids = np.asarray(term_ids, dtype=np.int64)
+    order = np.argsort(term_ids, kind="stable")
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=indptr[1:])
+
+    n_docs = len(texts)
+    df = np.diff(indptr).astype(np.float64)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+    offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+
+    version = f"v{int(time.time() * 1000)}"
+    version_dir = os.path.join(index_dir, version)
+    os.makedirs(version_dir)
+    np.save(os.path.join(version_dir, "indptr.npy"), indptr)
+    np.save(os.path.join(version_dir, "doc_ids.npy"), np.asarray(doc_ids, dtype=np.int32)[order])
+    np.save(os.path.join(version_dir, "tfs.npy"), np.asarray(tfs, dtype=np.float32)[order])
+    np.save(os.path.join(version_dir, "doc_len.npy"), np.asarray(doc_len, dtype=np.float32))
+    np.save(os.path.join(version_dir, "idf.npy"), idf)
+    np.save(os.path.join(version_dir, "text_offsets.npy"), offsets)
+    with open(os.path.join(version_dir, "texts.bin"), "wb") as f:
+        f.write(b"".join(texts))
+    with open(os.path.join(version_dir, "vocab.json"), "w", encoding="utf-8") as f:
+        json.dump(sorted(vocab, key=vocab.get), f)
+    with open(os.path.join(version_dir, "sources.json"), "w", encoding="utf-8") as f:
+        json.dump(sources, f)
+
+    manifest = {
+        "version": version,
+        "documents": len(segments),
+        "chunks": n_docs,
+        "terms": len(vocab),
+        "avgdl": float(np.mean(doc_len)) if doc_len else 0.0,
+        "created_at": time.time(),
+    }
+    _write_json(os.path.join(version_dir, "manifest.json"), manifest)
+
+    pointer = os.path.join(index_dir, CURRENT_FILE)
+    with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(f"{pointer}.tmp", pointer)
+
+    _prune_versions(index_dir, keep=settings.INDEX_KEEP_VERSIONS, retain_seconds=settings.INDEX_RETAIN_SUPERSEDED_SECONDS)
+    logger.info(f"Indexed {n_docs} chunks from {len(segments)} documents ({changed} changed) in {time.perf_counter() - started:.2f}s")
+    return manifest
+
+
+def _read_current(index_dir: str):
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_versions(index_dir: str, keep: int, retain_seconds: float):
+    """
+    Delete old versions, keeping the newest `keep` and any version replaced
+    less than `retain_seconds` ago: queued jobs and open sessions pin the
+    version they were created with, and open it by name later.
+    """
+    versions = sorted(
+        (n for n in os.listdir(index_dir) if n.startswith("v") and n[1:].isdigit() and os.path.isdir(os.path.join(index_dir, n))),
+        key=lambda n: int(n[1:])
+    )
+    cutoff_ms = (time.time() - retain_seconds) * 1000
+    for name, successor in zip(versions[:-keep], versions[1:]):
+        # Version names are creation times in ms, so a version went out of use when its successor was built
+        if int(successor[1:]) < cutoff_ms:
+            shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+
+class DocumentIndex:
+    """
+    Read-only BM25 index over document chunks, memory-mapped from disk.
+
+    Only the vocabulary is loaded into memory; postings and chunk texts
+    are mapped, so processes sharing the files share the page cache.
+    """
+
+    def __init__(self, index_dir: str, version: str):
+        import numpy as np
+
+        path = os.path.join(index_dir, version)
+        self.index_dir = index_dir
+        self.version = version
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = {term: i for i, term in enumerate(json.load(f))}
+        with open(os.path.join(path, "sources.json"), encoding="utf-8") as f:
+            self.sources = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        self.indptr = load("indptr.npy")
+        self.doc_ids = load("doc_ids.npy")
+        self.tfs = load("tfs.npy")
+        self.doc_len = load("doc_len.npy")
+        self.idf = load("idf.npy")
+        self.text_offsets = load("text_offsets.npy")
+        self.texts = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") if self.text_offsets[-1] else None
+
+    def __len__(self):
+        return self.manifest["chunks"]
+
+    def search(self, query: str, k: int) -> list:
+        """Return up to k (chunk id, score) pairs ranked by BM25."""
+        import numpy as np
+
+        terms = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not terms or not len(self):
+            return []
+
+        k1, b = settings.BM25_K1, settings.BM25_B
+        norm = k1 * (1 - b + b * np.asarray(self.doc_len) / max(self.manifest["avgdl"], 1e-9))
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in terms:
+            start, end = self.indptr[term], self.indptr[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.tfs[start:end]
+            scores[docs] += self.idf[term] * tf * (k1 + 1) / (tf + norm[docs])
+
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(int(i), float(scores[i])) for i in hits]
+
+    def chunk(self, chunk_id: int) -> dict:
+        start, end = self.text_offsets[chunk_id], self.text_offsets[chunk_id + 1]
+        path, page = self.sources[chunk_id]
+        return {"id": chunk_id, "path": path, "page": page, "text": bytes(self.texts[start:end]).decode("utf-8")}
+
+
+class Retriever:
+    """
+    Hands out different top-ranked chunks for each question about one topic.
+
+    The topic is ranked once; each call takes the next unused chunks from
+    that ranking and wraps around when it runs out. Safe to share between
+    the generation threads of one quiz.
+    """
+
+    def __init__(self, index: DocumentIndex, query: str):
+        self.index = index
+        self._ranked = [chunk_id for chunk_id, _ in index.search(query, settings.RETRIEVAL_CANDIDATES)]
+        if not self._ranked and len(index):
+            # Nothing matches the topic words, so spread questions over the whole material
+            logger.warning(f"No chunks match '{query}', sampling from all course material")
+            self._ranked = random.sample(range(len(index)), min(len(index), settings.RETRIEVAL_CANDIDATES))
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def next_chunks(self, k: int) -> list:
+        with self._lock:
+            if not self._ranked:
+                return []
+            ids = [self._ranked[(self._position + i) % len(self._ranked)] for i in range(min(k, len(self._ranked)))]
+            self._position += len(ids)
+        return [self.index.chunk(chunk_id) for chunk_id in ids]
+
+
+_document_index = None
+_document_index_lock = threading.Lock()
+
+
+def get_document_index(index_dir: str = None):
+    """
+    Return the live index, reopening it when a newer version has been published.
+
+    Returns None if no index has been built yet.
+    """
+    global _document_index
+    index_dir = index_dir or settings.INDEX_DIR
+    version = _read_current(index_dir)
+    if version is None:
+        return None
+
+    with _document_index_lock:
+        if _document_index is None or _document_index.version != version or _document_index.index_dir != index_dir:
+            _document_index = DocumentIndex(index_dir, version)
+        return _document_index
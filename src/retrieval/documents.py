@@ -0,0 +1,80 @@
+import os
+import re
+from src.config.settings import settings
+from src.common.custom_exception import CustomException
+
+SUPPORTED_EXTENSIONS = (".pdf", ".md", ".markdown", ".txt")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can did do does doing down during each few for from further had has have having he her here hers herself him himself
+his how i if in into is it its itself just me more most my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves
+""".split())
+
+_TOKEN = re.compile(r"[^\W_]+", re.UNICODE)
+_MARKDOWN_NOISE = re.compile(r"```.*?```|!\[[^\]]*\]\([^)]*\)|<[^>]+>", re.DOTALL)
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens without stopwords, as used for both indexing and queries."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def load_document(path: str) -> list:
+    """
+    Read a document as (page, text) pairs.
+
+    PDFs are read page by page so chunks can cite their page; other
+    formats are a single page 0.
+
+    Raises:
+        ValueError: For unsupported file types
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        # Optional dependency (the 'documents' extra), only needed when PDFs are indexed
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise CustomException("Indexing PDFs needs the 'pypdf' package: pip install 'ai-quiz[documents]'", e)
+
+        reader = PdfReader(path)
+        return [(number, page.extract_text() or "") for number, page in enumerate(reader.pages, 1)]
+
+    if extension in (".md", ".markdown", ".txt"):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        if extension != ".txt":
+            text = _MARKDOWN_NOISE.sub(" ", text)
+        return [(0, text)]
+
+    raise ValueError(f"Unsupported document type: {path}")
+
+
+def chunk_text(text: str, size: int = None, overlap: int = None) -> list:
+    """Split text into overlapping windows of about `size` words."""
+    size = size or settings.RETRIEVAL_CHUNK_WORDS
+    overlap = settings.RETRIEVAL_CHUNK_OVERLAP_WORDS if overlap is None else overlap
+    words = text.split()
+    if not words:
+        return []
+
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+def iter_documents(directory: str):
+    """Yield paths of supported documents under directory, relative to it, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), directory)
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+from src.config.settings import settings
+
+ARTICLES = frozenset({"a", "an", "the"})
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90, "hundred": 100, "thousand": 1000,
+    "million": 1000000, "billion": 1000000000,
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_NUMBER = re.compile(r"^[-+]?(\d{1,3}(,\d{3})+|\d+)?(\.\d+)?$")
+_FRACTION = re.compile(r"^(\d+)\s*/\s*(\d+)$")
+
+
+def normalize_answer(text: str) -> str:
+    """
+    Canonical form of an answer for comparison.
+
+    Applies Unicode compatibility folding, drops accents and case, turns
+    punctuation (including hyphens) into spaces, removes articles and
+    collapses whitespace: "The Taj-Mahal!" -> "taj mahal".
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    words = _PUNCTUATION.sub(" ", text).split()
+    kept = [w for w in words if w not in ARTICLES]
+    # An answer that is only an article ("A") keeps it
+    return " ".join(kept or words)
+
+
+def parse_number(text: str) -> Optional[float]:
+    """Numeric value of an answer such as "1,947.", "3.50", "1/2" or "twenty five", else None."""
+    text = unicodedata.normalize("NFKC", text or "").strip().rstrip(".").replace("%", "").strip()
+    if not text:
+        return None
+
+    if _NUMBER.match(text) and any(c.isdigit() for c in text):
+        return float(text.replace(",", ""))
+
+    fraction = _FRACTION.match(text)
+    if fraction:
+        denominator = int(fraction.group(2))
+        return int(fraction.group(1)) / denominator if denominator else None
+
+    words = _PUNCTUATION.sub(" ", text.casefold()).split()
+    words = [w for w in words if w != "and"]
+    if not words or any(w not in NUMBER_WORDS for w in words):
+        return None
+
+    total = current = 0
+    for word in words:
+        value = NUMBER_WORDS[word]
+        if value == 100:
+            current = max(current, 1) * 100
+        elif value >= 1000:
+            total += max(current, 1) * value
+            current = 0
+        else:
+            current += value
+    return float(total + current)
+
+
+def edit_distance_within(a: str, b: str, limit: int) -> bool:
+    """True if the Levenshtein distance between a and b is at most limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    if a == b:
+        return True
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        # Only cells within `limit` of the diagonal can stay under the limit
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        if low > 1:
+            current[low - 1] = limit + 1
+        for j in range(low, high + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if high < len(b):
+            current[high + 1:] = [limit + 1] * (len(b) - high)
+        if min(current[low - 1:high + 1]) > limit:
+            return False
+        previous = current
+    return previous[len(b)] <= limit
+
+
+def allowed_edits(text: str) -> int:
+    """
+    Typos tolerated for an answer of this length.
+
+    Answers under 8 characters must be exact: one edit there usually turns
+    one real word into another (Iraq/Iran, Mars/Mary, gold/good), which is
+    a wrong answer rather than a typo.
+    """
+    length = len(text.replace(" ", ""))
+    if length < 8:
+        return 0
+    if length < 12:
+        return min(1, settings.ANSWER_MAX_EDIT_DISTANCE)
+    return settings.ANSWER_MAX_EDIT_DISTANCE
+
+
+@dataclass(slots=True, frozen=True)
+class AnswerKey:
+    """Precomputed forms of a fill-in-the-blank answer and its accepted alternatives."""
+
+    forms: Tuple[str, ...]
+    compact_forms: Tuple[str, ...]
+    numbers: Tuple[float, ...]
+
+    def matches(self, user_answer: str) -> bool:
+        normalized = normalize_answer(user_answer)
+        if not normalized:
+            return False
+        if normalized in self.forms:
+            return True
+        # "Taj Mahal" and "TajMahal"
+        if normalized.replace(" ", "") in self.compact_forms:
+            return True
+
+        if self.numbers:
+            number = parse_number(user_answer)
+            # Numeric answers are never fuzzy-matched: 1947 is not 1948
+            return number is not None and any(abs(number - n) <= 1e-9 * max(1.0, abs(n)) for n in self.numbers)
+
+        if not settings.ANSWER_FUZZY_MATCHING:
+            return False
+        return any(
+            edit_distance_within(normalized, form, allowed_edits(form))
+            for form in self.forms
+            if allowed_edits(form)
+        )
+
+
+def build_answer_key(answer: str, accepted: Iterable[str] = ()) -> AnswerKey:
+    """Normalize the answer and its alternatives once, at generation time."""
+    forms, numbers = [], []
+    for candidate in [answer, *accepted]:
+        normalized = normalize_answer(candidate)
+        if normalized and normalized not in forms:
+            forms.append(normalized)
+        number = parse_number(candidate)
+        if number is not None and number not in numbers:
+            numbers.append(number)
+
+    return AnswerKey(
+        forms=tuple(forms),
+        compact_forms=tuple(dict.fromkeys(form.replace(" ", "") for form in forms)),
+        numbers=tuple(numbers),
+    )
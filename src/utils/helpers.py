@@ -1,122 +1,524 @@
-import os
+import dataclasses
+import random
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 import streamlit as st
-import pandas as pd
-from src.generator.question_generator import QuestionGenerator
+from src.config.settings import settings
+from src.generator.dedup import DedupIndex
+from src.models.quiz import MCQ, Question, Quiz
+
+# pandas, the LLM SDKs and the question cache are imported where first used
+# to keep the app's cold start fast
+if TYPE_CHECKING:
+    from src.generator.question_generator import QuestionGenerator
 
 
 def rerun():
     st.session_state['rerun_trigger'] = not st.session_state.get('rerun_trigger',False)
 
 
+@st.cache_resource
+def get_shared_generation():
+    """Single-flight generation store shared by every session in this process."""
+    from src.cache.shared_generation import SharedGenerationStore
+    return SharedGenerationStore()
+
+
+@contextmanager
+def show_queue_position(generator:'QuestionGenerator'):
+    """
+    While the block runs, show how many other sessions are ahead of this one
+    in the shared API key rate-limit queue.
+
+    Generation blocks the script thread, so a watcher thread attached to the
+    script's context polls the position and updates a placeholder.
+    """
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    placeholder = st.empty()
+    done = threading.Event()
+
+    def watch():
+        shown = None
+        while not done.wait(settings.RATE_LIMIT_STATUS_INTERVAL_SECONDS):
+            position = generator.queue_position
+            if position == shown:
+                continue
+            shown = position
+            if position is None:
+                placeholder.empty()
+            elif position == 0:
+                placeholder.info("⏳ Waiting for the shared API rate limit, you are next")
+            else:
+                placeholder.info(f"⏳ Waiting for the shared API rate limit: {position} other quiz(zes) ahead of you")
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    add_script_run_ctx(watcher, get_script_run_ctx())
+    watcher.start()
+    try:
+        yield
+    finally:
+        done.set()
+        watcher.join()
+        placeholder.empty()
+
+
 class QuizManager:
     def __init__(self):
-        self.questions=[]
-        self.user_answers=[]
+        self.quiz=Quiz()
         self.results=[]
+        self.summary={}
+        self._results_df=None
+        self.adaptive=None
+        # Questions from this session's recent quizzes, to avoid serving them again
+        self.recent_questions = DedupIndex(settings.DEDUP_SIMILARITY_THRESHOLD, max_items=settings.DEDUP_RECENT_LIMIT)
+        # Per-session randomness so shared results are shuffled differently for each student
+        self.rng = random.Random()
 
-    def generate_questions(self, generator:QuestionGenerator , topic:str , question_type:str , difficulty:str , num_questions:int):
-        self.questions=[]
-        self.user_answers=[]
+    def generate_questions(self, generator:'QuestionGenerator' , topic:str , question_type:str , difficulty:str , num_questions:int):
+        try:
+            for _ in self.iter_questions(generator, topic, question_type, difficulty, num_questions):
+                pass
+        except Exception as e:
+            self.reset()
+            st.error(f"Error generating question {e}")
+            return False
+        
+        return True
+
+    @property
+    def questions(self):
+        return self.quiz.questions
+
+    @property
+    def user_answers(self):
+        return [answer.value for answer in self.quiz.answers]
+
+    def reset(self):
+        if self.adaptive is not None:
+            self.adaptive.close()
+            self.adaptive=None
+        self.quiz=Quiz()
         self.results=[]
+        self.summary={}
+        self._results_df=None
+
+    def start_adaptive(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int):
+        """
+        Start an adaptive quiz: questions are served one at a time, at a difficulty
+        that follows the student's running accuracy.
+
+        Only the first question is generated up front; the candidates for the
+        next one are prefetched while the student answers.
+        """
+        from src.adaptive.adaptive_session import AdaptiveSession
+
+        num_questions = min(num_questions, settings.MAX_QUESTIONS_PER_QUIZ)
+        self.reset()
+        self.quiz=Quiz.empty(num_questions, topic, "Adaptive")
+        self.adaptive=AdaptiveSession(generator, topic, question_type, difficulty, num_questions)
+        self._serve_adaptive(0)
+
+    def _serve_adaptive(self, index:int):
+        generated = self.adaptive.next_question()
+        self.quiz.questions[index] = Question.from_schema(generated, self.adaptive.question_type, self.adaptive.difficulty)
+
+    @property
+    def adaptive_position(self) -> int:
+        """Index of the question being answered in an adaptive quiz."""
+        return len(self.adaptive.history)
+
+    def answer_adaptive(self, value:str) -> bool:
+        """Score the current adaptive question, then serve the next. Returns True when the quiz is complete."""
+        index = self.adaptive_position
+        self.quiz.set_answer(index, value, settings.MAX_ANSWER_CHARS)
+        self.adaptive.record(self.quiz.questions[index].is_correct(self.quiz.answers[index].value or ""))
 
+        if index + 1 >= len(self.quiz):
+            self.adaptive.close()
+            return True
+
+        self._serve_adaptive(index + 1)
+        return False
+
+    def iter_questions(self, generator:'QuestionGenerator' , topic:str , question_type:str , difficulty:str , num_questions:int):
+        """
+        Yield (index, question) pairs as soon as each question is ready.
+
+        Questions arrive in completion order, but each is also stored at its
+        slot in self.quiz, so the final quiz order is stable.
+
+        With shared generation enabled, identical requests from other
+        sessions are served from the same results, with question order and
+        MCQ options shuffled per session.
+        """
+        # Bound per-session memory regardless of what the caller asks for
+        num_questions = min(num_questions, settings.MAX_QUESTIONS_PER_QUIZ)
+        self.reset()
+        self.quiz=Quiz.empty(num_questions, topic, difficulty)
+
+        source = None
+        regenerate = None
+        order = list(range(num_questions))
+        if settings.SHARED_GENERATION_ENABLED:
+            source = self._iter_shared(generator, topic, question_type, difficulty, num_questions)
+            self.rng.shuffle(order)
+        elif settings.JOB_QUEUE_ENABLED:
+            # The worker also checks this session's recent quizzes, so few slots come back as repeats
+            avoid = self.recent_questions.recent_texts(settings.DEDUP_AVOID_PROMPT_LIMIT) if settings.DEDUP_ACROSS_QUIZZES else None
+            source = self._iter_job(generator, topic, question_type, difficulty, num_questions, avoid)
+
+        if settings.JOB_QUEUE_ENABLED:
+            # Web replicas never call the LLM themselves; repeats are regenerated by a follow-up job
+            def regenerate(count, avoid):
+                return self._iter_job(generator, topic, question_type, difficulty, count, avoid)
+
+        for index, generated in self._iter_unique(generator, topic, question_type, difficulty, num_questions, source, regenerate):
+            question = Question.from_schema(generated, question_type)
+            if source is not None and question.options:
+                question = dataclasses.replace(question, options=tuple(self.rng.sample(question.options, len(question.options))))
+            slot = order[index]
+            self.quiz.questions[slot] = question
+            yield slot, question
+
+        if settings.DEDUP_ACROSS_QUIZZES:
+            for question in self.quiz.questions:
+                self.recent_questions.add(question.text)
+
+    def _iter_shared(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int):
+        import hashlib
+        import json
+        from src.cache.question_cache import normalize_topic
+
+        kind = 'mcq' if question_type == "Multiple Choice" else 'fill_blank'
+        # Only sessions using the same API keys share a flight: nobody spends another user's quota,
+        # and a leader's auth or quota error only reaches sessions that would hit it themselves
+        key_scope = hashlib.sha256(json.dumps([generator.api_key, generator.fallbacks or []]).encode("utf-8")).hexdigest()
+        key = (generator.provider, generator.model, generator.persona_style, normalize_topic(topic), difficulty.lower(), kind, num_questions, generator.cache_scope, key_scope)
+
+        # The producer runs without this session's history, so results can be shared;
+        # _iter_unique still checks them against this session's recent quizzes
+        def produce():
+            if settings.JOB_QUEUE_ENABLED:
+                return QuizManager()._iter_job(generator, topic, question_type, difficulty, num_questions)
+            return QuizManager().iter_generated(generator, topic, question_type, difficulty, num_questions)
+
+        return get_shared_generation().subscribe(key, produce)
+
+    def _iter_job(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int, avoid:list=None):
+        """
+        Hand generation to a worker process through the job queue and stream its results back.
+
+        `avoid` lists question stems the worker must not repeat. A job that
+        times out or is abandoned by the caller is marked failed, which also
+        drops its payload (and the API key in it) from the queue.
+        """
+        import time
+        from src.cache.question_cache import QUESTION_KINDS
+        from src.common.custom_exception import CustomException
+        from src.jobs.job_queue import DONE, FAILED, get_job_queue
+
+        queue = get_job_queue()
+        job_id = queue.submit({
+            'provider': generator.provider,
+            'api_key': generator.api_key,
+            'model': generator.model,
+            'persona_style': generator.persona_style,
+            'fallbacks': generator.fallbacks,
+            # Workers open the same shared index; the version pins the material the session saw
+            'document_index': generator.document_index.version if generator.document_index is not None else None,
+            'topic': topic,
+            'question_type': question_type,
+            'difficulty': difficulty,
+            'num_questions': num_questions,
+            'avoid': avoid or [],
+        })
+
+        seen = 0
+        finished = False
+        deadline = time.monotonic() + settings.JOB_TIMEOUT_SECONDS
         try:
-            for _ in range(num_questions):
-                if question_type == "Multiple Choice":
-                    question = generator.generate_mcq(topic,difficulty.lower())
+            while True:
+                items, status, error = queue.results(job_id, seen)
+                for item in items:
+                    seen += 1
+                    yield item['index'], QUESTION_KINDS[item['kind']].model_validate(item['question'])
+
+                if status == DONE:
+                    finished = True
+                    return
+                if status == FAILED:
+                    finished = True
+                    raise CustomException("Generation job failed", error)
+                if time.monotonic() > deadline:
+                    finished = True
+                    queue.complete(job_id, error="timeout")
+                    raise TimeoutError(f"Generation job {job_id} timed out after {settings.JOB_TIMEOUT_SECONDS}s")
+                time.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+        finally:
+            if not finished:
+                # The caller stopped reading (or polling failed); don't leave the job queued
+                queue.complete(job_id, error="cancelled")
+
+    def iter_generated(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int):
+        """
+        Yield (index, question model) pairs from the pool/cache/LLM pipeline with duplicates removed.
+
+        Unlike iter_questions this leaves the quiz state untouched, so it can
+        run on background threads and in worker processes.
+        """
+        return self._iter_unique(generator, topic, question_type, difficulty, num_questions)
+
+    def _iter_unique(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int, source=None, regenerate=None):
+        """
+        Drop duplicate and near-duplicate questions and regenerate only those slots.
+
+        Already-used stems are fed back into the prompt to steer the model away
+        from repeats. If a slot is still a duplicate after
+        settings.DEDUP_MAX_REGENERATIONS rounds, its last candidate is kept so
+        the quiz is always complete. `source` replaces the pool/cache/LLM
+        pipeline as the iterator of (index, question) candidates, and
+        `regenerate(count, avoid)` replaces fresh generation for the rejected
+        slots; it yields (offset, question) pairs.
+        """
+        quiz_index = DedupIndex(settings.DEDUP_SIMILARITY_THRESHOLD)
+        check_recent = settings.DEDUP_ACROSS_QUIZZES and len(self.recent_questions) > 0
+
+        def accept(question):
+            if quiz_index.is_duplicate(question.question):
+                return False
+            if check_recent and self.recent_questions.is_duplicate(question.question):
+                return False
+            quiz_index.add(question.question)
+            return True
+
+        avoid = self.recent_questions.recent_texts(settings.DEDUP_AVOID_PROMPT_LIMIT) if check_recent else None
+
+        if source is None:
+            source = self._iter_collect(generator, topic, question_type, difficulty, num_questions, avoid)
 
-                    self.questions.append({
-                        'type' : 'MCQ',
-                        'question' : question.question,
-                        'options' : question.options,
-                        'correct_answer': question.correct_answer
-                    })
+        if regenerate is None:
+            cache_target = self._cache_target(generator, topic, question_type, difficulty)
 
+            def regenerate(count, avoid):
+                for offset, question in self._iter_fresh(generator, topic, question_type, difficulty, count, avoid):
+                    # Replacements grow the bucket too, so later quizzes have more to choose from
+                    if cache_target is not None:
+                        cache_target[0].put(cache_target[1], cache_target[2], [question])
+                    yield offset, question
+
+        rejected = {}
+        for index, question in source:
+            if accept(question):
+                yield index, question
+            else:
+                rejected[index] = question
+
+        for _ in range(settings.DEDUP_MAX_REGENERATIONS):
+            if not rejected:
+                break
+
+            slots = sorted(rejected)
+            avoid = quiz_index.recent_texts(settings.DEDUP_AVOID_PROMPT_LIMIT)
+            for offset, question in regenerate(len(slots), avoid):
+                if accept(question):
+                    del rejected[slots[offset]]
+                    yield slots[offset], question
                 else:
-                    question = generator.generate_fill_blank(topic,difficulty.lower())
+                    rejected[slots[offset]] = question
 
-                    self.questions.append({
-                        'type' : 'Fill in the blank',
-                        'question' : question.question,
-                        'correct_answer': question.answer
-                    })
-        except Exception as e:
-            st.error(f"Error generating question {e}")
-            return False
-        
-        return True
-    
+        for index, question in rejected.items():
+            quiz_index.add(question.question)
+            yield index, question
+
+    def _cache_target(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str):
+        """(cache, key, kind) for the bucket this quiz's questions belong in, or None with the cache disabled."""
+        if not settings.CACHE_ENABLED:
+            return None
+        from src.cache.question_cache import get_question_cache, make_cache_key
+
+        kind = 'mcq' if question_type == "Multiple Choice" else 'fill_blank'
+        key = make_cache_key(generator.provider, generator.model, generator.persona_style, topic, difficulty, kind, generator.cache_scope)
+        return get_question_cache(), key, kind
+
+    def _iter_collect(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int, avoid:list=None):
+        """
+        Serve from the warm pool, then the question cache, and generate only the remainder.
+
+        The cache only ever supplies part of a quiz: at least
+        settings.CACHE_MIN_FRESH_SHARE of the questions are generated fresh
+        (and added to the bucket), and a bucket has to hold
+        settings.CACHE_BUCKET_FACTOR times what it hands out, so repeated
+        quizzes keep drawing from a growing, varied set.
+        """
+        import math
+        from src.pool.question_pool import get_question_pool, make_pool_key
+
+        kind = 'mcq' if question_type == "Multiple Choice" else 'fill_blank'
+        served = 0
+
+        # The pool is warmed without course material, so grounded quizzes skip it
+        if settings.POOL_ENABLED and not generator.cache_scope:
+            pool_key = make_pool_key(topic, difficulty, kind, generator.persona_style)
+            for question in get_question_pool().take(pool_key, num_questions):
+                yield served, question
+                served += 1
+
+        cache_target = self._cache_target(generator, topic, question_type, difficulty)
+        if cache_target is None:
+            for index, question in self._iter_fresh(generator, topic, question_type, difficulty, num_questions - served, avoid):
+                yield served + index, question
+            return
+
+        cache, key, kind = cache_target
+        remaining = num_questions - served
+        from_cache = min(
+            remaining - math.ceil(remaining * settings.CACHE_MIN_FRESH_SHARE),
+            cache.count(key) // settings.CACHE_BUCKET_FACTOR
+        )
+        for question in cache.sample(key, from_cache):
+            yield served, question
+            served += 1
+
+        for index, question in self._iter_fresh(generator, topic, question_type, difficulty, num_questions - served, avoid):
+            cache.put(key, kind, [question])
+            yield served + index, question
+
+    def _iter_fresh(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, num_questions:int, avoid:list=None):
+        if num_questions <= 0:
+            return
+
+        if settings.BATCH_GENERATION:
+            kind = 'mcq' if question_type == "Multiple Choice" else 'fill_blank'
+            yield from enumerate(generator.generate_batch(topic, difficulty.lower(), num_questions, kind, avoid).questions)
+            return
+
+        max_workers = max(1, min(settings.MAX_CONCURRENT_REQUESTS, num_questions))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {
+                executor.submit(self._generate_one, generator, topic, question_type, difficulty, avoid): i
+                for i in range(num_questions)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Don't start queued questions if the caller stopped early or one slot failed
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _generate_one(self, generator:'QuestionGenerator', topic:str, question_type:str, difficulty:str, avoid:list=None):
+        """
+        Generate a single question, retrying only this slot on failure.
+
+        Runs on a worker thread, so it must not call any Streamlit APIs.
+        """
+        attempts = settings.QUESTION_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                if question_type == "Multiple Choice":
+                    return generator.generate_mcq(topic,difficulty.lower(),avoid)
+                return generator.generate_fill_blank(topic,difficulty.lower(),avoid)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
 
     def attempt_quiz(self):
-        for i,q in enumerate(self.questions):
-            st.markdown(f"**Question {i+1} : {q['question']}**")
+        for i,q in enumerate(self.quiz.questions):
+            st.markdown(f"**Question {i+1} : {q.text}**")
 
-            if q['type']=='MCQ':
+            if q.kind==MCQ:
                 user_answer = st.radio(
                     f"Select and answer for Question {i+1}",
-                    q['options'],
+                    q.options,
                     key=f"mcq_{i}"
                 )
 
-                self.user_answers.append(user_answer)
-
             else:
                 user_answer=st.text_input(
                     f"Fill in the blank for Question {i+1}",
                     key = f"fill_blank_{i}"
                 )
 
-                self.user_answers.append(user_answer)
+            # Answers are stored by position, so reruns overwrite instead of appending
+            self.quiz.set_answer(i, user_answer, settings.MAX_ANSWER_CHARS)
 
-    def evaluate_quiz(self):
-        self.results=[]
+    @property
+    def adaptive_finished(self) -> bool:
+        return self.adaptive is not None and self.adaptive_position >= len(self.quiz)
 
-        for i, (q,user_ans) in enumerate(zip(self.questions,self.user_answers)):
-            result_dict = {
-                'question_number' : i+1,
-                'question': q['question'],
-                'question_type' :q["type"],
-                'user_answer' : user_ans,
-                'correct_answer' : q["correct_answer"],
-                "is_correct" : False
-            }
+    def attempt_adaptive(self) -> bool:
+        """Render the current adaptive question. Returns True when it was answered and the quiz moved on."""
+        i = self.adaptive_position
+        if self.quiz.questions[i] is None:
+            # Serving this question failed after the previous answer; try again
+            self._serve_adaptive(i)
+        q = self.quiz.questions[i]
+        st.caption(f"Question {i+1} of {len(self.quiz)} · Difficulty : {q.difficulty}")
+        st.markdown(f"**Question {i+1} : {q.text}**")
 
-            if q['type'] == 'MCQ':
-                result_dict['options'] = q['options']
-                result_dict["is_correct"] = user_ans == q["correct_answer"]
+        if q.kind==MCQ:
+            user_answer = st.radio(
+                f"Select and answer for Question {i+1}",
+                q.options,
+                key=f"adaptive_{self.quiz.quiz_id}_{i}"
+            )
+        else:
+            user_answer=st.text_input(
+                f"Fill in the blank for Question {i+1}",
+                key=f"adaptive_{self.quiz.quiz_id}_{i}"
+            )
 
-            else:
-                result_dict['options'] = []
-                result_dict["is_correct"] = user_ans.strip().lower() == q['correct_answer'].strip().lower()
+        if st.button("Next Question" if i+1 < len(self.quiz) else "Finish Quiz"):
+            self.answer_adaptive(user_answer)
+            return True
+        return False
+
+    def set_answer(self, index:int, value:str):
+        self.quiz.set_answer(index, value, settings.MAX_ANSWER_CHARS)
+
+    def evaluate_quiz(self):
+        from src.results.engine import score_quiz
 
-            self.results.append(result_dict)
+        self.results, self.summary = score_quiz(self.quiz)
+        # A new submission invalidates the cached frame
+        self._results_df=None
 
     def generate_result_dataframe(self):
+        """Results as a DataFrame, built once per submission and reused across reruns."""
+        import pandas as pd
+
         if not self.results:
             return pd.DataFrame()
-        
-        return pd.DataFrame(self.results)
+
+        if self._results_df is None:
+            self._results_df = pd.DataFrame(self.results)
+        return self._results_df
     
-    def save_to_csv(self, filename_prefix="quiz_results"):
+    def save_results(self, user_id:str=None):
+        """Append the scored quiz to the results store. Returns its quiz id."""
+        from src.results.store import get_results_store
+
         if not self.results:
             st.warning("No results to save !!")
             return None
-        
-        df = self.generate_result_dataframe()
-
-
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"{filename_prefix}_{timestamp}.csv"
-
-        os.makedirs('results' , exist_ok=True)
-        full_path = os.path.join('results' , unique_filename)
 
         try:
-            df.to_csv(full_path,index=False)
+            # Only confirm once the results are on disk, not just queued for the next batch
+            quiz_id = get_results_store().append(self.results, user_id, durable=True)
             st.success("Results saved sucesfully....")
-            return full_path
-        
+            return quiz_id
+
         except Exception as e:
             st.error(f"Failed to save results {e}")
             return None
-            
+
+    def export_csv(self) -> bytes:
+        """Results as CSV for download; options are written as a JSON array."""
+        import json
+
+        df = self.generate_result_dataframe()
+        if df.empty:
+            return b""
+        return df.assign(options=df['options'].map(json.dumps)).to_csv(index=False).encode('utf-8')
@@ -0,0 +1,84 @@
+import unittest
+
+from src.config.settings import settings
+from src.utils.answer_matching import allowed_edits, build_answer_key, normalize_answer, parse_number
+
+
+class NormalizeAnswerTest(unittest.TestCase):
+
+    def test_folds_case_accents_punctuation_and_articles(self):
+        self.assertEqual(normalize_answer("The Taj-Mahal!"), "taj mahal")
+        self.assertEqual(normalize_answer("Café"), "cafe")
+
+    def test_answer_that_is_only_an_article_is_kept(self):
+        self.assertEqual(normalize_answer("A"), "a")
+
+
+class ParseNumberTest(unittest.TestCase):
+
+    def test_numeric_forms(self):
+        self.assertEqual(parse_number("1947."), 1947)
+        self.assertEqual(parse_number("1,947"), 1947)
+        self.assertEqual(parse_number("1/2"), 0.5)
+        self.assertEqual(parse_number("twenty five"), 25)
+
+    def test_words_are_not_numbers(self):
+        self.assertIsNone(parse_number("Paris"))
+
+
+class AnswerKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self._fuzzy = settings.ANSWER_FUZZY_MATCHING
+        self._edits = settings.ANSWER_MAX_EDIT_DISTANCE
+        settings.ANSWER_FUZZY_MATCHING = True
+        settings.ANSWER_MAX_EDIT_DISTANCE = 2
+
+    def tearDown(self):
+        settings.ANSWER_FUZZY_MATCHING = self._fuzzy
+        settings.ANSWER_MAX_EDIT_DISTANCE = self._edits
+
+    def test_accepts_equivalent_forms(self):
+        cases = [
+            ("Taj Mahal", "Taj-Mahal"),
+            ("Taj Mahal", "tajmahal"),
+            ("1947", "1947."),
+            ("1947", "1,947"),
+            ("25", "twenty five"),
+            ("Paris", " paris "),
+            ("The Nile", "nile"),
+            ("Mount Everest", "Mount Everst"),
+            ("Photosynthesis", "Photosinthesis"),
+        ]
+        for answer, typed in cases:
+            with self.subTest(answer=answer, typed=typed):
+                self.assertTrue(build_answer_key(answer).matches(typed))
+
+    def test_accepted_answers(self):
+        key = build_answer_key("United States", ["USA"])
+        self.assertTrue(key.matches("usa"))
+
+    def test_rejects_near_miss_short_words(self):
+        cases = [("Iraq", "Iran"), ("Mars", "Mary"), ("Paris", "Parts"), ("Nile", "Nole"), ("gold", "good")]
+        for answer, typed in cases:
+            with self.subTest(answer=answer, typed=typed):
+                self.assertFalse(build_answer_key(answer).matches(typed))
+
+    def test_numbers_are_never_fuzzy(self):
+        self.assertFalse(build_answer_key("1947").matches("1948"))
+
+    def test_empty_answer_never_matches(self):
+        self.assertFalse(build_answer_key("Paris").matches(""))
+
+    def test_fuzzy_matching_can_be_disabled(self):
+        settings.ANSWER_FUZZY_MATCHING = False
+        self.assertFalse(build_answer_key("Mount Everest").matches("Mount Everst"))
+
+    def test_short_answers_must_be_exact(self):
+        self.assertEqual(allowed_edits("paris"), 0)
+        self.assertEqual(allowed_edits("jerusalem"), 1)
+        self.assertEqual(allowed_edits("photosynthesis"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
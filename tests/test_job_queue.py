@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.config.settings import settings
+from src.jobs.job_queue import DONE, FAILED, QUEUED, RUNNING, RedisJobQueue, SQLiteJobQueue
+from src.jobs.local_redis import LocalRedis
+
+
+class JobQueueContract:
+    """Behaviour both backends must share; subclasses provide make_queue."""
+
+    def make_queue(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self._visibility = settings.JOB_VISIBILITY_TIMEOUT_SECONDS
+        self._ttl = settings.JOB_TTL_SECONDS
+        self.queue = self.make_queue()
+
+    def tearDown(self):
+        settings.JOB_VISIBILITY_TIMEOUT_SECONDS = self._visibility
+        settings.JOB_TTL_SECONDS = self._ttl
+
+    def test_submit_then_claim_returns_payload(self):
+        job_id = self.queue.submit({"topic": "Cricket"})
+        self.assertEqual(self.queue.results(job_id), ([], QUEUED, None))
+
+        claimed = self.queue.claim("worker-1", timeout=1)
+        self.assertEqual(claimed, (job_id, {"topic": "Cricket"}))
+        self.assertEqual(self.queue.results(job_id)[1], RUNNING)
+
+    def test_claim_returns_none_when_empty(self):
+        self.assertIsNone(self.queue.claim("worker-1", timeout=0))
+
+    def test_jobs_are_claimed_oldest_first(self):
+        first = self.queue.submit({"n": 1})
+        second = self.queue.submit({"n": 2})
+        self.assertEqual(self.queue.claim("w", timeout=1)[0], first)
+        self.assertEqual(self.queue.claim("w", timeout=1)[0], second)
+
+    def test_published_items_stream_in_order(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("w", timeout=1)
+        for i in range(3):
+            self.queue.publish(job_id, {"index": i})
+
+        items, status, _ = self.queue.results(job_id)
+        self.assertEqual([item["index"] for item in items], [0, 1, 2])
+        self.assertEqual(status, RUNNING)
+        self.assertEqual(self.queue.results(job_id, start=2)[0], [{"index": 2}])
+
+    def test_complete_marks_done(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("w", timeout=1)
+        self.queue.publish(job_id, {"index": 0})
+        self.queue.complete(job_id)
+        self.assertEqual(self.queue.results(job_id), ([{"index": 0}], DONE, None))
+
+    def test_complete_with_error_marks_failed(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("w", timeout=1)
+        self.queue.complete(job_id, error="boom")
+        self.assertEqual(self.queue.results(job_id)[1:], (FAILED, "boom"))
+
+    def test_finished_job_is_not_completed_again(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("w", timeout=1)
+        self.queue.complete(job_id, error="cancelled")
+        self.queue.complete(job_id)
+        self.assertEqual(self.queue.results(job_id)[1:], (FAILED, "cancelled"))
+
+    def test_worker_owns_only_its_running_job(self):
+        job_id = self.queue.submit({})
+        self.assertFalse(self.queue.owns(job_id, "w"))
+        self.queue.claim("w", timeout=1)
+        self.assertTrue(self.queue.owns(job_id, "w"))
+        self.assertFalse(self.queue.owns(job_id, "other"))
+
+        self.queue.complete(job_id, error="timeout")
+        self.assertFalse(self.queue.owns(job_id, "w"))
+
+    def test_cancelled_job_is_never_claimed(self):
+        job_id = self.queue.submit({"api_key": "secret"})
+        self.queue.complete(job_id, error="timeout")
+        self.assertIsNone(self.queue.claim("w", timeout=0))
+
+    def test_job_of_a_dead_worker_is_claimed_again(self):
+        job_id = self.queue.submit({"topic": "Cricket"})
+        self.queue.claim("crashed", timeout=1)
+        self.assertIsNone(self.queue.claim("w", timeout=0))
+
+        settings.JOB_VISIBILITY_TIMEOUT_SECONDS = -1
+        self.assertEqual(self.queue.claim("w", timeout=1), (job_id, {"topic": "Cricket"}))
+
+    def test_requeued_job_does_not_repeat_published_indexes(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("crashed", timeout=1)
+        self.queue.publish(job_id, {"index": 0, "question": "first try"})
+
+        settings.JOB_VISIBILITY_TIMEOUT_SECONDS = -1
+        self.queue.claim("w", timeout=1)
+        self.assertFalse(self.queue.owns(job_id, "crashed"))
+        self.queue.publish(job_id, {"index": 0, "question": "second try"})
+        self.queue.publish(job_id, {"index": 1, "question": "second try"})
+
+        items = self.queue.results(job_id)[0]
+        self.assertEqual(items, [{"index": 0, "question": "first try"}, {"index": 1, "question": "second try"}])
+
+    def test_publishing_keeps_a_live_job_claimed(self):
+        job_id = self.queue.submit({})
+        self.queue.claim("slow", timeout=1)
+        time.sleep(0.3)
+        self.queue.publish(job_id, {"index": 0})
+        settings.JOB_VISIBILITY_TIMEOUT_SECONDS = 0.2
+        self.assertIsNone(self.queue.claim("w", timeout=0))
+        self.assertTrue(self.queue.owns(job_id, "slow"))
+
+    def test_unknown_job_raises(self):
+        with self.assertRaises(KeyError):
+            self.queue.results("missing")
+
+
+class SQLiteJobQueueTest(JobQueueContract, unittest.TestCase):
+
+    def make_queue(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        return SQLiteJobQueue(os.path.join(directory, "queue.db"))
+
+    def test_expired_job_fails_and_drops_payload(self):
+        job_id = self.queue.submit({"api_key": "secret"})
+        settings.JOB_TTL_SECONDS = -1
+        self.assertIsNone(self.queue.claim("w", timeout=0))
+        self.assertEqual(self.queue.results(job_id)[1:], (FAILED, "expired"))
+
+
+class RedisJobQueueTest(JobQueueContract, unittest.TestCase):
+
+    def make_queue(self):
+        return RedisJobQueue(LocalRedis(), prefix="test")
+
+    def test_expired_job_is_gone(self):
+        settings.JOB_TTL_SECONDS = 0
+        job_id = self.queue.submit({"api_key": "secret"})
+        self.assertIsNone(self.queue.claim("w", timeout=0))
+        with self.assertRaises(KeyError):
+            self.queue.results(job_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
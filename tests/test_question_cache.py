@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+
+import src.cache.question_cache as question_cache
+from src.cache.question_cache import make_cache_key
+from src.config.settings import settings
+from src.generator.question_generator import QuestionGenerator
+from src.utils.helpers import QuizManager
+
+
+class CachedQuizVarietyTest(unittest.TestCase):
+    """Repeated quizzes for the same bucket must not keep serving one fixed set."""
+
+    OVERRIDES = {
+        "CACHE_ENABLED": True,
+        "POOL_ENABLED": False,
+        "SHARED_GENERATION_ENABLED": False,
+        "JOB_QUEUE_ENABLED": False,
+        "SHARED_RATE_LIMIT_ENABLED": False,
+    }
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        self._saved = {name: getattr(settings, name) for name in self.OVERRIDES}
+        self._saved["CACHE_DB_PATH"] = settings.CACHE_DB_PATH
+        for name, value in self.OVERRIDES.items():
+            setattr(settings, name, value)
+        settings.CACHE_DB_PATH = f"{directory}/cache.db"
+        question_cache._question_cache = None
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(settings, name, value)
+        question_cache._question_cache = None
+
+    def _quiz(self, generator):
+        manager = QuizManager()
+        self.assertTrue(manager.generate_questions(generator, "Cricket", "Multiple Choice", "Medium", 5))
+        return frozenset(question.text for question in manager.questions)
+
+    def test_sessions_get_different_sets_and_bucket_grows(self):
+        generator = QuestionGenerator(provider="Fake", api_key="offline", model="fake-model", persona_style="neutral and educational")
+        key = make_cache_key(generator.provider, generator.model, generator.persona_style, "Cricket", "Medium", "mcq", generator.cache_scope)
+        cache = question_cache.get_question_cache()
+
+        quizzes = []
+        sizes = []
+        for _ in range(4):
+            quizzes.append(self._quiz(generator))
+            sizes.append(cache.count(key))
+
+        self.assertEqual(len(set(quizzes)), len(quizzes))
+        self.assertEqual(sizes, sorted(sizes))
+        self.assertGreater(sizes[-1], sizes[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import threading
+import time
+import unittest
+
+import src.llm.rate_limiter as rate_limiter
+from src.config.settings import settings
+from src.llm.fake_llm import FakeChatModel
+from src.llm.rate_limiter import SharedRateLimitedLLM, SharedRateLimiter, get_shared_rate_limiter
+
+
+def hold(limiter, seconds, requests=0.0):
+    """Set the request bucket to `requests` and pause the limiter, so callers queue up."""
+    def drain(state, now):
+        state[0], state[3] = requests, now + seconds
+        return state, None
+    limiter.buckets.update(limiter.limits, drain)
+
+
+class SharedRateLimiterTest(unittest.TestCase):
+
+    def _acquire_in_thread(self, limiter, client_id, served):
+        def run():
+            limiter.acquire(client_id, 1)
+            served.append(client_id)
+        thread = threading.Thread(target=run)
+        thread.start()
+        # Let it join the queue before the next caller
+        while limiter.queue_position(client_id) is None:
+            time.sleep(0.005)
+        return thread
+
+    def test_clients_take_turns(self):
+        # 20 requests a second, so calls are released one at a time
+        limiter = SharedRateLimiter(requests_per_minute=1200)
+        hold(limiter, 0.2)
+
+        served = []
+        threads = [self._acquire_in_thread(limiter, "big-quiz", served) for _ in range(3)]
+        threads.append(self._acquire_in_thread(limiter, "small-quiz", served))
+        self.assertEqual(limiter.queue_position("small-quiz"), 1)
+
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(served, ["big-quiz", "small-quiz", "big-quiz", "big-quiz"])
+        self.assertFalse(limiter.waiting)
+
+    def test_waits_for_the_token_budget(self):
+        limiter = SharedRateLimiter(tokens_per_minute=6000)
+        limiter.acquire("a", 5950)
+
+        start = time.monotonic()
+        limiter.acquire("a", 60)
+        # 10 missing tokens at 100 tokens a second
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_settle_refunds_unused_tokens(self):
+        limiter = SharedRateLimiter(tokens_per_minute=6000)
+        reserved = limiter.acquire("a", 6000)
+        limiter.settle(reserved, used=1000)
+
+        start = time.monotonic()
+        limiter.acquire("a", 4000)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_rate_limit_error_pauses_every_client(self):
+        class TooManyRequests(Exception):
+            status_code = 429
+
+        class Limited(FakeChatModel):
+            def invoke(self, prompt, **kwargs):
+                raise TooManyRequests()
+
+        limiter = SharedRateLimiter(requests_per_minute=6000)
+        limiter.key = "test:limited"
+        with self.assertRaises(TooManyRequests):
+            SharedRateLimitedLLM(Limited(), limiter, "a").invoke("question")
+
+        paused_until = limiter.buckets.update(limiter.limits, lambda state, now: (state, state[3] - now))
+        self.assertGreater(paused_until, settings.RATE_LIMIT_PAUSE_SECONDS - 1)
+
+
+class SharedRateLimiterRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (settings.SHARED_RATE_LIMIT_ENABLED, settings.SHARED_RATE_LIMIT_BACKEND, settings.RATE_LIMITER_IDLE_SECONDS)
+        settings.SHARED_RATE_LIMIT_ENABLED = True
+        settings.SHARED_RATE_LIMIT_BACKEND = "memory"
+        rate_limiter._shared_limiters.clear()
+
+    def tearDown(self):
+        settings.SHARED_RATE_LIMIT_ENABLED, settings.SHARED_RATE_LIMIT_BACKEND, settings.RATE_LIMITER_IDLE_SECONDS = self._saved
+        rate_limiter._shared_limiters.clear()
+
+    def test_one_limiter_per_api_key_and_model(self):
+        first = get_shared_rate_limiter("Groq", "key-1", "llama")
+        self.assertIs(get_shared_rate_limiter("Groq", "key-1", "llama"), first)
+        self.assertIsNot(get_shared_rate_limiter("Groq", "key-2", "llama"), first)
+        self.assertNotIn("key-1", first.key)
+
+    def test_providers_without_a_budget_are_not_limited(self):
+        self.assertIsNone(get_shared_rate_limiter("Fake", "offline", "fake-model"))
+
+    def test_idle_limiters_are_evicted(self):
+        settings.RATE_LIMITER_IDLE_SECONDS = 0
+        idle = get_shared_rate_limiter("Groq", "key-1", "llama")
+        get_shared_rate_limiter("Groq", "key-2", "llama")
+        self.assertNotIn(idle.key, rate_limiter._shared_limiters)
+
+    def test_limiter_with_waiting_callers_is_kept(self):
+        settings.RATE_LIMITER_IDLE_SECONDS = 0
+        busy = get_shared_rate_limiter("Groq", "key-1", "llama")
+        hold(busy, 0.3, requests=1.0)
+        thread = threading.Thread(target=busy.acquire, args=("a", 1))
+        thread.start()
+        while not busy.waiting:
+            time.sleep(0.005)
+
+        get_shared_rate_limiter("Groq", "key-2", "llama")
+        self.assertIs(rate_limiter._shared_limiters.get(busy.key), busy)
+        thread.join(5)
+
+    def test_evicted_limiter_is_registered_again_when_used(self):
+        settings.RATE_LIMITER_IDLE_SECONDS = 0
+        limiter = get_shared_rate_limiter("Groq", "key-1", "llama")
+        get_shared_rate_limiter("Groq", "key-2", "llama")
+
+        wrapped = SharedRateLimitedLLM(FakeChatModel(), limiter, "a")
+        wrapped.invoke("question")
+        self.assertIs(rate_limiter._shared_limiters.get(limiter.key), limiter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import time
+import unittest
+
+from src.llm.fake_llm import FakeChatModel, FakeLLMError
+from src.llm.resilience import ResilientLLM, RetryPolicy
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"status_code": status_code, "headers": headers or {}})()
+
+
+class Flaky:
+    """Fake model that raises `errors` in turn before answering."""
+
+    def __init__(self, *errors, slow_first: float = 0.0):
+        self.llm = FakeChatModel()
+        self.errors = list(errors)
+        self.slow_first = slow_first
+        self.calls = 0
+
+    def _before_call(self):
+        self.calls += 1
+        if self.calls == 1 and self.slow_first:
+            time.sleep(self.slow_first)
+        if self.errors:
+            raise self.errors.pop(0)
+
+    def invoke(self, prompt, **kwargs):
+        self._before_call()
+        return self.llm.invoke(prompt, **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        self._before_call()
+        yield from self.llm.stream(prompt, **kwargs)
+
+
+def no_wait_policy(sleeps, max_attempts=3):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.5, max_delay=4, sleep=sleeps.append, rng=lambda: 1.0)
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        policy = no_wait_policy([])
+        self.assertEqual([policy.delay(attempt) for attempt in range(5)], [0.5, 1, 2, 4, 4])
+
+    def test_retry_after_header_wins_but_is_capped(self):
+        policy = no_wait_policy([])
+        self.assertEqual(policy.delay(0, HTTPError(429, {"retry-after": "3"})), 3)
+        self.assertEqual(policy.delay(0, HTTPError(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(policy.delay(0, HTTPError(429, {"retry-after": "60"})), 4)
+
+    def test_only_transient_errors_are_retryable(self):
+        policy = no_wait_policy([])
+        self.assertTrue(policy.is_retryable(FakeLLMError("busy")))
+        self.assertTrue(policy.is_retryable(HTTPError(429)))
+        self.assertTrue(policy.is_retryable(TimeoutError()))
+        self.assertFalse(policy.is_retryable(HTTPError(401)))
+        self.assertFalse(policy.is_retryable(ValueError("bad prompt")))
+
+
+class ResilientLLMTest(unittest.TestCase):
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        sleeps = []
+        llm = Flaky(FakeLLMError("busy"), FakeLLMError("busy"))
+        response = ResilientLLM([("primary", llm)], no_wait_policy(sleeps), hedge_after=0).invoke("question")
+
+        self.assertIn("question", response.content)
+        self.assertEqual(llm.calls, 3)
+        self.assertEqual(sleeps, [0.5, 1])
+
+    def test_exhausted_model_fails_over_to_the_next(self):
+        sleeps = []
+        primary = FakeChatModel(failure_rate=1.0)
+        backup = Flaky()
+        resilient = ResilientLLM([("primary", primary), ("backup", backup)], no_wait_policy(sleeps), hedge_after=0)
+
+        self.assertIn("question", resilient.invoke("question").content)
+        self.assertEqual(backup.calls, 1)
+        self.assertEqual(len(sleeps), 2)
+
+    def test_non_retryable_error_fails_over_immediately(self):
+        sleeps = []
+        primary = Flaky(HTTPError(401))
+        backup = Flaky()
+        ResilientLLM([("primary", primary), ("backup", backup)], no_wait_policy(sleeps), hedge_after=0).invoke("question")
+
+        self.assertEqual((primary.calls, backup.calls, sleeps), (1, 1, []))
+
+    def test_last_error_is_raised_when_every_model_fails(self):
+        resilient = ResilientLLM([("a", Flaky(HTTPError(401))), ("b", Flaky(HTTPError(403)))], no_wait_policy([]), hedge_after=0)
+        with self.assertRaises(HTTPError) as raised:
+            resilient.invoke("question")
+        self.assertEqual(raised.exception.status_code, 403)
+
+    def test_slow_call_is_hedged(self):
+        llm = Flaky(slow_first=2.0)
+        start = time.monotonic()
+        ResilientLLM([("primary", llm)], no_wait_policy([]), hedge_after=0.05).invoke("question")
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(llm.calls, 2)
+
+    def test_slow_stream_is_hedged_on_first_chunk(self):
+        llm = Flaky(slow_first=2.0)
+        start = time.monotonic()
+        content = "".join(chunk.content for chunk in ResilientLLM([("primary", llm)], no_wait_policy([]), hedge_after=0.05).stream("question"))
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(llm.calls, 2)
+        self.assertEqual(content, FakeChatModel().invoke("question").content)
+
+    def test_stream_retries_before_the_first_chunk(self):
+        sleeps = []
+        llm = Flaky(FakeLLMError("busy"))
+        chunks = list(ResilientLLM([("primary", llm)], no_wait_policy(sleeps), hedge_after=0).stream("question"))
+
+        self.assertTrue(chunks)
+        self.assertEqual((llm.calls, sleeps), (2, [0.5]))
+
+    def test_stream_error_after_the_first_chunk_is_not_retried(self):
+        class BreaksMidStream(Flaky):
+            def stream(self, prompt, **kwargs):
+                self.calls += 1
+                yield next(self.llm.stream(prompt, **kwargs))
+                raise FakeLLMError("connection reset")
+
+        llm = BreaksMidStream()
+        stream = ResilientLLM([("primary", llm)], no_wait_policy([]), hedge_after=0).stream("question")
+        next(stream)
+        with self.assertRaises(FakeLLMError):
+            next(stream)
+        self.assertEqual(llm.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
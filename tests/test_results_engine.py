@@ -0,0 +1,124 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import analytics
+import src.results.store as store
+from src.config.settings import settings
+from src.models.quiz import FILL_BLANK, MCQ
+from src.results.engine import accuracy_by, load_saved_results, question_difficulty, score_frame
+
+
+def attempts(rows):
+    """Frame of saved answers from (quiz_id, topic, question_difficulty, question, is_correct) tuples."""
+    df = pd.DataFrame(rows, columns=["quiz_id", "topic", "question_difficulty", "question", "is_correct"])
+    df["difficulty"] = df["question_difficulty"]
+    return df
+
+
+class ScoreFrameTest(unittest.TestCase):
+
+    def test_matches_score_quiz_rules(self):
+        df = pd.DataFrame({
+            "user_answer": ["Paris", "paris", "The Eiffel Towr", " ", "10", None],
+            "correct_answer": ["Paris", "Paris", "Eiffel Tower", "x", "10.0", "Rome"],
+            "question_type": [MCQ, MCQ, FILL_BLANK, FILL_BLANK, FILL_BLANK, FILL_BLANK],
+        })
+        # MCQs need the exact option; fill-ins are normalized, numeric and typo tolerant, and never blank
+        self.assertEqual(score_frame(df).tolist(), [True, False, True, False, True, False])
+
+
+class AccuracyByTest(unittest.TestCase):
+
+    def test_groups_sorted_hardest_first(self):
+        df = attempts([
+            ("q1", "Cricket", "easy", "A", True),
+            ("q1", "Cricket", "hard", "B", False),
+            ("q2", "Cricket", "easy", "A", True),
+            ("q2", "Cricket", "hard", "C", True),
+        ])
+        stats = accuracy_by(df, by=("topic", "question_difficulty"))
+
+        self.assertEqual(stats["question_difficulty"].tolist(), ["hard", "easy"])
+        self.assertEqual(stats["accuracy"].tolist(), [0.5, 1.0])
+        self.assertEqual(stats["quizzes"].tolist(), [2, 2])
+
+
+class QuestionDifficultyTest(unittest.TestCase):
+
+    def test_estimates_and_discrimination(self):
+        rows = []
+        # Strong students (quiz ids s*) get everything right, weak ones only the easy question
+        for i in range(6):
+            strong = i < 3
+            quiz = f"{'s' if strong else 'w'}{i}"
+            rows += [
+                (quiz, "Cricket", "medium", "Easy one", True),
+                (quiz, "Cricket", "medium", "Hard one", strong),
+                (quiz, "Cricket", "medium", "Other", strong),
+            ]
+        stats = question_difficulty(attempts(rows)).set_index("question")
+
+        self.assertEqual(stats.index[0], "Hard one")
+        self.assertAlmostEqual(stats.loc["Easy one", "p_value"], 7 / 8)
+        self.assertAlmostEqual(stats.loc["Hard one", "p_value"], 4 / 8)
+        self.assertGreater(stats.loc["Hard one", "discrimination"], 0.9)
+        # Everyone got it right, so it says nothing about ability
+        self.assertTrue(pd.isna(stats.loc["Easy one", "discrimination"]))
+
+    def test_questions_with_few_attempts_are_skipped(self):
+        df = attempts([("q1", "Cricket", "easy", "A", True), ("q2", "Cricket", "easy", "A", False)])
+        self.assertTrue(question_difficulty(df, min_attempts=5).empty)
+        self.assertEqual(question_difficulty(df, min_attempts=2)["attempts"].tolist(), [2])
+
+    def test_adaptive_questions_are_grouped_by_their_own_level(self):
+        df = attempts([("q1", "Cricket", "hard", "A", True), ("q2", "Cricket", "hard", "A", False)])
+        df["difficulty"] = "adaptive"
+        self.assertEqual(question_difficulty(df, min_attempts=1)["difficulty"].tolist(), ["hard"])
+
+
+class SavedResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self._saved = settings.RESULTS_DIR
+        settings.RESULTS_DIR = directory
+        store._results_store = None
+
+        records = [
+            {
+                "quiz_id": quiz_id, "topic": "Cricket", "difficulty": "Adaptive", "question_difficulty": "Hard",
+                "question_number": 1, "question": "Who scored 100 centuries?", "question_type": FILL_BLANK,
+                "user_answer": answer, "correct_answer": "Sachin Tendulkar", "options": [], "is_correct": False,
+            }
+            for quiz_id, answer in (("q1", "Sachin Tendulkar"), ("q2", "Sachin Tendulkr"), ("q3", "Dravid"))
+        ]
+        for record in records:
+            store.get_results_store().append([record], user_id="student-1", durable=True)
+
+    def tearDown(self):
+        settings.RESULTS_DIR = self._saved
+        store._results_store = None
+
+    def test_load_saved_results_applies_filters(self):
+        self.assertEqual(len(load_saved_results(user_id="student-1", topic=" cricket ")), 3)
+        self.assertTrue(load_saved_results(user_id="someone-else").empty)
+
+    def test_report_rescores_saved_answers(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            analytics.main(["--rescore", "--min-attempts", "1"])
+
+        report = output.getvalue()
+        self.assertIn("3 quizzes, 3 answers", report)
+        self.assertIn("Re-scoring changed 2 verdicts", report)
+        self.assertIn("Who scored 100 centuries?", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.results.store import ResultsStore, partition_name
+
+
+def _records(quiz_id, difficulty, question_difficulties):
+    return [
+        {
+            "quiz_id": quiz_id,
+            "topic": "Cricket",
+            "difficulty": difficulty,
+            "question_difficulty": level,
+            "question_number": i + 1,
+            "question": f"Question {i + 1}?",
+            "question_type": "MCQ",
+            "user_answer": "a",
+            "correct_answer": "a",
+            "options": ["a", "b"],
+            "is_correct": True,
+        }
+        for i, level in enumerate(question_difficulties)
+    ]
+
+
+class ResultsStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = ResultsStore(self.directory, batch_size=100, flush_interval=60)
+
+    def test_adaptive_quiz_keeps_per_question_difficulty(self):
+        self.store.append(_records("q1", "Adaptive", ["Easy", "Medium", "Hard"]), durable=True)
+
+        df = self.store.query()
+        self.assertEqual(set(df["difficulty"]), {"adaptive"})
+        self.assertEqual(list(df["question_difficulty"]), ["easy", "medium", "hard"])
+
+    def test_partition_created_before_the_column_is_migrated(self):
+        now = time.time()
+        with sqlite3.connect(os.path.join(self.directory, partition_name(now))) as conn:
+            conn.execute(
+                "CREATE TABLE answers (quiz_id TEXT NOT NULL, question_number INTEGER NOT NULL,"
+                " question TEXT NOT NULL, question_type TEXT NOT NULL, user_answer TEXT NOT NULL,"
+                " correct_answer TEXT NOT NULL, options TEXT NOT NULL, is_correct INTEGER NOT NULL,"
+                " PRIMARY KEY (quiz_id, question_number)) WITHOUT ROWID"
+            )
+            conn.execute("INSERT INTO answers VALUES ('old', 1, 'Q?', 'MCQ', 'a', 'a', '[\"a\"]', 1)")
+        conn.close()
+
+        self.store.append(_records("new", "Hard", ["Hard"]), created_at=now, durable=True)
+        with sqlite3.connect(os.path.join(self.directory, partition_name(now))) as conn:
+            conn.execute(
+                "INSERT INTO quizzes VALUES ('old', NULL, 'Cricket', 'cricket', 'easy', ?, 1, 1)", (now - 1,)
+            )
+        conn.close()
+
+        df = self.store.query()
+        self.assertEqual(list(df["quiz_id"]), ["old", "new"])
+        self.assertEqual(list(df["question_difficulty"]), ["easy", "hard"])
+
+
+if __name__ == "__main__":
+    unittest.main()
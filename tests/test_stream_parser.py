@@ -0,0 +1,83 @@
+import json
+import unittest
+
+from src.generator.response_parser import ResponseParseError, get_response_parser
+from src.generator.stream_parser import IncrementalJsonValidator
+from src.llm.fake_llm import FakeChatModel
+from src.models.question_schemas import FillBlankQuestion, MCQQuestion
+
+MCQ = {"question": "Which bowler took 800 Test wickets?", "options": ["Murali", "Warne", "Kumble", "Anderson"], "correct_answer": "Murali"}
+
+
+def feed_in_chunks(validator, text, size=5):
+    """Feed `text` a few characters at a time; returns the chunk index where the JSON completed, or None."""
+    for i in range(0, len(text), size):
+        if validator.feed(text[i:i + size]):
+            return i // size
+    return None
+
+
+class IncrementalJsonValidatorTest(unittest.TestCase):
+
+    def test_completes_at_the_end_of_the_json(self):
+        validator = IncrementalJsonValidator(MCQQuestion)
+        text = "Here you go: " + json.dumps(MCQ) + "\nHope this helps! " * 20
+
+        stopped = feed_in_chunks(validator, text)
+
+        self.assertIsNotNone(stopped)
+        self.assertLess(validator.received, len(text))
+        self.assertEqual(json.loads(validator.text), MCQ)
+
+    def test_streamed_fake_response_parses(self):
+        validator = IncrementalJsonValidator(FillBlankQuestion)
+        for chunk in FakeChatModel().stream("Write a fill-in-the-blank question"):
+            if validator.feed(chunk.content):
+                break
+
+        question = get_response_parser(FillBlankQuestion).parse(validator.text)
+        self.assertIn("___", question.question)
+
+    def test_fifth_option_is_rejected_before_the_array_closes(self):
+        text = '{"question": "Q?", "options": ["a", "b", "c", "d", "e"'
+        with self.assertRaises(ResponseParseError) as raised:
+            feed_in_chunks(IncrementalJsonValidator(MCQQuestion), text)
+        self.assertEqual(raised.exception.reason, "validation")
+
+    def test_answer_must_be_one_of_the_options(self):
+        text = json.dumps(dict(MCQ, correct_answer="Harbhajan"))
+        with self.assertRaises(ResponseParseError):
+            feed_in_chunks(IncrementalJsonValidator(MCQQuestion), text)
+
+    def test_answer_differing_only_in_case_and_spacing_is_accepted(self):
+        text = json.dumps(dict(MCQ, correct_answer="  murali "))
+        self.assertIsNotNone(feed_in_chunks(IncrementalJsonValidator(MCQQuestion), text))
+
+    def test_fill_blank_question_needs_a_blank(self):
+        with self.assertRaises(ResponseParseError):
+            feed_in_chunks(IncrementalJsonValidator(FillBlankQuestion), '{"question": "No blank here", "answer": "x"}')
+
+    def test_missing_field_is_rejected_when_the_object_closes(self):
+        with self.assertRaises(ResponseParseError):
+            feed_in_chunks(IncrementalJsonValidator(FillBlankQuestion), '{"question": "The ___ is red"}')
+
+    def test_escaped_quotes_and_braces_in_strings_are_not_structure(self):
+        question = {"question": 'Who said "{___}"?', "answer": "x"}
+        validator = IncrementalJsonValidator(FillBlankQuestion)
+        self.assertIsNotNone(feed_in_chunks(validator, json.dumps(question)))
+        self.assertEqual(json.loads(validator.text), question)
+
+    def test_too_much_preamble_is_rejected(self):
+        with self.assertRaises(ResponseParseError) as raised:
+            feed_in_chunks(IncrementalJsonValidator(MCQQuestion, max_preamble=20), "Sure! " * 10 + json.dumps(MCQ))
+        self.assertEqual(raised.exception.reason, "no_json")
+
+    def test_finish_without_json_raises(self):
+        validator = IncrementalJsonValidator(MCQQuestion)
+        validator.feed("I can't help with that.")
+        with self.assertRaises(ResponseParseError):
+            validator.finish()
+
+
+if __name__ == "__main__":
+    unittest.main()
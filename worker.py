@@ -0,0 +1,124 @@
+"""
+Generation worker: consumes quiz generation jobs from the job queue.
+
+Run alongside the Streamlit app when JOB_QUEUE_ENABLED=true:
+    python worker.py --processes 4
+
+Each process claims one job at a time, generates its questions with
+QuestionGenerator and publishes them one by one, so the UI can render
+them while the rest are still being generated.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+from dotenv import load_dotenv
+from src.config.settings import settings
+from src.common.logger import get_logger
+
+load_dotenv()
+
+
+def process_job(queue, job_id: str, payload: dict, worker_id: str = None):
+    """
+    Generate a job's questions and publish them as they're ready.
+
+    Stops early, without publishing more, once the job is no longer this
+    worker's: cancelled or timed out by the web side, or handed to another
+    worker.
+    """
+    from src.generator.question_generator import QuestionGenerator
+    from src.utils.helpers import QuizManager
+
+    document_index = None
+    if payload.get('document_index'):
+        from src.retrieval.document_index import DocumentIndex
+        document_index = DocumentIndex(settings.INDEX_DIR, payload['document_index'])
+
+    generator = QuestionGenerator(
+        provider=payload['provider'],
+        api_key=payload['api_key'],
+        model=payload['model'],
+        persona_style=payload['persona_style'],
+        fallbacks=[tuple(f) for f in payload.get('fallbacks') or []],
+        document_index=document_index
+    )
+    kind = 'mcq' if payload['question_type'] == "Multiple Choice" else 'fill_blank'
+
+    # Stems the session has already seen are kept out of this job's questions
+    manager = QuizManager()
+    for text in payload.get('avoid') or []:
+        manager.recent_questions.add(text)
+
+    for index, question in manager.iter_generated(
+        generator,
+        payload['topic'], payload['question_type'], payload['difficulty'], payload['num_questions']
+    ):
+        if worker_id is not None and not queue.owns(job_id, worker_id):
+            get_logger("worker").info(f"Job {job_id} was cancelled or reassigned; stopping")
+            return
+        queue.publish(job_id, {'index': index, 'kind': kind, 'question': question.model_dump()})
+
+
+def run_worker(stop_event):
+    from src.common.logger import setup_logging
+    from src.jobs.job_queue import get_job_queue
+
+    # Several processes can't share one rotating log file; each writes JSON lines to stdout instead
+    setup_logging(to_stdout=True)
+    logger = get_logger("worker")
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    queue = get_job_queue()
+    logger.info(f"Worker {worker_id} started")
+
+    if settings.POOL_ENABLED:
+        # The pool is per process, so each worker process keeps its own warm
+        from src.pool.question_pool import start_pool_worker
+        start_pool_worker()
+
+    while not stop_event.is_set():
+        claimed = queue.claim(worker_id, timeout=1.0)
+        if claimed is None:
+            continue
+
+        job_id, payload = claimed
+        logger.info(f"Worker {worker_id} processing job {job_id}")
+        error = None
+        try:
+            process_job(queue, job_id, payload, worker_id)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            error = str(e)
+        # A job requeued to another worker is that worker's to finish
+        if queue.owns(job_id, worker_id):
+            queue.complete(job_id, error=error)
+
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run quiz generation worker processes")
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    stop_event = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(stop_event,), name=f"quiz-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(*_):
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()